@@ -0,0 +1,426 @@
+"""
+Local download cache for NYC TLC files.
+
+Files are stored on disk keyed by URL plus the server's ETag (or size when
+there is no ETag), so a replace load of a month we already fetched becomes a
+local-disk read. Supports:
+- Resumable downloads (HTTP Range requests on a .part file)
+- Checksum verification (size, plus MD5 when the ETag is a plain MD5)
+- LRU eviction once the cache grows past a size cap
+
+Pipeline runs share the cache from several processes (the webapp's worker
+pool), so coordination goes through lock files next to the data:
+- index.lock serializes updates of index.json
+- <key>.lock is held by the process downloading a key
+- <key>.pin is held shared while a file is being read; eviction and
+  clear() skip a key whose pin they can't take exclusively
+Locks are released by the OS if a process dies, so none go stale. The
+lock files themselves are left in place (they are empty).
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Default cache size cap (bytes)
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+
+# Chunk size for streaming downloads and hashing
+CHUNK_SIZE = 1024 * 1024
+
+# An ETag is a plain MD5 of the body for single-part S3/CloudFront uploads
+MD5_ETAG_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ChecksumError(IOError):
+    """Raised when a downloaded file does not match the server's checksum."""
+
+
+class FileLock:
+    """
+    Advisory lock on a file, across processes and threads.
+
+    Every acquire opens its own handle, so two holders in one process
+    exclude each other like two processes do. Windows has no shared
+    locks, so there shared=True takes an exclusive lock.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    def acquire(self, shared: bool = False, blocking: bool = True) -> bool:
+        """Take the lock; returns False if blocking is off and it is held."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            if fcntl is not None:
+                flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        if not blocking:
+                            raise BlockingIOError(f"{self.path} is locked")
+                        time.sleep(0.05)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if fcntl is None:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        # Closing the handle releases a flock
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class DownloadCache:
+    """Content-addressed on-disk cache of remote files with LRU eviction."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        session: Optional[requests.Session] = None,
+        timeout: int = 300
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / "index.json"
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> dict:
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def _save_index(self, index: dict) -> None:
+        """Replace index.json. Caller holds _index_lock()."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix="index.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _index_lock(self) -> FileLock:
+        return FileLock(self.cache_dir / "index.lock")
+
+    def _key_lock(self, key: str) -> FileLock:
+        return FileLock(self.cache_dir / f"{key}.lock")
+
+    def _pin(self, key: str) -> FileLock:
+        """Shared lock held while key's file is read; blocks eviction."""
+        pin = FileLock(self.cache_dir / f"{key}.pin")
+        pin.acquire(shared=True)
+        return pin
+
+    def _unpinned(self, key: str) -> Optional[FileLock]:
+        """Exclusive pin on key if no one is reading it, else None."""
+        pin = FileLock(self.cache_dir / f"{key}.pin")
+        return pin if pin.acquire(blocking=False) else None
+
+    # ------------------------------------------------------------------
+    # Paths and keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def cache_key(url: str, etag: Optional[str], size: Optional[int]) -> str:
+        """Key a URL by its ETag, falling back to its size."""
+        version = etag or (str(size) if size is not None else "")
+        return hashlib.sha256(f"{url}|{version}".encode()).hexdigest()[:32]
+
+    def _object_path(self, key: str, url: str) -> Path:
+        suffix = Path(url.split("?", 1)[0]).suffix
+        return self.cache_dir / f"{key}{suffix}"
+
+    def _partial_path(self, key: str, url: str) -> Path:
+        return self._object_path(key, url).with_suffix(".part")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def fetch(self, url: str) -> Iterator[Path]:
+        """
+        Yield a local path for url, downloading it if needed.
+
+        The file is pinned while the context is open so a concurrent
+        download (in this or another process) cannot evict it mid-read.
+        """
+        pin, path = self._ensure(url)
+        try:
+            yield path
+        finally:
+            pin.release()
+
+    def clear(self) -> None:
+        """Remove every cached file that is not being read or downloaded."""
+        with self._index_lock():
+            index = self._load_index()
+            for key, entry in list(index.items()):
+                if not self._remove(key, entry["url"], partial=True):
+                    continue
+                del index[key]
+            self._save_index(index)
+
+    def stats(self) -> dict:
+        """Summary of cache contents."""
+        index = self._load_index()
+        return {
+            "entries": len(index),
+            "total_bytes": sum(entry["size"] for entry in index.values()),
+            "max_bytes": self.max_bytes,
+        }
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    def _head(self, url: str) -> tuple[Optional[str], Optional[int]]:
+        """Get ETag and size for url."""
+        response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        length = response.headers.get("Content-Length")
+        return etag, int(length) if length is not None else None
+
+    def _latest_entry(self, url: str) -> Optional[str]:
+        """Most recently used cache key for url (used when offline)."""
+        index = self._load_index()
+        candidates = [
+            (entry["last_access"], key) for key, entry in index.items()
+            if entry["url"] == url and self._object_path(key, url).exists()
+        ]
+        return max(candidates)[1] if candidates else None
+
+    def _ensure(self, url: str) -> tuple[FileLock, Path]:
+        """Return (pin, path) of a verified local copy of url; release the pin when done."""
+        try:
+            etag, size = self._head(url)
+        except requests.RequestException:
+            # Offline: serve the last copy we have, if any
+            key = self._latest_entry(url)
+            if key is None:
+                raise
+            pin = self._pin(key)
+            path = self._object_path(key, url)
+            if not path.exists():
+                # Evicted before we pinned it
+                pin.release()
+                raise
+            print(f"Could not reach {url}, using cached copy")
+            self._touch(key)
+            return pin, path
+
+        key = self.cache_key(url, etag, size)
+        path = self._object_path(key, url)
+
+        # One process downloads a key; the others wait here and then hit the cache
+        with self._key_lock(key):
+            entry = self._load_index().get(key)
+            if entry and path.exists() and path.stat().st_size == entry["size"]:
+                print(f"Using cached download: {path.name}")
+                pin = self._pin(key)
+                self._touch(key)
+                return pin, path
+
+            sha256 = self._download(url, key, etag, size)
+            pin = self._pin(key)
+            self._add_entry(key, url, etag, path.stat().st_size, sha256)
+
+        try:
+            self._evict()
+        except BaseException:
+            pin.release()
+            raise
+        return pin, path
+
+    def _download(self, url: str, key: str, etag: Optional[str], size: Optional[int]) -> str:
+        """Download url into the cache, resuming a partial file if present."""
+        partial_path = self._partial_path(key, url)
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        if size is not None and offset > size:
+            partial_path.unlink()
+            offset = 0
+
+        if size is not None and offset == size:
+            # A previous run finished the transfer but not the verify/rename
+            return self._finish(partial_path, url, key, etag, size, *self._hash_file(partial_path))
+
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if etag:
+                headers["If-Range"] = etag
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                # Server ignored the range (or the file changed): start over
+                offset = 0
+
+            if offset:
+                print(f"Resuming download of {url} at byte {offset}")
+                md5, sha256 = self._hash_file(partial_path)
+            else:
+                print(f"Downloading {url}")
+                md5, sha256 = hashlib.md5(), hashlib.sha256()
+
+            with open(partial_path, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    md5.update(chunk)
+                    sha256.update(chunk)
+
+        return self._finish(partial_path, url, key, etag, size, md5, sha256)
+
+    @staticmethod
+    def _hash_file(path: Path) -> tuple:
+        """MD5 and SHA-256 hashers primed with the contents of path."""
+        md5, sha256 = hashlib.md5(), hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                md5.update(chunk)
+                sha256.update(chunk)
+        return md5, sha256
+
+    def _finish(
+        self,
+        partial_path: Path,
+        url: str,
+        key: str,
+        etag: Optional[str],
+        size: Optional[int],
+        md5,
+        sha256
+    ) -> str:
+        """Verify a completed .part file and move it into place."""
+        self._verify(partial_path, etag, size, md5.hexdigest())
+        os.replace(partial_path, self._object_path(key, url))
+        return sha256.hexdigest()
+
+    def _verify(self, path: Path, etag: Optional[str], size: Optional[int], md5: str) -> None:
+        """Check a finished download against the server's size and ETag."""
+        actual_size = path.stat().st_size
+        if size is not None and actual_size != size:
+            if actual_size > size:
+                path.unlink()
+            raise ChecksumError(f"Size mismatch for {path.name}: expected {size}, got {actual_size}")
+
+        expected_md5 = etag.strip('"').lower() if etag else ""
+        if MD5_ETAG_PATTERN.match(expected_md5) and expected_md5 != md5:
+            path.unlink()
+            raise ChecksumError(f"MD5 mismatch for {path.name}: expected {expected_md5}, got {md5}")
+
+    # ------------------------------------------------------------------
+    # LRU bookkeeping
+    # ------------------------------------------------------------------
+
+    def _add_entry(self, key: str, url: str, etag: Optional[str], size: int, sha256: str) -> None:
+        with self._index_lock():
+            index = self._load_index()
+            index[key] = {
+                "url": url,
+                "etag": etag,
+                "size": size,
+                "sha256": sha256,
+                "last_access": time.time(),
+            }
+            self._save_index(index)
+
+    def _touch(self, key: str) -> None:
+        with self._index_lock():
+            index = self._load_index()
+            if key in index:
+                index[key]["last_access"] = time.time()
+                self._save_index(index)
+
+    def _evict(self) -> None:
+        """Drop least recently used files until the cache fits max_bytes."""
+        with self._index_lock():
+            index = self._load_index()
+            total = sum(entry["size"] for entry in index.values())
+            if total <= self.max_bytes:
+                return
+
+            by_age = sorted(index.items(), key=lambda item: item[1]["last_access"])
+            # Never evict the newest entry or a file that is being read
+            for key, entry in by_age[:-1]:
+                if total <= self.max_bytes:
+                    break
+                if not self._remove(key, entry["url"]):
+                    continue
+                total -= entry["size"]
+                del index[key]
+                print(f"Evicted cached download: {entry['url']}")
+
+            self._save_index(index)
+
+    def _remove(self, key: str, url: str, partial: bool = False) -> bool:
+        """
+        Delete key's file (and its .part if partial) unless a process is
+        reading or downloading it; returns whether it was deleted.
+        """
+        key_lock = self._key_lock(key)
+        if not key_lock.acquire(blocking=False):
+            return False
+        try:
+            pin = self._unpinned(key)
+            if pin is None:
+                return False
+            try:
+                self._object_path(key, url).unlink(missing_ok=True)
+                if partial:
+                    self._partial_path(key, url).unlink(missing_ok=True)
+            finally:
+                pin.release()
+        finally:
+            key_lock.release()
+        return True
@@ -8,12 +8,30 @@ Supports:
 - Schema evolution (new columns handled automatically)
 """
 
+import hashlib
 import os
-import dlt
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import dlt
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from download_cache import DEFAULT_MAX_BYTES, DownloadCache
+from sampling import stratified_sample, uniform_sample
 
 # NYC TLC provides parquet files - we'll use a sample for demo
-NYC_TAXI_BASE_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data"
+# (override NYC_TAXI_BASE_URL to point at a mirror, a local stand-in server or a
+# local directory / file:// URL of TLC-named parquet files)
+NYC_TAXI_BASE_URL = os.environ.get("NYC_TAXI_BASE_URL", "https://d37ci6vzurychx.cloudfront.net/trip-data")
 
 # Get absolute path to data directory
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -23,13 +41,387 @@ DATA_DIR = PROJECT_ROOT / "data"
 SHARED_DB_PATH = r"c:\Users\FrederikHye-Hestvang\fagligfredag\data\nyc_taxi.duckdb"
 DUCKDB_PATH = os.environ.get("DUCKDB_PATH", SHARED_DB_PATH)
 
+# Downloaded TLC files are cached here, keyed by URL + ETag
+DOWNLOAD_CACHE_DIR = DATA_DIR / "cache" / "downloads"
+DOWNLOAD_CACHE_MAX_BYTES = int(os.environ.get("NYC_TAXI_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+# Rows per Arrow chunk handed to dlt (dlt normalizes Arrow tables column-wise)
+DEFAULT_BATCH_SIZE = 50_000
+
+# Default number of rows loaded per file for demo runs (None = full file)
+DEFAULT_ROW_LIMIT = 10_000
+
+# How row_limit rows are picked from a file, all in one streaming pass:
+# - head: the first row_limit rows (stops reading early)
+# - uniform: uniform random sample of the whole file
+# - stratified: random sample with each pickup day's share proportional to its rows
+SAMPLING_MODES = ("head", "uniform", "stratified")
+DEFAULT_SAMPLING = "head"
+
+# Default number of files downloaded/extracted concurrently in a backfill
+DEFAULT_WORKERS = 4
+
+# Load package file format. parquet keeps extract -> normalize -> load
+# columnar end to end; DuckDB ingests it with a native parquet scan instead
+# of executing INSERT statements (insert_values).
+LOADER_FILE_FORMATS = ("parquet", "insert_values", "jsonl")
+DEFAULT_LOADER_FILE_FORMAT = "parquet"
+
+# Row filters: (column, op, value) tuples ANDed together, using the TLC file's
+# own column names. ops: ==, !=, <, <=, >, >=, in, not in
+TripFilters = Sequence[tuple[str, str, Any]]
+
+# Pickup timestamp column per taxi type - the cursor for incremental loads
+PICKUP_DATETIME_COLUMNS = {
+    "yellow": "tpep_pickup_datetime",
+    "green": "lpep_pickup_datetime",
+    "fhv": "pickup_datetime",
+    "fhvhv": "pickup_datetime",
+}
+
+# Columns that identify a trip, hashed into content-based unique_ids. The
+# list is fixed (and read even when projected away) so a trip's key doesn't
+# depend on which columns are loaded; columns a file lacks are skipped.
+TRIP_KEY_COLUMNS = {
+    "yellow": (
+        "VendorID", "tpep_pickup_datetime", "tpep_dropoff_datetime", "PULocationID", "DOLocationID",
+        "passenger_count", "trip_distance", "fare_amount", "total_amount",
+    ),
+    "green": (
+        "VendorID", "lpep_pickup_datetime", "lpep_dropoff_datetime", "PULocationID", "DOLocationID",
+        "passenger_count", "trip_distance", "fare_amount", "total_amount",
+    ),
+    "fhv": (
+        "dispatching_base_num", "pickup_datetime", "dropOff_datetime", "PUlocationID", "DOlocationID",
+        "Affiliated_base_number",
+    ),
+    "fhvhv": (
+        "hvfhs_license_num", "dispatching_base_num", "pickup_datetime", "dropoff_datetime",
+        "PULocationID", "DOLocationID", "trip_miles", "base_passenger_fare",
+    ),
+}
+
+# Hash of a null value in a key column
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+# Same rules stg_trips.sql applies - push them into the scan to skip bad rows
+VALID_TRIP_FILTERS: TripFilters = [
+    ("trip_distance", ">", 0),
+    ("fare_amount", ">", 0),
+    ("total_amount", ">", 0),
+]
+
+
+def get_trip_data_url(taxi_type: str, year: int, month: int) -> str:
+    """Build the TLC download URL for one taxi type and month."""
+    return f"{NYC_TAXI_BASE_URL}/{taxi_type}_tripdata_{year}-{month:02d}.parquet"
+
+
+def month_bounds(year: int, month: int) -> tuple[datetime, datetime]:
+    """Start of a month and of the next one (naive, like TLC timestamps)."""
+    return datetime(year, month, 1), datetime(year + month // 12, month % 12 + 1, 1)
+
+
+def iter_months(start_month: str, end_month: str) -> list[tuple[int, int]]:
+    """
+    List (year, month) pairs between two months, inclusive.
+
+    Args:
+        start_month: First month as "YYYY-MM"
+        end_month: Last month as "YYYY-MM"
+    """
+    start_year, start_mon = (int(part) for part in start_month.split("-"))
+    end_year, end_mon = (int(part) for part in end_month.split("-"))
+
+    start_index = start_year * 12 + start_mon - 1
+    end_index = end_year * 12 + end_mon - 1
+    if end_index < start_index:
+        raise ValueError(f"end_month {end_month} is before start_month {start_month}")
+
+    return [(index // 12, index % 12 + 1) for index in range(start_index, end_index + 1)]
+
+
+@lru_cache(maxsize=1)
+def get_download_cache() -> DownloadCache:
+    """Shared download cache under DATA_DIR."""
+    return DownloadCache(DOWNLOAD_CACHE_DIR, max_bytes=DOWNLOAD_CACHE_MAX_BYTES)
+
+
+@contextmanager
+def open_trip_file(url: str) -> Iterator[Path]:
+    """
+    Yield a local path for a TLC file URL.
+
+    http(s) URLs go through the download cache; file:// URLs and plain
+    paths (a local mirror) are read in place.
+    """
+    if url.startswith(("http://", "https://")):
+        with get_download_cache().fetch(url) as path:
+            yield path
+    elif url.startswith("file://"):
+        yield Path(url2pathname(urlparse(url).path))
+    else:
+        yield Path(url)
+
+
+def iter_parquet_batches(
+    path: Path,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    row_limit: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None
+) -> Iterator[pa.Table]:
+    """
+    Stream a parquet file as Arrow tables of at most batch_size rows.
+
+    The file is read through a pyarrow dataset scan: only the requested
+    columns are decoded, row groups whose statistics cannot match the
+    filters are skipped, and filtered-out rows are never materialized.
+    Row groups are decoded a few at a time, so peak memory is bounded by
+    the row group and batch size rather than the file size. Reading stops
+    as soon as row_limit rows have been produced.
+
+    Args:
+        path: Local parquet file
+        batch_size: Maximum rows per yielded table
+        row_limit: Stop after this many rows (None = read the whole file)
+        columns: Columns to read (None = all columns)
+        filters: Row filters as (column, op, value) tuples, ANDed together
+    """
+    if row_limit is not None and row_limit <= 0:
+        return
+
+    dataset = ds.dataset(path, format="parquet")
+    scanner = dataset.scanner(
+        columns=list(columns) if columns else None,
+        filter=pq.filters_to_expression(list(filters)) if filters else None,
+        batch_size=batch_size,
+        batch_readahead=2,
+        fragment_readahead=1,
+        use_threads=True,
+    )
+
+    rows_read = 0
+    for batch in scanner.to_batches():
+        if not batch.num_rows:
+            continue
+        if row_limit is not None and rows_read + batch.num_rows >= row_limit:
+            yield pa.Table.from_batches([batch.slice(0, row_limit - rows_read)])
+            return
+        rows_read += batch.num_rows
+        yield pa.Table.from_batches([batch])
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads the bits of uint64 values (wraps on overflow)."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _column_hashes(column: pa.ChunkedArray) -> np.ndarray:
+    """
+    64-bit hash of each value of a column, stable across files.
+
+    Numbers hash by value as float64 (so an int32 and a float64 column agree),
+    timestamps by their microseconds, strings by a digest of each distinct
+    value.
+    """
+    column = column.combine_chunks()
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+
+    if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+        distinct = pc.unique(column).drop_null()
+        digests = np.array(
+            [int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+             for value in distinct.to_pylist()] + [int(_NULL_HASH)],
+            dtype=np.uint64
+        )
+        positions = pc.fill_null(pc.index_in(column, distinct), len(distinct))
+        return digests[positions.to_numpy()]
+
+    if pa.types.is_timestamp(column.type) or pa.types.is_date(column.type):
+        bits = pc.cast(pc.cast(column, pa.timestamp("us")), pa.int64()).fill_null(0).to_numpy().view(np.uint64)
+    else:
+        # + 0.0 turns -0.0 into 0.0
+        floats = pc.cast(column, pa.float64()).fill_null(0.0).to_numpy() + 0.0
+        bits = floats.view(np.uint64)
+
+    hashes = _mix64(bits)
+    hashes[~pc.is_valid(column).to_numpy(zero_copy_only=False)] = _NULL_HASH
+    return hashes
+
+
+def content_hash_ids(table: pa.Table, taxi_type: str) -> pa.Array:
+    """
+    Deterministic unique_ids computed from row contents.
+
+    The same trip gets the same key however the file is sliced, filtered or
+    projected, so merge loads upsert instead of duplicating. Keys are
+    "{taxi_type}_{64-bit hash of the TRIP_KEY_COLUMNS in the chunk}",
+    computed column by column on the Arrow buffers.
+
+    Args:
+        table: Chunk of raw TLC trip data (before metadata columns are added)
+        taxi_type: Type of taxi the chunk belongs to
+    """
+    row_hashes = np.zeros(table.num_rows, dtype=np.uint64)
+    for name in TRIP_KEY_COLUMNS[taxi_type]:
+        if name in table.column_names:
+            # Order-dependent combine, so swapped values hash differently
+            row_hashes = _mix64(row_hashes * np.uint64(31) + _column_hashes(table[name]))
+    return pc.binary_join_element_wise(f"{taxi_type}_", pc.cast(pa.array(row_hashes), pa.string()), "")
+
+
+def add_trip_columns(
+    table: pa.Table,
+    taxi_type: str,
+    year: int,
+    month: int,
+    start_row: int = 0,
+    content_keys: bool = False
+) -> pa.Table:
+    """
+    Add unique_id and metadata columns to an Arrow chunk of trip data.
+
+    All columns are built vectorized - no per-row Python work.
+
+    Args:
+        table: Chunk of raw TLC trip data
+        taxi_type: Type of taxi the chunk belongs to
+        year: Year of data
+        month: Month of data
+        start_row: Position of the chunk's first row among the rows read from the file
+        content_keys: Key rows by a hash of their contents instead of position
+    """
+    num_rows = table.num_rows
+
+    if content_keys:
+        unique_id = content_hash_ids(table, taxi_type)
+    else:
+        # unique_id = "{taxi_type}_{year}_{month}_{row position}"
+        row_positions = pc.cast(pa.array(np.arange(start_row, start_row + num_rows)), pa.string())
+        unique_id = pc.binary_join_element_wise(f"{taxi_type}_{year}_{month}_", row_positions, "")
+
+    table = table.append_column(pa.field("unique_id", pa.string(), nullable=False), unique_id)
+    table = table.append_column("_taxi_type", pa.repeat(pa.scalar(taxi_type, pa.string()), num_rows))
+    table = table.append_column("_data_year", pa.repeat(pa.scalar(year, pa.int64()), num_rows))
+    table = table.append_column("_data_month", pa.repeat(pa.scalar(month, pa.int64()), num_rows))
+    return table
+
+
+def iter_sampled_batches(
+    path: Path,
+    taxi_type: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    row_limit: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None,
+    sampling: str = DEFAULT_SAMPLING,
+    sample_seed: Optional[int] = None
+) -> Iterator[pa.Table]:
+    """
+    Stream row_limit rows of a parquet file picked by the sampling mode.
+
+    "head" stops reading once row_limit rows are produced. "uniform" and
+    "stratified" scan the whole file once, holding only the candidate
+    sample in memory, and yield the sample in file order.
+    """
+    if sampling == "head" or row_limit is None:
+        yield from iter_parquet_batches(path, batch_size, row_limit, columns, filters)
+        return
+
+    if sampling == "uniform":
+        batches = iter_parquet_batches(path, batch_size, None, columns, filters)
+        yield from uniform_sample(batches, row_limit, batch_size, sample_seed)
+        return
+
+    # Stratify by pickup day; read the pickup column even if it was projected away
+    pickup_column = PICKUP_DATETIME_COLUMNS[taxi_type]
+    drop_pickup = bool(columns) and pickup_column not in columns
+    scan_columns = [*columns, pickup_column] if drop_pickup else columns
+
+    batches = iter_parquet_batches(path, batch_size, None, scan_columns, filters)
+    for chunk in stratified_sample(batches, row_limit, pickup_column, batch_size, sample_seed):
+        yield chunk.drop_columns([pickup_column]) if drop_pickup else chunk
+
+
+def iter_trips(
+    taxi_type: str,
+    year: int,
+    month: int,
+    row_limit: Optional[int] = DEFAULT_ROW_LIMIT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None,
+    content_keys: bool = False,
+    sampling: str = DEFAULT_SAMPLING,
+    sample_seed: Optional[int] = None
+) -> Iterator[pa.Table]:
+    """
+    Download one TLC file and yield it as Arrow chunks with metadata columns.
+
+    Args:
+        taxi_type: Type of taxi (yellow, green, fhv, fhvhv)
+        year: Year of data
+        month: Month of data
+        row_limit: Maximum rows to load from the file (None = full file)
+        batch_size: Rows per Arrow chunk read from the file
+        columns: TLC columns to load (None = all columns)
+        filters: Row filters pushed into the parquet scan
+        content_keys: Use content-hash unique_ids instead of row positions
+            (the TRIP_KEY_COLUMNS are read for it even if not in columns)
+        sampling: How row_limit rows are picked ("head", "uniform", "stratified")
+        sample_seed: Random seed for uniform/stratified sampling (None = random)
+    """
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"sampling must be one of {SAMPLING_MODES}, got {sampling!r}")
+
+    url = get_trip_data_url(taxi_type, year, month)
+
+    print(f"Loading data from: {url}")
+
+    try:
+        with open_trip_file(url) as local_path:
+            # Content keys hash fixed columns, read even if projected away
+            key_only = []
+            if content_keys and columns:
+                file_columns = pq.read_schema(local_path).names
+                key_only = [
+                    name for name in TRIP_KEY_COLUMNS[taxi_type]
+                    if name in file_columns and name not in columns
+                ]
+            scan_columns = [*columns, *key_only] if key_only else columns
+
+            start_row = 0
+            for chunk in iter_sampled_batches(
+                local_path, taxi_type, batch_size, row_limit, scan_columns, filters, sampling, sample_seed
+            ):
+                chunk = add_trip_columns(chunk, taxi_type, year, month, start_row, content_keys)
+                yield chunk.drop_columns(key_only) if key_only else chunk
+                start_row += chunk.num_rows
+
+    except Exception as e:
+        print(f"Error loading data: {e}")
+        raise
+
 
 @dlt.source(name="nyc_taxi")
 def nyc_taxi_source(
     year: int = 2023,
     month: int = 1,
     taxi_type: str = "yellow",
-    write_disposition: str = "replace"
+    write_disposition: str = "replace",
+    row_limit: Optional[int] = DEFAULT_ROW_LIMIT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None,
+    incremental: bool = False,
+    sampling: str = DEFAULT_SAMPLING,
+    sample_seed: Optional[int] = None
 ):
     """
     Source for NYC Taxi data.
@@ -42,53 +434,122 @@ def nyc_taxi_source(
             - "replace": Replace all data (default)
             - "merge": Upsert based on primary key
             - "append": Add new records without checking duplicates
+        row_limit: Maximum rows to load from the file (None = full file)
+        batch_size: Rows per Arrow chunk read from the file
+        columns: TLC columns to load (None = all columns)
+        filters: Row filters as (column, op, value) tuples pushed into the
+            parquet scan, e.g. VALID_TRIP_FILTERS
+        incremental: Only load trips picked up at or after the last loaded
+            pickup datetime (dlt incremental cursor), keyed by content hash.
+            Trips with a pickup outside the file's month are skipped, so a
+            bad timestamp (e.g. in 2098) can't move the cursor past every
+            later file. Requires write_disposition "merge" or "append"; use
+            row_limit=None so the cursor covers the whole file.
+        sampling: How row_limit rows are picked from the file - "head",
+            "uniform" (random) or "stratified" (random, proportional per
+            pickup day)
+        sample_seed: Random seed for uniform/stratified sampling (None = random)
     """
+    if incremental and write_disposition == "replace":
+        raise ValueError("incremental loads need write_disposition 'merge' or 'append'")
+
+    cursor_column = PICKUP_DATETIME_COLUMNS[taxi_type]
+    if incremental and columns and cursor_column not in columns:
+        columns = [*columns, cursor_column]
 
     @dlt.resource(
         name="trips",
         write_disposition=write_disposition,
         primary_key="unique_id"
     )
-    def trips_resource():
-        """Load taxi trip data."""
-        import pandas as pd
+    def trips_resource(
+        pickup_datetime=dlt.sources.incremental(cursor_column) if incremental else None
+    ):
+        """Load taxi trip data as Arrow chunks."""
+        scan_filters = list(filters or [])
+        if pickup_datetime is not None:
+            # The cursor is the max pickup loaded, so outliers must not reach it
+            month_start, next_month = month_bounds(year, month)
+            scan_filters += [(cursor_column, ">=", month_start), (cursor_column, "<", next_month)]
+        if pickup_datetime is not None and pickup_datetime.last_value is not None:
+            # Push the cursor into the scan so older rows are never read.
+            # TLC timestamps are naive; dlt keeps the cursor as UTC.
+            last_value = pickup_datetime.last_value
+            if getattr(last_value, "tzinfo", None) is not None:
+                last_value = last_value.replace(tzinfo=None)
+            print(f"Incremental load: {cursor_column} >= {last_value}")
+            scan_filters.append((cursor_column, ">=", last_value))
 
-        # Format month with leading zero
-        month_str = str(month).zfill(2)
+        yield from iter_trips(
+            taxi_type, year, month, row_limit, batch_size, columns,
+            scan_filters or None, content_keys=incremental,
+            sampling=sampling, sample_seed=sample_seed
+        )
 
-        # Construct URL for parquet file
-        url = f"{NYC_TAXI_BASE_URL}/{taxi_type}_tripdata_{year}-{month_str}.parquet"
-
-        print(f"Loading data from: {url}")
+    return trips_resource
 
-        try:
-            # Read parquet file directly from URL
-            df = pd.read_parquet(url)
 
-            # Create unique ID combining year, month, taxi_type and row index
-            # This ensures uniqueness across different loads
-            df['unique_id'] = df.apply(
-                lambda row: f"{taxi_type}_{year}_{month}_{row.name}",
-                axis=1
-            )
+@dlt.source(name="nyc_taxi")
+def nyc_taxi_backfill_source(
+    start_month: str = "2023-01",
+    end_month: str = "2023-12",
+    taxi_types: Sequence[str] = ("yellow",),
+    write_disposition: str = "replace",
+    row_limit: Optional[int] = DEFAULT_ROW_LIMIT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None,
+    sampling: str = DEFAULT_SAMPLING,
+    sample_seed: Optional[int] = None
+):
+    """
+    Source for a range of months and taxi types.
 
-            # Add metadata columns
-            df['_taxi_type'] = taxi_type
-            df['_data_year'] = year
-            df['_data_month'] = month
+    Fans out into one parallelized resource per file, all writing to the
+    trips table, so dlt's extract workers download and read files
+    concurrently.
 
-            # Limit to first 10000 rows for demo (remove for full load)
-            df = df.head(10000)
+    Args:
+        start_month: First month as "YYYY-MM"
+        end_month: Last month as "YYYY-MM" (inclusive)
+        taxi_types: Taxi types to load (yellow, green, fhv, fhvhv)
+        write_disposition: "replace", "merge", or "append"
+        row_limit: Maximum rows to load per file (None = full file)
+        batch_size: Rows per Arrow chunk read from each file
+        columns: TLC columns to load (None = all columns)
+        filters: Row filters pushed into each file's parquet scan
+        sampling: How row_limit rows are picked from each file ("head", "uniform", "stratified")
+        sample_seed: Random seed for uniform/stratified sampling (None = random)
+    """
+    resources = []
+    for taxi_type in taxi_types:
+        for year, month in iter_months(start_month, end_month):
+            resources.append(dlt.resource(
+                iter_trips(
+                    taxi_type, year, month, row_limit, batch_size, columns, filters,
+                    sampling=sampling, sample_seed=sample_seed
+                ),
+                name=f"trips_{taxi_type}_{year}_{month:02d}",
+                table_name="trips",
+                write_disposition=write_disposition,
+                primary_key="unique_id",
+                parallelized=True
+            ))
+    return resources
 
-            # Yield records
-            for record in df.to_dict('records'):
-                yield record
 
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            raise
+def get_pipeline(dataset_name: str = "nyc_taxi_raw") -> dlt.Pipeline:
+    """Create the NYC Taxi pipeline writing to the shared DuckDB database."""
+    # Ensure data directory exists
+    DATA_DIR.mkdir(exist_ok=True)
 
-    return trips_resource
+    # Configure pipeline with absolute path
+    return dlt.pipeline(
+        pipeline_name="nyc_taxi_pipeline",
+        destination=dlt.destinations.duckdb(DUCKDB_PATH),
+        dataset_name=dataset_name,
+        pipelines_dir=str(PROJECT_ROOT / ".dlt_pipelines"),
+    )
 
 
 def run_pipeline(
@@ -96,7 +557,15 @@ def run_pipeline(
     month: int = 1,
     taxi_type: str = "yellow",
     dataset_name: str = "nyc_taxi_raw",
-    write_disposition: str = "replace"
+    write_disposition: str = "replace",
+    row_limit: Optional[int] = DEFAULT_ROW_LIMIT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None,
+    incremental: bool = False,
+    loader_file_format: str = DEFAULT_LOADER_FILE_FORMAT,
+    sampling: str = DEFAULT_SAMPLING,
+    sample_seed: Optional[int] = None
 ):
     """
     Run the NYC Taxi data pipeline.
@@ -107,30 +576,38 @@ def run_pipeline(
         taxi_type: Type of taxi
         dataset_name: Name of the destination dataset
         write_disposition: "replace", "merge", or "append"
+        row_limit: Maximum rows to load (None = full file)
+        batch_size: Rows per Arrow chunk read from the file
+        columns: TLC columns to load (None = all columns)
+        filters: Row filters pushed into the parquet scan
+        incremental: Only load trips newer than the stored pickup cursor
+        loader_file_format: Load package format ("parquet", "insert_values", "jsonl")
+        sampling: How row_limit rows are picked ("head", "uniform", "stratified")
+        sample_seed: Random seed for uniform/stratified sampling (None = random)
     """
-    # Ensure data directory exists
-    DATA_DIR.mkdir(exist_ok=True)
-
-    # Configure pipeline with absolute path
-    pipeline = dlt.pipeline(
-        pipeline_name="nyc_taxi_pipeline",
-        destination=dlt.destinations.duckdb(DUCKDB_PATH),
-        dataset_name=dataset_name,
-        pipelines_dir=str(PROJECT_ROOT / ".dlt_pipelines"),
-    )
+    pipeline = get_pipeline(dataset_name)
 
     # Get source with specified write disposition
     source = nyc_taxi_source(
         year=year,
         month=month,
         taxi_type=taxi_type,
-        write_disposition=write_disposition
+        write_disposition=write_disposition,
+        row_limit=row_limit,
+        batch_size=batch_size,
+        columns=columns,
+        filters=filters,
+        incremental=incremental,
+        sampling=sampling,
+        sample_seed=sample_seed
     )
 
     # Run pipeline
     print(f"Starting pipeline for {taxi_type} taxi data: {year}-{month:02d}")
-    print(f"Write disposition: {write_disposition}")
-    load_info = pipeline.run(source)
+    print(f"Write disposition: {write_disposition}, file format: {loader_file_format}")
+    if row_limit is not None:
+        print(f"Row limit: {row_limit:,} ({sampling})")
+    load_info = pipeline.run(source, loader_file_format=loader_file_format)
 
     print(f"Pipeline completed!")
     print(load_info)
@@ -138,6 +615,73 @@ def run_pipeline(
     return load_info
 
 
+def run_backfill(
+    start_month: str,
+    end_month: str,
+    taxi_types: Sequence[str] = ("yellow",),
+    dataset_name: str = "nyc_taxi_raw",
+    write_disposition: str = "replace",
+    row_limit: Optional[int] = DEFAULT_ROW_LIMIT,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[TripFilters] = None,
+    workers: int = DEFAULT_WORKERS,
+    loader_file_format: str = DEFAULT_LOADER_FILE_FORMAT,
+    sampling: str = DEFAULT_SAMPLING,
+    sample_seed: Optional[int] = None
+):
+    """
+    Backfill a range of months and taxi types in a single pipeline run.
+
+    Files are downloaded and extracted concurrently, normalized in parallel
+    and loaded as one load package.
+
+    Args:
+        start_month: First month as "YYYY-MM"
+        end_month: Last month as "YYYY-MM" (inclusive)
+        taxi_types: Taxi types to load
+        dataset_name: Name of the destination dataset
+        write_disposition: "replace", "merge", or "append"
+        row_limit: Maximum rows to load per file (None = full files)
+        batch_size: Rows per Arrow chunk read from each file
+        columns: TLC columns to load (None = all columns)
+        filters: Row filters pushed into each file's parquet scan
+        workers: Files downloaded/extracted and normalized concurrently
+        loader_file_format: Load package format ("parquet", "insert_values", "jsonl")
+        sampling: How row_limit rows are picked from each file ("head", "uniform", "stratified")
+        sample_seed: Random seed for uniform/stratified sampling (None = random)
+    """
+    pipeline = get_pipeline(dataset_name)
+
+    source = nyc_taxi_backfill_source(
+        start_month=start_month,
+        end_month=end_month,
+        taxi_types=taxi_types,
+        write_disposition=write_disposition,
+        row_limit=row_limit,
+        batch_size=batch_size,
+        columns=columns,
+        filters=filters,
+        sampling=sampling,
+        sample_seed=sample_seed
+    )
+
+    print(f"Starting backfill for {', '.join(taxi_types)} taxi data: {start_month} to {end_month}")
+    print(f"Files: {len(source.resources)}, workers: {workers}")
+    print(f"Write disposition: {write_disposition}, file format: {loader_file_format}")
+
+    pipeline.extract(
+        source, workers=workers, max_parallel_items=workers, loader_file_format=loader_file_format
+    )
+    pipeline.normalize(workers=workers)
+    load_info = pipeline.load(workers=workers)
+
+    print("Backfill completed!")
+    print(load_info)
+
+    return load_info
+
+
 if __name__ == "__main__":
     # Run with default parameters (Yellow taxi, Jan 2023)
     run_pipeline(year=2023, month=1, taxi_type="yellow")
@@ -0,0 +1,140 @@
+"""
+Streaming row samplers for Arrow batches.
+
+Both samplers make a single pass over the input and keep only a bounded
+set of candidate rows in memory, so a small but representative sample can
+be drawn from a full month of trips without materializing the file:
+- uniform: bottom-k over random keys (every row equally likely)
+- stratified: bottom-k per day, allocated proportionally to each day's
+  row count once the pass is complete
+
+Sampled rows are yielded in their original file order.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Helper columns carried on candidate rows while sampling
+SAMPLE_KEY = "__sample_key"
+ROW_POSITION = "__row_position"
+STRATUM = "__stratum"
+
+# Stratum used for rows without a pickup datetime
+NULL_STRATUM = -1
+
+
+def _with_sample_columns(
+    batch: pa.Table,
+    rng: np.random.Generator,
+    start_row: int,
+    stratum_column: Optional[str] = None
+) -> pa.Table:
+    """Attach a random key, the row position and (optionally) the day stratum."""
+    num_rows = batch.num_rows
+    batch = batch.append_column(SAMPLE_KEY, pa.array(rng.random(num_rows)))
+    batch = batch.append_column(ROW_POSITION, pa.array(np.arange(start_row, start_row + num_rows)))
+    if stratum_column is not None:
+        days = pc.cast(pc.cast(batch[stratum_column], pa.date32()), pa.int32())
+        batch = batch.append_column(STRATUM, pc.fill_null(days, NULL_STRATUM))
+    return batch
+
+
+def _emit(sample: Optional[pa.Table], batch_size: int) -> Iterator[pa.Table]:
+    """Yield sampled rows in file order, without helper columns."""
+    if sample is None or not sample.num_rows:
+        return
+    sample = sample.take(pc.sort_indices(sample[ROW_POSITION]))
+    sample = sample.drop_columns([name for name in (SAMPLE_KEY, ROW_POSITION, STRATUM) if name in sample.column_names])
+    for offset in range(0, sample.num_rows, batch_size):
+        yield sample.slice(offset, batch_size)
+
+
+def _rank_within_strata(sample: pa.Table) -> tuple[pa.Table, np.ndarray, np.ndarray]:
+    """Sort by (stratum, key); return the table, stratum values and per-stratum rank."""
+    sample = sample.take(pc.sort_indices(sample, sort_keys=[(STRATUM, "ascending"), (SAMPLE_KEY, "ascending")]))
+    strata = sample[STRATUM].to_numpy()
+    positions = np.arange(len(strata))
+    is_start = np.ones(len(strata), dtype=bool)
+    is_start[1:] = strata[1:] != strata[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, positions, 0))
+    return sample, strata, positions - group_start
+
+
+def uniform_sample(
+    batches: Iterable[pa.Table],
+    sample_size: int,
+    batch_size: int,
+    seed: Optional[int] = None
+) -> Iterator[pa.Table]:
+    """
+    Uniform random sample of sample_size rows in one pass.
+
+    Every row gets a random key and the sample_size smallest keys are kept,
+    so at most sample_size + one batch of rows are held at a time.
+    """
+    rng = np.random.default_rng(seed)
+    sample = None
+    rows_read = 0
+
+    for batch in batches:
+        candidates = _with_sample_columns(batch, rng, rows_read)
+        rows_read += batch.num_rows
+        if sample is not None:
+            candidates = pa.concat_tables([sample, candidates])
+        if candidates.num_rows > sample_size:
+            candidates = candidates.take(pc.select_k_unstable(candidates, sample_size, [(SAMPLE_KEY, "ascending")]))
+        sample = candidates
+
+    yield from _emit(sample, batch_size)
+
+
+def stratified_sample(
+    batches: Iterable[pa.Table],
+    sample_size: int,
+    stratum_column: str,
+    batch_size: int,
+    seed: Optional[int] = None
+) -> Iterator[pa.Table]:
+    """
+    Sample sample_size rows stratified by the day of stratum_column.
+
+    Each day keeps its sample_size smallest random keys while the rows are
+    counted per day; at the end each day gets a share proportional to its
+    row count (largest remainder) and its smallest keys fill that share.
+    Memory is bounded by sample_size rows per day.
+    """
+    rng = np.random.default_rng(seed)
+    sample = None
+    counts: dict[int, int] = {}
+    rows_read = 0
+
+    for batch in batches:
+        candidates = _with_sample_columns(batch, rng, rows_read, stratum_column)
+        rows_read += batch.num_rows
+        for entry in pc.value_counts(candidates[STRATUM]).to_pylist():
+            counts[entry["values"]] = counts.get(entry["values"], 0) + entry["counts"]
+
+        if sample is not None:
+            candidates = pa.concat_tables([sample, candidates])
+        if candidates.num_rows > sample_size:
+            candidates, _, rank = _rank_within_strata(candidates)
+            candidates = candidates.filter(pa.array(rank < sample_size))
+        sample = candidates
+
+    if sample is None:
+        return
+
+    # Proportional allocation, rounded so the shares add up to the sample size
+    total_size = min(sample_size, rows_read)
+    days = sorted(counts)
+    exact = np.array([counts[day] for day in days]) * total_size / rows_read
+    allocation = np.floor(exact).astype(np.int64)
+    remainder = total_size - allocation.sum()
+    allocation[np.argsort(allocation - exact)[:remainder]] += 1
+
+    sample, strata, rank = _rank_within_strata(sample)
+    quota = allocation[np.searchsorted(days, strata)]
+    yield from _emit(sample.filter(pa.array(rank < quota)), batch_size)
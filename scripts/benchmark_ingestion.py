@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Ingestion throughput benchmark for the NYC taxi dlt pipeline.
+
+Writes synthetic TLC-shaped parquet files (see synthetic_tlc.py), points
+nyc_taxi_source at them through a local NYC_TAXI_BASE_URL and loads each
+one into a temp DuckDB file. Every case runs in a fresh process so its
+peak RSS is not inflated by earlier cases. Extract, normalize and load are
+timed separately and written to a JSON report.
+
+Usage:
+    python scripts/benchmark_ingestion.py [--rows N ...] [--formats F ...] [--output report.json]
+
+Example:
+    python scripts/benchmark_ingestion.py --rows 100000 1000000 --output benchmark.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+SCRIPTS_DIR = Path(__file__).parent
+PIPELINE_DIR = SCRIPTS_DIR.parent / "dlt_pipeline"
+sys.path.insert(0, str(SCRIPTS_DIR))
+sys.path.insert(0, str(PIPELINE_DIR))
+
+from synthetic_tlc import write_synthetic_tlc_file  # noqa: E402
+
+DEFAULT_ROWS = [100_000, 1_000_000, 10_000_000]
+YEAR, MONTH, TAXI_TYPE = 2023, 1, "yellow"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss) / 1024 ** 2
+    except ImportError:
+        return None
+
+
+def run_case(data_dir: str, rows: int, loader_file_format: str, batch_size: int) -> dict:
+    """Load one synthetic file through nyc_taxi_source and time each step."""
+    import dlt
+    import nyc_taxi_pipeline
+
+    nyc_taxi_pipeline.NYC_TAXI_BASE_URL = data_dir
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        pipeline = dlt.pipeline(
+            pipeline_name="nyc_taxi_benchmark",
+            destination=dlt.destinations.duckdb(str(Path(work_dir) / "benchmark.duckdb")),
+            dataset_name="nyc_taxi_raw",
+            pipelines_dir=str(Path(work_dir) / ".dlt_pipelines"),
+        )
+        source = nyc_taxi_pipeline.nyc_taxi_source(
+            year=YEAR,
+            month=MONTH,
+            taxi_type=TAXI_TYPE,
+            write_disposition="replace",
+            row_limit=None,
+            batch_size=batch_size,
+        )
+
+        timings = {}
+        start = time.perf_counter()
+        pipeline.extract(source, loader_file_format=loader_file_format)
+        timings["extract"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pipeline.normalize()
+        timings["normalize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pipeline.load()
+        timings["load"] = time.perf_counter() - start
+
+        with pipeline.sql_client() as client:
+            loaded_rows = client.execute_sql("SELECT count(*) FROM trips")[0][0]
+
+    total = sum(timings.values())
+    peak = peak_rss_mb()
+    return {
+        "rows": rows,
+        "loaded_rows": loaded_rows,
+        "loader_file_format": loader_file_format,
+        "batch_size": batch_size,
+        "seconds": {**{step: round(value, 3) for step, value in timings.items()}, "total": round(total, 3)},
+        "rows_per_second": {
+            **{step: round(rows / value) for step, value in timings.items() if value},
+            "total": round(rows / total) if total else None,
+        },
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+    }
+
+
+def main():
+    import dlt
+    import duckdb
+    import pyarrow
+    from nyc_taxi_pipeline import DEFAULT_BATCH_SIZE, DEFAULT_LOADER_FILE_FORMAT, LOADER_FILE_FORMATS
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="File sizes to benchmark")
+    parser.add_argument(
+        "--formats", nargs="+", default=[DEFAULT_LOADER_FILE_FORMAT], choices=LOADER_FILE_FORMATS,
+        help="dlt loader file formats to benchmark"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per extracted batch")
+    parser.add_argument("--data-dir", type=Path, help="Where to keep generated files (default: temp dir)")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": {"dlt": dlt.__version__, "duckdb": duckdb.__version__, "pyarrow": pyarrow.__version__},
+        "cases": [],
+    }
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_root = args.data_dir or Path(tmp_dir)
+        for rows in args.rows:
+            data_dir = data_root / f"rows_{rows}"
+            print(f"Generating {rows:,} synthetic trips in {data_dir}", file=sys.stderr)
+            write_synthetic_tlc_file(data_dir, rows, YEAR, MONTH, TAXI_TYPE)
+
+            for loader_file_format in args.formats:
+                print(f"Loading {rows:,} rows as {loader_file_format}...", file=sys.stderr)
+                with context.Pool(1, maxtasksperchild=1) as pool:
+                    case = pool.apply(run_case, (str(data_dir), rows, loader_file_format, args.batch_size))
+                report["cases"].append(case)
+                print(
+                    f"  extract {case['seconds']['extract']:.2f}s, normalize {case['seconds']['normalize']:.2f}s, "
+                    f"load {case['seconds']['load']:.2f}s, {case['rows_per_second']['total']:,} rows/s, "
+                    f"peak RSS {case['peak_rss_mb']} MB",
+                    file=sys.stderr
+                )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+        print(f"Wrote report to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
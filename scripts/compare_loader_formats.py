@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Compare dlt loader file formats for the DuckDB destination.
+
+Runs the same synthetic TLC-shaped trips table through extract -> normalize
+-> load once per loader file format and reports rows/s for each step.
+
+Usage:
+    python scripts/compare_loader_formats.py [rows]
+
+Example:
+    python scripts/compare_loader_formats.py 1000000
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import dlt
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "dlt_pipeline"))
+from nyc_taxi_pipeline import DEFAULT_BATCH_SIZE, LOADER_FILE_FORMATS, add_trip_columns  # noqa: E402
+from synthetic_tlc import synthetic_trips  # noqa: E402
+
+
+def run_format(table: pa.Table, loader_file_format: str, work_dir: Path) -> dict:
+    """Load table with one file format and time each pipeline step."""
+
+    @dlt.resource(name="trips", write_disposition="replace", primary_key="unique_id")
+    def trips():
+        start_row = 0
+        for batch in table.to_batches(max_chunksize=DEFAULT_BATCH_SIZE):
+            chunk = pa.Table.from_batches([batch])
+            yield add_trip_columns(chunk, "yellow", 2023, 1, start_row)
+            start_row += chunk.num_rows
+
+    pipeline = dlt.pipeline(
+        pipeline_name=f"compare_{loader_file_format}",
+        destination=dlt.destinations.duckdb(str(work_dir / f"{loader_file_format}.duckdb")),
+        dataset_name="nyc_taxi_raw",
+        pipelines_dir=str(work_dir / ".dlt_pipelines"),
+    )
+
+    timings = {}
+    start = time.perf_counter()
+    pipeline.extract(trips(), loader_file_format=loader_file_format)
+    timings["extract"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline.normalize()
+    timings["normalize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline.load()
+    timings["load"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+    return timings
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    # The published TLC layout, as the pipeline sees it from real downloads
+    table = synthetic_trips(rows, layout="tlc")
+
+    print(f"Loading {rows:,} synthetic trips into DuckDB per loader file format\n")
+    print(f"{'format':<15}{'extract':>12}{'normalize':>12}{'load':>12}{'total':>12}{'rows/s':>14}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for loader_file_format in LOADER_FILE_FORMATS:
+            timings = run_format(table, loader_file_format, Path(tmp_dir))
+            print(
+                f"{loader_file_format:<15}"
+                f"{timings['extract']:>11.2f}s{timings['normalize']:>11.2f}s"
+                f"{timings['load']:>11.2f}s{timings['total']:>11.2f}s"
+                f"{rows / timings['total']:>14,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
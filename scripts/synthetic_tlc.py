@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic TLC-shaped trip parquet files.
+
+Two column layouts:
+- "snake": the trip columns of demos/incremental_load_demo.py (unique_id
+  and the _taxi_type/_data_year/_data_month metadata columns are added by
+  nyc_taxi_source on ingestion)
+- "tlc": the column names and types of the published TLC files
+  (VendorID, PULocationID, ..., plus RatecodeID and store_and_fwd_flag)
+Files are written in chunks, so generating 10M rows does not need 10M
+rows in memory.
+
+Usage:
+    python synthetic_tlc.py <output_dir> [rows] [year] [month] [layout]
+
+Example:
+    python scripts/synthetic_tlc.py data/synthetic 1000000
+    # -> data/synthetic/yellow_tripdata_2023-01.parquet
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows generated and written per row group (TLC files use ~1M-row groups)
+ROW_GROUP_SIZE = 1_000_000
+
+LAYOUTS = ("snake", "tlc")
+
+
+def synthetic_trips(
+    rows: int, year: int = 2023, month: int = 1, seed: int = 42, layout: str = "snake"
+) -> pa.Table:
+    """Random yellow taxi trips within one month, in the given column layout."""
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout must be one of {LAYOUTS}")
+    rng = np.random.default_rng(seed)
+
+    month_start = np.datetime64(f"{year}-{month:02d}-01T00:00:00")
+    next_month = np.datetime64(f"{year + month // 12}-{month % 12 + 1:02d}-01T00:00:00")
+    month_seconds = int((next_month - month_start) / np.timedelta64(1, "s"))
+
+    pickup = month_start + np.sort(rng.integers(0, month_seconds, rows)).astype("timedelta64[s]")
+    dropoff = pickup + rng.integers(60, 3600, rows).astype("timedelta64[s]")
+
+    trip_distance = np.round(rng.gamma(1.5, 2.0, rows), 2)
+    fare_amount = np.round(3.0 + trip_distance * 2.5 + rng.normal(0, 1.5, rows), 2)
+    extra = rng.choice(np.array([0.0, 0.5, 1.0, 2.5]), rows)
+    mta_tax = np.full(rows, 0.5)
+    tip_amount = np.round(np.maximum(fare_amount, 0) * rng.uniform(0, 0.3, rows), 2)
+    tolls_amount = np.where(rng.random(rows) < 0.05, 6.55, 0.0)
+    improvement_surcharge = np.full(rows, 0.3)
+    congestion_surcharge = rng.choice(np.array([0.0, 2.5]), rows)
+    airport_fee = rng.choice(np.array([0.0, 1.25]), rows, p=[0.9, 0.1])
+    total_amount = np.round(
+        fare_amount + extra + mta_tax + tip_amount + tolls_amount
+        + improvement_surcharge + congestion_surcharge + airport_fee, 2
+    )
+
+    vendor_id = rng.integers(1, 3, rows)
+    passenger_count = rng.integers(1, 7, rows)
+    pu_location_id = rng.integers(1, 266, rows)
+    do_location_id = rng.integers(1, 266, rows)
+    payment_type = rng.integers(1, 5, rows)
+
+    if layout == "snake":
+        trip_columns = {
+            "vendor_id": vendor_id,
+            "tpep_pickup_datetime": pickup.astype("datetime64[us]"),
+            "tpep_dropoff_datetime": dropoff.astype("datetime64[us]"),
+            "passenger_count": passenger_count,
+            "trip_distance": trip_distance,
+            "pu_location_id": pu_location_id,
+            "do_location_id": do_location_id,
+            "payment_type": payment_type,
+        }
+    else:
+        trip_columns = {
+            "VendorID": vendor_id.astype("int32"),
+            "tpep_pickup_datetime": pickup.astype("datetime64[us]"),
+            "tpep_dropoff_datetime": dropoff.astype("datetime64[us]"),
+            "passenger_count": passenger_count.astype("float64"),
+            "trip_distance": trip_distance,
+            "RatecodeID": rng.integers(1, 7, rows).astype("float64"),
+            "store_and_fwd_flag": rng.choice(np.array(["N", "Y"]), rows, p=[0.99, 0.01]),
+            "PULocationID": pu_location_id.astype("int32"),
+            "DOLocationID": do_location_id.astype("int32"),
+            "payment_type": payment_type,
+        }
+
+    return pa.table({
+        **trip_columns,
+        "fare_amount": fare_amount,
+        "extra": extra,
+        "mta_tax": mta_tax,
+        "tip_amount": tip_amount,
+        "tolls_amount": tolls_amount,
+        "improvement_surcharge": improvement_surcharge,
+        "total_amount": total_amount,
+        "congestion_surcharge": congestion_surcharge,
+        "airport_fee": airport_fee,
+    })
+
+
+def write_synthetic_tlc_file(
+    output_dir: Path,
+    rows: int,
+    year: int = 2023,
+    month: int = 1,
+    taxi_type: str = "yellow",
+    row_group_size: int = ROW_GROUP_SIZE,
+    layout: str = "snake"
+) -> Path:
+    """
+    Write rows synthetic trips to a TLC-named parquet file.
+
+    Returns the existing file untouched if it already has the requested
+    number of rows.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{taxi_type}_tripdata_{year}-{month:02d}.parquet"
+
+    if path.exists() and pq.ParquetFile(path).metadata.num_rows == rows:
+        return path
+
+    tmp_path = path.with_suffix(".tmp")
+    writer = None
+    try:
+        for chunk_index, start in enumerate(range(0, rows, row_group_size)):
+            chunk = synthetic_trips(
+                min(row_group_size, rows - start), year, month, seed=chunk_index, layout=layout
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, chunk.schema, compression="zstd")
+            writer.write_table(chunk, row_group_size=row_group_size)
+        if writer is None:
+            # rows == 0: an empty file that still has the schema
+            pq.write_table(synthetic_trips(0, year, month, layout=layout), tmp_path, compression="zstd")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    tmp_path.replace(path)
+    return path
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    output_dir = Path(sys.argv[1])
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    year = int(sys.argv[3]) if len(sys.argv) > 3 else 2023
+    month = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    layout = sys.argv[5] if len(sys.argv) > 5 else "snake"
+
+    path = write_synthetic_tlc_file(output_dir, rows, year, month, layout=layout)
+    print(f"Wrote {rows:,} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
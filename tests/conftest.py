@@ -0,0 +1,16 @@
+"""
+Shared setup for the backend tests.
+
+The backend services are module-level singletons opened at import, so
+DUCKDB_PATH has to point at a scratch database before any test imports
+app.*; the real data/nyc_taxi.duckdb is never touched.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "webapp" / "backend"))
+
+os.environ["DUCKDB_PATH"] = str(Path(tempfile.mkdtemp(prefix="fagligfredag_tests_")) / "test.duckdb")
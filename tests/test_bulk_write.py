@@ -0,0 +1,141 @@
+"""
+Tests for DuckDBService.bulk_write and the /api/data/bulk route: per-row
+results, atomic rollback and partial success.
+"""
+
+import pytest
+from app.main import app
+from app.models.data import BulkUpdate
+from app.services.connection_manager import connection_manager
+from app.services.duckdb_service import db_service
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def accounts():
+    with connection_manager.writer() as conn:
+        conn.execute("""
+            CREATE OR REPLACE TABLE main.accounts AS
+            SELECT range::INTEGER AS id, 'acct ' || range AS name, (range * 10)::DOUBLE AS balance FROM range(1, 6)
+        """)
+    yield "accounts"
+    with connection_manager.writer() as conn:
+        conn.execute("DROP TABLE IF EXISTS main.accounts")
+
+
+def table_rows() -> dict[int, tuple]:
+    with connection_manager.cursor() as conn:
+        return {row[0]: row[1:] for row in conn.execute("SELECT id, name, balance FROM main.accounts").fetchall()}
+
+
+def outcomes(result) -> list[tuple]:
+    return [(r.operation, r.index, r.success) for r in result.results]
+
+
+def test_everything_applies(accounts):
+    result = db_service.bulk_write(
+        "main", "accounts", "id",
+        inserts=[{"id": 6, "name": "new", "balance": "1.5"}, {"id": 7, "name": "newer"}],
+        updates=[BulkUpdate(pk_value=1, updates={"balance": 0}), BulkUpdate(pk_value=1, updates={"name": "one"}),
+                 BulkUpdate(pk_value=6, updates={"balance": 2})],
+        deletes=[2, "3"],
+    )
+    assert result.success and result.committed
+    assert (result.inserted, result.updated, result.deleted) == (2, 3, 2)
+    assert all(r.success for r in result.results)
+    rows = table_rows()
+    assert rows[1] == ("one", 0)
+    # Updates see the inserts of the same batch
+    assert rows[6] == ("new", 2)
+    assert rows[7] == ("newer", None)
+    assert 2 not in rows and 3 not in rows
+
+
+def test_atomic_failure_rolls_back_everything(accounts):
+    before = table_rows()
+    # The update and delete apply on their own; the duplicate insert sinks the batch
+    result = db_service.bulk_write(
+        "main", "accounts", "id",
+        inserts=[{"id": 6, "name": "new"}, {"id": 1, "name": "duplicate"}],
+        updates=[BulkUpdate(pk_value=2, updates={"balance": 0})],
+        deletes=[3],
+    )
+    assert not result.success and not result.committed
+    assert (result.inserted, result.updated, result.deleted) == (0, 0, 0)
+    assert outcomes(result) == [("insert", 0, True), ("insert", 1, False), ("update", 0, True), ("delete", 0, True)]
+    assert result.results[1].error == "A row with this key already exists"
+    assert table_rows() == before
+
+    # Keys are checked after the inserts ran; a missing one rolls those back too
+    result = db_service.bulk_write(
+        "main", "accounts", "id",
+        inserts=[{"id": 6, "name": "new"}],
+        updates=[BulkUpdate(pk_value=6, updates={"balance": 1}), BulkUpdate(pk_value=99, updates={"balance": 0})],
+    )
+    assert not result.committed
+    assert outcomes(result) == [("insert", 0, True), ("update", 0, True), ("update", 1, False)]
+    assert result.results[2].error == "No row with this key"
+    assert table_rows() == before
+
+
+def test_non_atomic_applies_the_rows_that_succeed(accounts):
+    result = db_service.bulk_write(
+        "main", "accounts", "id",
+        inserts=[
+            {"id": 6, "name": "ok"},
+            {"id": 7, "balance": "not a number"},
+            {"id": 8, "colour": "red"},
+            {"id": 6, "name": "same key again"},
+        ],
+        updates=[BulkUpdate(pk_value=1, updates={"name": "renamed"}), BulkUpdate(pk_value="x", updates={"name": "?"})],
+        deletes=[2, 42],
+        atomic=False,
+    )
+    assert result.committed and not result.success
+    assert (result.inserted, result.updated, result.deleted) == (1, 1, 1)
+    assert outcomes(result) == [
+        ("insert", 0, True), ("insert", 1, False), ("insert", 2, False), ("insert", 3, False),
+        ("update", 0, True), ("update", 1, False),
+        ("delete", 0, True), ("delete", 1, False),
+    ]
+    errors = [r.error for r in result.results if not r.success]
+    assert errors == [
+        "Value for balance is not a valid DOUBLE",
+        "Unknown columns: colour",
+        "Duplicate key in batch",
+        "Key is not a valid INTEGER",
+        "No row with this key",
+    ]
+
+    rows = table_rows()
+    assert rows[6] == ("ok", None)
+    assert rows[1][0] == "renamed"
+    assert 2 not in rows
+    assert 7 not in rows and 8 not in rows
+
+
+def test_bulk_route(accounts):
+    client = TestClient(app)
+    request = {
+        "schema_name": "main",
+        "table_name": "accounts",
+        "pk_column": "id",
+        "updates": [{"pk_value": 4, "updates": {"balance": 1}}, {"pk_value": 5, "updates": {"balance": "x"}}],
+    }
+
+    response = client.post("/api/data/bulk", json=request)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["success"], body["committed"], body["updated"]) == (False, False, 0)
+    assert [r["success"] for r in body["results"]] == [True, False]
+    assert table_rows()[4][1] == 40
+
+    response = client.post("/api/data/bulk", json={**request, "atomic": False})
+    body = response.json()
+    assert (body["success"], body["committed"], body["updated"]) == (False, True, 1)
+    assert table_rows()[4][1] == 1 and table_rows()[5][1] == 50
+
+    response = client.post("/api/data/bulk", json={**request, "pk_column": "nope"})
+    assert response.status_code == 400
+    response = client.post("/api/data/bulk", json={**request, "table_name": "missing"})
+    assert response.status_code == 400
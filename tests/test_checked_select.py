@@ -0,0 +1,113 @@
+"""
+Tests for the checks on user SQL (DuckDBService._checked_select), as used
+by execute_query and export_query.
+"""
+
+import glob
+import os
+import tempfile
+
+import pytest
+from app.main import app
+from app.services.connection_manager import connection_manager
+from app.services.duckdb_service import db_service
+from fastapi.testclient import TestClient
+
+REJECTED = [
+    # File and URL readers, by function and by path
+    ("SELECT * FROM read_csv('/etc/passwd')", "Table function read_csv is not allowed"),
+    ("SELECT * FROM read_csv_auto('/etc/passwd')", "Table function read_csv_auto is not allowed"),
+    ("SELECT * FROM read_parquet('data/source/trips.parquet')", "Table function read_parquet is not allowed"),
+    ("SELECT * FROM read_json('x.json')", "Table function read_json is not allowed"),
+    ("SELECT * FROM read_text('/etc/hostname')", "Table function read_text is not allowed"),
+    ("SELECT * FROM glob('/*')", "Table function glob is not allowed"),
+    ("SELECT * FROM '/etc/passwd'", "Unknown table"),
+    ("SELECT * FROM 'data/source/trips.parquet'", "Unknown table"),
+    ("SELECT * FROM main.books b JOIN read_csv('/etc/passwd') p ON true", "Table function read_csv is not allowed"),
+    ("SELECT * FROM main.books WHERE id IN (SELECT 1 FROM read_text('/etc/hostname'))", "read_text is not allowed"),
+    ("WITH f AS (SELECT * FROM read_csv('/etc/passwd')) SELECT * FROM f", "read_csv is not allowed"),
+    # SQL text run by a table function
+    ("SELECT * FROM query('DROP TABLE main.books')", "Table function query is not allowed"),
+    ("SELECT * FROM query_table('main.books')", "Table function query_table is not allowed"),
+    # Anything that isn't exactly one SELECT
+    ("SELECT 1; DROP TABLE main.books", "Only a single SELECT"),
+    ("COMMIT; DELETE FROM main.books", "Only a single SELECT"),
+    ("DROP TABLE main.books", "Only a single SELECT"),
+    ("DELETE FROM main.books", "Only a single SELECT"),
+    ("CREATE TABLE main.copy AS SELECT * FROM main.books", "Only a single SELECT"),
+    ("COPY main.books TO '/tmp/books.csv'", "Only a single SELECT"),
+    ("ATTACH '/tmp/other.duckdb' AS other", "Only a single SELECT"),
+    ("INSTALL httpfs", "Only a single SELECT"),
+    ("PRAGMA version", "Table function pragma_version is not allowed"),
+    # Tables outside the database
+    ("SELECT * FROM other.main.books", "Unknown table"),
+    ("SELECT * FROM main.missing", "Unknown table"),
+]
+
+ACCEPTED = [
+    ("SELECT COUNT(*) AS n FROM main.books", [{"n": 3}]),
+    ("select title from books where id = 2", [{"title": "b"}]),
+    ("SELECT * FROM range(2)", [{"range": 0}, {"range": 1}]),
+    ("SELECT * FROM generate_series(1, 2) t(x)", [{"x": 1}, {"x": 2}]),
+    ("SELECT UNNEST([1, 2]) AS x", [{"x": 1}, {"x": 2}]),
+    ("WITH top AS (SELECT * FROM main.books WHERE id < 3) SELECT COUNT(*) AS n FROM top", [{"n": 2}]),
+    ("SELECT b.id FROM main.books b JOIN main.books c USING (id) WHERE b.id = 1", [{"id": 1}]),
+    ("SELECT id FROM main.books WHERE id IN (SELECT MAX(id) FROM main.books)", [{"id": 3}]),
+    ("SELECT 'read_csv(''/etc/passwd'')' AS s", [{"s": "read_csv('/etc/passwd')"}]),
+    ("SELECT 1 AS x;", [{"x": 1}]),
+    ("SELECT ';' AS s ; -- trailing", [{"s": ";"}]),
+    ("SELECT 1 AS x -- trailing", [{"x": 1}]),
+]
+
+
+@pytest.fixture
+def books():
+    with connection_manager.writer() as conn:
+        conn.execute(
+            "CREATE OR REPLACE TABLE main.books AS SELECT range + 1 AS id, chr((97 + range)::INTEGER) AS title FROM range(3)"
+        )
+    yield "books"
+    with connection_manager.writer() as conn:
+        conn.execute("DROP TABLE IF EXISTS main.books")
+
+
+def books_left() -> int:
+    with connection_manager.cursor() as conn:
+        return conn.execute("SELECT COUNT(*) FROM main.books").fetchone()[0]
+
+
+def export_files() -> set[str]:
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "export_*")))
+
+
+@pytest.mark.parametrize("query, error", REJECTED)
+def test_rejected(books, query, error):
+    with pytest.raises(ValueError, match=error.replace("(", r"\(")):
+        db_service.execute_query(query)
+
+    before = export_files()
+    with pytest.raises(ValueError):
+        db_service.export_query(query, "csv")
+    # The temporary file is deleted when the check fails
+    assert export_files() == before
+    assert books_left() == 3
+
+
+@pytest.mark.parametrize("query, rows", ACCEPTED)
+def test_accepted(books, query, rows):
+    assert db_service.execute_query(query) == rows
+
+    path = db_service.export_query(query, "csv", "none")
+    try:
+        with open(path) as f:
+            assert len(f.read().splitlines()) == len(rows) + 1
+    finally:
+        os.remove(path)
+
+
+def test_export_route_rejects_with_400(books):
+    client = TestClient(app)
+    response = client.post("/api/data/export", json={"query": "SELECT * FROM read_csv('/etc/passwd')", "format": "csv"})
+    assert response.status_code == 400
+    response = client.post("/api/data/export", json={"query": "SELECT * FROM main.books", "format": "csv"})
+    assert response.status_code == 200
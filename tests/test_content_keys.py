@@ -0,0 +1,142 @@
+"""
+Tests for content-hash trip keys and incremental loads in
+dlt_pipeline/nyc_taxi_pipeline.py, on synthetic TLC files
+(scripts/synthetic_tlc.py) served from a local directory.
+"""
+
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import dlt
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "dlt_pipeline"))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import nyc_taxi_pipeline  # noqa: E402
+from nyc_taxi_pipeline import content_hash_ids, iter_trips, nyc_taxi_source  # noqa: E402
+from synthetic_tlc import synthetic_trips, write_synthetic_tlc_file  # noqa: E402
+
+YEAR, MONTH = 2023, 1
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    """A directory standing in for the TLC CDN (plain paths are read in place)."""
+    directory = tmp_path / "mirror"
+    directory.mkdir()
+    monkeypatch.setattr(nyc_taxi_pipeline, "NYC_TAXI_BASE_URL", str(directory))
+    return directory
+
+
+def keys(table: pa.Table) -> list[str]:
+    return content_hash_ids(table, "yellow").to_pylist()
+
+
+def test_keys_are_deterministic_and_distinct():
+    trips = synthetic_trips(20_000, YEAR, MONTH, layout="tlc")
+    first = keys(trips)
+    assert first == keys(synthetic_trips(20_000, YEAR, MONTH, layout="tlc"))
+    assert len(set(first)) == len(first)
+    assert all(key.startswith("yellow_") for key in first)
+
+
+def test_keys_dont_depend_on_slicing_or_other_columns():
+    trips = synthetic_trips(5_000, YEAR, MONTH, layout="tlc")
+    whole = keys(trips)
+
+    sliced = [key for start in range(0, 5_000, 777) for key in keys(trips.slice(start, 777))]
+    assert sliced == whole
+    # Only TRIP_KEY_COLUMNS count
+    assert keys(trips.drop_columns(["tip_amount", "store_and_fwd_flag", "payment_type"])) == whole
+    assert keys(trips.select(list(reversed(trips.column_names)))) == whole
+    # Numbers hash by value, whatever their Arrow type
+    widened = trips.set_column(0, "VendorID", pc.cast(trips["VendorID"], pa.float64()))
+    assert keys(widened) == whole
+    # Chunked and dictionary-encoded columns give the same keys
+    assert keys(pa.concat_tables([trips.slice(0, 100), trips.slice(100)])) == whole
+    assert keys(trips.set_column(0, "VendorID", pc.dictionary_encode(trips["VendorID"]))) == whole
+
+
+def test_keys_change_with_key_columns():
+    trips = synthetic_trips(100, YEAR, MONTH, layout="tlc")
+    whole = keys(trips)
+
+    changed = trips.set_column(
+        trips.schema.get_field_index("fare_amount"), "fare_amount", pc.add(trips["fare_amount"], 0.01)
+    )
+    assert all(a != b for a, b in zip(keys(changed), whole))
+
+    # Swapping the values of two key columns is a different trip
+    swapped = trips.set_column(trips.schema.get_field_index("PULocationID"), "PULocationID", trips["DOLocationID"])
+    swapped = swapped.set_column(swapped.schema.get_field_index("DOLocationID"), "DOLocationID", trips["PULocationID"])
+    differs = pc.not_equal(trips["PULocationID"], trips["DOLocationID"]).to_pylist()
+    assert [a != b for a, b in zip(keys(swapped), whole)] == differs
+
+    nulled = trips.set_column(0, "VendorID", pa.nulls(100, pa.int32()))
+    assert all(a != b for a, b in zip(keys(nulled), whole))
+
+
+def test_iter_trips_keys_dont_depend_on_batches_or_projection(mirror):
+    write_synthetic_tlc_file(mirror, 3_000, YEAR, MONTH, layout="tlc")
+
+    def loaded(**kwargs) -> pa.Table:
+        return pa.concat_tables(iter_trips("yellow", YEAR, MONTH, row_limit=None, content_keys=True, **kwargs))
+
+    whole = loaded(batch_size=50_000)
+    assert whole["unique_id"].to_pylist() == keys(pq.read_table(mirror / "yellow_tripdata_2023-01.parquet"))
+    assert loaded(batch_size=128)["unique_id"] == whole["unique_id"]
+
+    # Key columns are read for the hash even when they aren't loaded
+    projected = loaded(columns=["tpep_pickup_datetime", "fare_amount"])
+    assert projected.column_names == [
+        "tpep_pickup_datetime", "fare_amount", "unique_id", "_taxi_type", "_data_year", "_data_month"
+    ]
+    assert projected["unique_id"] == whole["unique_id"]
+
+
+def test_incremental_rerun_does_not_duplicate(mirror, tmp_path):
+    # Pickups are sorted, so the last 300 trips are the month's latest
+    month = synthetic_trips(2_300, YEAR, MONTH, layout="tlc")
+    trips, later = month.slice(0, 2_000), month.slice(2_000)
+    path = mirror / "yellow_tripdata_2023-01.parquet"
+    pq.write_table(trips, path)
+    pipeline = dlt.pipeline(
+        pipeline_name=f"test_{uuid.uuid4().hex[:8]}",
+        destination=dlt.destinations.duckdb(str(tmp_path / "trips.duckdb")),
+        dataset_name="raw",
+        pipelines_dir=str(tmp_path / "pipelines"),
+    )
+
+    def load() -> None:
+        pipeline.run(nyc_taxi_source(YEAR, MONTH, write_disposition="merge", row_limit=None, incremental=True))
+
+    def loaded_keys() -> list[str]:
+        with duckdb.connect(str(tmp_path / "trips.duckdb"), read_only=True) as conn:
+            return [row[0] for row in conn.execute("SELECT unique_id FROM raw.trips").fetchall()]
+
+    load()
+    assert sorted(loaded_keys()) == sorted(keys(trips))
+
+    # Same file again: the rows at the cursor are re-read but merge on their keys
+    load()
+    assert sorted(loaded_keys()) == sorted(keys(trips))
+
+    # The file grows with later trips, and one far outside the month that must not load
+    outlier = later.slice(0, 1).set_column(
+        1, "tpep_pickup_datetime", pa.array([datetime(2098, 1, 1)], later.schema.field("tpep_pickup_datetime").type)
+    )
+    pq.write_table(pa.concat_tables([trips, later, outlier]), path)
+    load()
+    assert sorted(loaded_keys()) == sorted(keys(trips) + keys(later))
+
+    # Nothing new: still no duplicates
+    load()
+    assert len(loaded_keys()) == 2_300
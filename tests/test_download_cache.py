@@ -0,0 +1,170 @@
+"""
+Tests for dlt_pipeline/download_cache.py against a local HTTP server
+standing in for the TLC CDN (HEAD/GET with ETag and Range support).
+"""
+
+import hashlib
+import multiprocessing
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "dlt_pipeline"))
+
+from download_cache import ChecksumError, DownloadCache  # noqa: E402
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves files from a dict, counting GETs per path."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.files: dict[str, bytes] = {}
+        self.etags: dict[str, str] = {}
+        self.gets: dict[str, int] = {}
+        self.ranges: list[str] = []
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}"
+
+    def add(self, name: str, body: bytes, etag=None) -> str:
+        self.files[f"/{name}"] = body
+        self.etags[f"/{name}"] = etag or f'"{hashlib.md5(body).hexdigest()}"'
+        return self.url(name)
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("ETag", self.server.etags[self.path])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.path not in self.server.files:
+            return self.send_error(404)
+        self._headers(200, self.server.files[self.path])
+
+    def do_GET(self):
+        if self.path not in self.server.files:
+            return self.send_error(404)
+        self.server.gets[self.path] = self.server.gets.get(self.path, 0) + 1
+        body = self.server.files[self.path]
+        range_header = self.headers.get("Range")
+        if range_header:
+            self.server.ranges.append(range_header)
+            body = body[int(range_header.split("=")[1].rstrip("-")):]
+            self._headers(206, body)
+        else:
+            self._headers(200, body)
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = StandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _fetch_in_process(cache_dir, url, max_bytes, results):
+    with DownloadCache(cache_dir, max_bytes=max_bytes).fetch(url) as path:
+        results.put(hashlib.sha256(path.read_bytes()).hexdigest())
+
+
+def _hold_in_process(cache_dir, url, pinned, done):
+    with DownloadCache(cache_dir).fetch(url):
+        pinned.set()
+        done.wait(30)
+
+
+def test_second_fetch_is_served_from_disk(server, tmp_path):
+    url = server.add("trips.parquet", b"x" * 1000)
+    cache = DownloadCache(tmp_path)
+
+    with cache.fetch(url) as path:
+        assert path.read_bytes() == b"x" * 1000
+    with cache.fetch(url) as path:
+        assert path.read_bytes() == b"x" * 1000
+
+    assert server.gets["/trips.parquet"] == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_partial_download_is_resumed(server, tmp_path):
+    body = bytes(range(256)) * 10
+    url = server.add("trips.parquet", body)
+    cache = DownloadCache(tmp_path)
+    key = cache.cache_key(url, server.etags["/trips.parquet"], len(body))
+    cache._partial_path(key, url).write_bytes(body[:1000])
+
+    with cache.fetch(url) as path:
+        assert path.read_bytes() == body
+
+    assert server.ranges == ["bytes=1000-"]
+
+
+def test_md5_mismatch_is_rejected(server, tmp_path):
+    url = server.add("trips.parquet", b"x" * 100, etag=f'"{"0" * 32}"')
+
+    with pytest.raises(ChecksumError):
+        with DownloadCache(tmp_path).fetch(url):
+            pass
+
+
+def test_processes_fetching_one_url_download_it_once(server, tmp_path):
+    body = b"y" * (4 * 1024 * 1024)
+    url = server.add("trips.parquet", body)
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_fetch_in_process, args=(tmp_path, url, 10 ** 9, results))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert {results.get() for _ in workers} == {hashlib.sha256(body).hexdigest()}
+    assert server.gets["/trips.parquet"] == 1
+    assert not list(tmp_path.glob("*.tmp")) and not list(tmp_path.glob("*.part"))
+
+
+def test_file_read_by_another_process_is_not_evicted(server, tmp_path):
+    pinned_url = server.add("a.parquet", b"a" * 1000)
+    other_url = server.add("b.parquet", b"b" * 1000)
+    pinned, done = multiprocessing.Event(), multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold_in_process, args=(tmp_path, pinned_url, pinned, done))
+    holder.start()
+    try:
+        assert pinned.wait(30)
+        cache = DownloadCache(tmp_path, max_bytes=1500)
+        with cache.fetch(other_url):
+            pass
+        cache.clear()
+
+        # Over the cap, but the pinned file survives eviction and clear()
+        index = cache._load_index()
+        key = cache.cache_key(pinned_url, server.etags["/a.parquet"], 1000)
+        assert list(index) == [key]
+        assert cache._object_path(key, pinned_url).read_bytes() == b"a" * 1000
+    finally:
+        done.set()
+        holder.join(30)
+
+    # Once the reader is done it can be evicted
+    with cache.fetch(other_url):
+        pass
+    assert cache.stats()["entries"] == 1
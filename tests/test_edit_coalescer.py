@@ -0,0 +1,153 @@
+"""
+Tests for batched source edits: SourceService.apply_edits, the
+EditCoalescer in front of it and the /api/source edit routes.
+"""
+
+import asyncio
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from app.main import app
+from app.models.source import RowEdit
+from app.services.edit_coalescer import EditCoalescer
+from app.services.source_delta import DeltaLog
+from app.services.source_service import SourceService, source_service
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    pq.write_table(pa.table({
+        "unique_id": pa.array(range(1, 6), pa.int64()),
+        "amount": [float(i) for i in range(1, 6)],
+    }), tmp_path / "trips.parquet")
+    (tmp_path / "trips_metadata.json").write_text(json.dumps({"primary_key": "unique_id", "version": 0}))
+    # The routes use the singleton
+    monkeypatch.setattr(source_service, "source_dir", tmp_path)
+    return source_service
+
+
+@pytest.fixture
+def appends(monkeypatch):
+    calls = []
+    append = DeltaLog.append
+
+    def counting_append(self, entries):
+        calls.append(len(entries))
+        append(self, entries)
+
+    monkeypatch.setattr(DeltaLog, "append", counting_append)
+    return calls
+
+
+def amounts(service: SourceService) -> dict[int, float]:
+    return {row["unique_id"]: row["amount"] for row in service.get_table("trips")["data"]}
+
+
+def test_batch_is_all_or_nothing(service, appends):
+    outcome, = service.apply_edits("trips", [([
+        RowEdit(op="update", pk_value=1, data={"amount": 10.0}),
+        RowEdit(op="delete", pk_value=2),
+        RowEdit(op="update", pk_value=99, data={"amount": 1.0}),
+    ], None)])
+
+    assert not outcome.success
+    assert outcome.version == 0
+    assert [result.success for result in outcome.results] == [False, False, False]
+    assert outcome.results[0].error == "Not applied: another edit in the batch failed"
+    assert "not found" in outcome.results[2].error
+    assert amounts(service) == {1: 1.0, 2: 2.0, 3: 3.0, 4: 4.0, 5: 5.0}
+    assert appends == []
+
+
+def test_batches_see_earlier_batches_and_get_their_own_version(service, appends):
+    outcomes = service.apply_edits("trips", [
+        ([RowEdit(op="insert", data={"amount": 6.0})], None),
+        # Fails on its own: a bad value for the column type
+        ([RowEdit(op="update", pk_value=1, data={"amount": "lots"})], None),
+        ([RowEdit(op="update", pk_value=6, data={"amount": 7.0})], None),
+    ])
+
+    assert [outcome.success for outcome in outcomes] == [True, False, True]
+    assert [outcome.version for outcome in outcomes] == [1, 1, 2]
+    assert outcomes[0].results[0].pk_value == 6
+    assert outcomes[2].results[0].row == {"unique_id": 6, "amount": 7.0}
+    assert amounts(service)[6] == 7.0
+    # One append for everything that applied
+    assert appends == [2]
+
+
+def test_expected_version_conflicts(service):
+    service.apply_edits("trips", [([RowEdit(op="update", pk_value=1, data={"amount": 1.5})], None)])
+    client = TestClient(app)
+
+    # Row 1 changed in version 1, after the editor's version 0: 409, nothing applied
+    response = client.post("/api/source/tables/trips/edits", json={
+        "expected_version": 0,
+        "edits": [
+            {"op": "update", "pk_value": 2, "data": {"amount": 20.0}},
+            {"op": "update", "pk_value": 1, "data": {"amount": 10.0}},
+        ],
+    })
+    assert response.status_code == 409
+    detail = response.json()["detail"]
+    assert not detail["success"]
+    assert [result["conflict"] for result in detail["results"]] == [False, True]
+    assert amounts(service)[1] == 1.5 and amounts(service)[2] == 2.0
+
+    # Based on the current version, the same edits apply
+    response = client.post("/api/source/tables/trips/edits", json={
+        "expected_version": 1,
+        "edits": [{"op": "update", "pk_value": 1, "data": {"amount": 10.0}}],
+    })
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert amounts(service)[1] == 10.0
+
+    # A failure that is not a conflict is still a 200 with per-row errors
+    response = client.post("/api/source/tables/trips/edits", json={
+        "edits": [{"op": "delete", "pk_value": 99}],
+    })
+    assert response.status_code == 200
+    assert not response.json()["success"]
+
+
+def test_coalesced_callers_get_their_own_results(service, appends):
+    coalescer = EditCoalescer(service, window_ms=50)
+
+    async def edit_concurrently():
+        return await asyncio.gather(
+            coalescer.submit("trips", [RowEdit(op="update", pk_value=1, data={"amount": 11.0})]),
+            coalescer.submit("trips", [RowEdit(op="delete", pk_value=99)]),
+            coalescer.submit("trips", [RowEdit(op="insert", data={"amount": 6.0})]),
+            coalescer.submit("trips", [RowEdit(op="update", pk_value=3, data={"amount": 1.0})], expected_version=0),
+        )
+
+    first, missing, inserted, third = asyncio.run(edit_concurrently())
+
+    assert first.success and first.results[0].row == {"unique_id": 1, "amount": 11.0}
+    assert not missing.success and "not found" in missing.results[0].error
+    assert inserted.success and inserted.results[0].pk_value == 6
+    assert third.success and third.results[0].row == {"unique_id": 3, "amount": 1.0}
+    assert [first.version, inserted.version, third.version] == [1, 2, 3]
+    # All four went through one apply_edits call
+    assert appends == [3]
+    assert not coalescer._flushes
+
+
+def test_coalescer_passes_errors_to_every_caller(tmp_path):
+    missing = SourceService()
+    missing.source_dir = tmp_path
+    coalescer = EditCoalescer(missing, window_ms=10)
+
+    async def edit_concurrently():
+        return await asyncio.gather(
+            coalescer.submit("nope", [RowEdit(op="delete", pk_value=1)]),
+            coalescer.submit("nope", [RowEdit(op="delete", pk_value=2)]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(edit_concurrently())
+    assert [type(result) for result in results] == [FileNotFoundError, FileNotFoundError]
@@ -0,0 +1,101 @@
+"""
+Tests for the query result cache (app/services/query_cache.py): version
+invalidation through real writes, and the memory budget.
+"""
+
+import pyarrow as pa
+import pytest
+from app.services.connection_manager import connection_manager
+from app.services.duckdb_service import DuckDBService, db_service
+from app.services.query_cache import CachedResult, QueryCache, normalize_sql
+
+
+@pytest.fixture
+def counters():
+    with connection_manager.writer() as conn:
+        conn.execute("CREATE OR REPLACE TABLE main.counters AS SELECT 1 AS id, 10 AS hits")
+    yield "counters"
+    with connection_manager.writer() as conn:
+        conn.execute("DROP TABLE IF EXISTS main.counters")
+
+
+def result(rows: int) -> CachedResult:
+    return CachedResult(pa.table({"x": pa.array(range(rows), pa.int64())}), ["BIGINT"])
+
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT  *\n FROM t ;") == "SELECT * FROM t"
+    assert normalize_sql("SELECT 'a  b', \"c  d\"  FROM t") == "SELECT 'a  b', \"c  d\" FROM t"
+
+
+def test_write_invalidates_cached_results(counters):
+    cache = QueryCache(connections=connection_manager)
+    service = DuckDBService(connection_manager, cache)
+    query = "SELECT hits FROM main.counters"
+
+    assert service.execute_query(query) == [{"hits": 10}]
+    assert service.execute_query("SELECT  hits\nFROM main.counters;") == [{"hits": 10}]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+    version = connection_manager.version
+    with connection_manager.writer() as conn:
+        conn.execute("UPDATE main.counters SET hits = 11")
+    assert connection_manager.version > version
+
+    # The next lookup sees the new version, drops the old entries and re-reads
+    assert service.execute_query(query) == [{"hits": 11}]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["version"] == connection_manager.version
+
+
+def test_result_of_an_outdated_version_is_not_stored():
+    cache = QueryCache(connections=connection_manager)
+    version = connection_manager.version
+    connection_manager.bump_version()
+    cache.put("SELECT 1", None, version, result(1))
+    assert cache.get("SELECT 1") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_params_are_part_of_the_key():
+    cache = QueryCache(connections=connection_manager)
+    version = connection_manager.version
+    cache.put("SELECT ?", [1], version, result(1))
+    assert cache.get("SELECT ?", [1]) is not None
+    assert cache.get("SELECT ?", [2]) is None
+
+
+def test_eviction_respects_the_memory_budget():
+    size = result(1000).nbytes
+    cache = QueryCache(max_bytes=int(size * 3.5), connections=connection_manager)
+    version = connection_manager.version
+
+    for n in range(4):
+        cache.put(f"SELECT {n}", None, version, result(1000))
+        assert cache.stats()["bytes"] <= cache.max_bytes
+    # Four entries don't fit: the least recently used one went
+    assert cache.stats()["entries"] == 3
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("SELECT 0") is None
+
+    # A lookup makes an entry recently used, so the next one is evicted instead
+    assert cache.get("SELECT 1") is not None
+    cache.put("SELECT 4", None, version, result(1000))
+    assert cache.get("SELECT 1") is not None
+    assert cache.get("SELECT 2") is None
+    assert cache.stats()["bytes"] == 3 * size
+
+    # A result bigger than the whole budget is returned but never cached
+    big = result(10_000)
+    assert cache.put("SELECT big", None, version, big) is big
+    assert cache.get("SELECT big") is None
+    assert cache.stats()["entries"] == 3
+
+
+def test_shared_cache_is_used_by_query_table(counters):
+    db_service.cache.clear()
+    db_service.query_table("main", "counters")
+    hits = db_service.cache.stats()["hits"]
+    db_service.query_table("main", "counters")
+    assert db_service.cache.stats()["hits"] == hits + 1
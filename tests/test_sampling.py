@@ -0,0 +1,104 @@
+"""
+Tests for the streaming samplers in dlt_pipeline/sampling.py.
+"""
+
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "dlt_pipeline"))
+
+from sampling import stratified_sample, uniform_sample  # noqa: E402
+
+# Rows per pickup day; None is rows without a pickup
+DAY_ROWS = {1: 5_000, 2: 3_000, 3: 1_500, None: 500}
+TOTAL_ROWS = sum(DAY_ROWS.values())
+
+
+def trips() -> pa.Table:
+    """Rows numbered in file order, days interleaved so every batch mixes them."""
+    days = [day for day, rows in DAY_ROWS.items() for _ in range(rows)]
+    days = [days[i] for i in sorted(range(len(days)), key=lambda i: (i * 7919) % len(days))]
+    pickups = [None if day is None else datetime(2023, 1, day) + timedelta(minutes=i % 1440) for i, day in enumerate(days)]
+    return pa.table({"row": pa.array(range(len(days)), pa.int64()), "pickup": pa.array(pickups, pa.timestamp("us"))})
+
+
+def batches(table: pa.Table, size: int) -> list[pa.Table]:
+    return [table.slice(offset, size) for offset in range(0, table.num_rows, size)]
+
+
+def run(sampler, table: pa.Table, sample_size: int, seed, input_batch: int = 1_000, batch_size: int = 256):
+    if sampler is uniform_sample:
+        chunks = list(uniform_sample(batches(table, input_batch), sample_size, batch_size, seed))
+    else:
+        chunks = list(stratified_sample(batches(table, input_batch), sample_size, "pickup", batch_size, seed))
+    assert all(chunk.num_rows <= batch_size for chunk in chunks)
+    return pa.concat_tables(chunks) if chunks else table.schema.empty_table()
+
+
+@pytest.mark.parametrize("sampler", [uniform_sample, stratified_sample])
+@pytest.mark.parametrize("sample_size", [1, 7, 1_000, TOTAL_ROWS, TOTAL_ROWS + 1])
+def test_exact_sample_size_in_file_order(sampler, sample_size):
+    table = trips()
+    sample = run(sampler, table, sample_size, seed=1)
+
+    assert sample.num_rows == min(sample_size, TOTAL_ROWS)
+    assert sample.column_names == table.column_names
+    rows = sample["row"].to_pylist()
+    assert rows == sorted(set(rows))
+    # Sampled rows are the input rows, unchanged
+    assert sample == table.take(pa.array(rows))
+
+
+@pytest.mark.parametrize("sampler", [uniform_sample, stratified_sample])
+def test_seed_makes_the_sample_deterministic(sampler):
+    table = trips()
+    first = run(sampler, table, 500, seed=42)["row"].to_pylist()
+    assert run(sampler, table, 500, seed=42)["row"].to_pylist() == first
+    # Output batching doesn't change the sample
+    assert run(sampler, table, 500, seed=42, batch_size=10_000)["row"].to_pylist() == first
+    assert run(sampler, table, 500, seed=43)["row"].to_pylist() != first
+
+
+@pytest.mark.parametrize("sampler", [uniform_sample, stratified_sample])
+def test_empty_input(sampler):
+    assert run(sampler, trips().slice(0, 0), 10, seed=1).num_rows == 0
+
+
+def day_counts(table: pa.Table, sample: pa.Table) -> Counter:
+    pickups = table["pickup"].to_pylist()
+    return Counter(None if pickups[row] is None else pickups[row].day for row in sample["row"].to_pylist())
+
+
+@pytest.mark.parametrize("sample_size, expected", [
+    (1_000, {1: 500, 2: 300, 3: 150, None: 50}),
+    (100, {1: 50, 2: 30, 3: 15, None: 5}),
+    # 3 rows split 1.5 / 0.9 / 0.45 / 0.15: floors give day 1 one row, and the
+    # largest remainders (0.9, then 0.5) the other two
+    (3, {1: 2, 2: 1}),
+])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_stratified_sample_is_proportional_per_day(sample_size, expected, seed):
+    table = trips()
+    sample = run(stratified_sample, table, sample_size, seed=seed)
+    assert day_counts(table, sample) == Counter(expected)
+
+
+def test_stratified_sample_holds_when_input_batches_are_small():
+    # Each batch is smaller than the sample, so the per-day bound kicks in late
+    table = trips()
+    sample = run(stratified_sample, table, 2_000, seed=5, input_batch=97)
+    assert day_counts(table, sample) == Counter({1: 1_000, 2: 600, 3: 300, None: 100})
+
+
+def test_uniform_sample_covers_days_roughly_in_proportion():
+    table = trips()
+    counts = Counter()
+    for seed in range(5):
+        counts += day_counts(table, run(uniform_sample, table, 1_000, seed=seed))
+    for day, rows in DAY_ROWS.items():
+        assert abs(counts[day] / 5_000 - rows / TOTAL_ROWS) < 0.03
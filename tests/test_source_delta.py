@@ -0,0 +1,162 @@
+"""
+Tests for the source table delta log (app/services/source_delta.py) as
+SourceService uses it: replay, compaction and row counts.
+"""
+
+import json
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from app.models.source import RowEdit
+from app.services import source_service as source_module
+from app.services.source_delta import DeltaLog, Overlay
+from app.services.source_service import SourceService
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    pq.write_table(pa.table({
+        "unique_id": pa.array(range(1, 11), pa.int64()),
+        "name": [f"row {i}" for i in range(1, 11)],
+        "amount": [float(i) for i in range(1, 11)],
+    }), tmp_path / "trips.parquet")
+    (tmp_path / "trips_metadata.json").write_text(json.dumps({"primary_key": "unique_id", "version": 0}))
+    return tmp_path
+
+
+def open_service(source_dir, compact_threshold: int = 1000) -> SourceService:
+    service = SourceService(compact_threshold=compact_threshold)
+    service.source_dir = source_dir
+    return service
+
+
+def rows(service: SourceService) -> dict[int, dict]:
+    return {row["unique_id"]: row for row in service.get_table("trips", limit=1000)["data"]}
+
+
+def edit(service: SourceService, *edits: RowEdit, expected_version=None):
+    return service.apply_edits("trips", [(list(edits), expected_version)])[0]
+
+
+def row_count(service: SourceService) -> int:
+    return next(table["row_count"] for table in service.list_tables() if table["name"] == "trips")
+
+
+def test_overlay_replay():
+    overlay = Overlay.from_entries([
+        {"op": "update", "key": "1", "updates": {"name": "a"}, "version": 1},
+        {"op": "update", "key": "1", "updates": {"amount": 2.0}, "version": 2},
+        {"op": "insert", "key": "11", "row": {"unique_id": 11, "name": "new"}, "version": 2},
+        {"op": "update", "key": "11", "updates": {"name": "newer"}, "version": 3},
+        {"op": "delete", "key": "2", "version": 3},
+        {"op": "update", "key": "3", "updates": {"name": "gone"}, "version": 3},
+        {"op": "delete", "key": "3", "version": 4},
+    ])
+    assert overlay.updates == {"1": {"name": "a", "amount": 2.0}}
+    assert overlay.deletes == {"2", "3"}
+    assert overlay.inserts == {"11": {"unique_id": 11, "name": "newer"}}
+    assert overlay.versions == {"1": 2, "11": 3, "2": 3, "3": 4}
+
+
+def test_edits_replay_after_restart(source_dir):
+    service = open_service(source_dir)
+    edit(service, RowEdit(op="update", pk_value=1, data={"name": "changed", "amount": 1.5}))
+    edit(service, RowEdit(op="insert", data={"name": "added"}), RowEdit(op="delete", pk_value=2))
+    before = rows(service)
+    assert service.get_table("trips")["version"] == 2
+
+    # A new service has nothing cached and replays the log from disk
+    restarted = open_service(source_dir)
+    assert rows(restarted) == before
+    assert before[1]["name"] == "changed" and before[1]["amount"] == 1.5
+    assert before[11]["name"] == "added"
+    assert 2 not in before
+    assert restarted.get_table("trips")["version"] == 2
+
+    # Row versions come back too, so stale edits are still conflicts
+    outcome = edit(restarted, RowEdit(op="update", pk_value=1, data={"name": "stale"}), expected_version=0)
+    assert not outcome.success and outcome.results[0].conflict
+    outcome = edit(restarted, RowEdit(op="update", pk_value=3, data={"name": "fresh"}), expected_version=0)
+    assert outcome.success and outcome.version == 3
+
+
+def test_compaction_keeps_edits_made_while_it_writes(source_dir, monkeypatch):
+    service = open_service(source_dir)
+    edit(service, RowEdit(op="update", pk_value=1, data={"name": "before"}))
+    edit(service, RowEdit(op="insert", data={"unique_id": 20, "name": "inserted"}))
+
+    write_table = pq.write_table
+
+    def racing_write(table, path, *args, **kwargs):
+        # Edits from another thread land while the merged file is being written
+        thread = threading.Thread(target=lambda: (
+            edit(service, RowEdit(op="update", pk_value=1, data={"name": "during"})),
+            edit(service, RowEdit(op="delete", pk_value=20)),
+        ))
+        thread.start()
+        thread.join()
+        write_table(table, path, *args, **kwargs)
+
+    monkeypatch.setattr(source_module.pq, "write_table", racing_write)
+    assert service.compact("trips") == 2
+    monkeypatch.setattr(source_module.pq, "write_table", write_table)
+
+    # The file has the edits compaction read; the log keeps exactly the racing ones
+    base = {row["unique_id"]: row for row in pq.read_table(source_dir / "trips.parquet").to_pylist()}
+    assert base[1]["name"] == "before" and base[20]["name"] == "inserted"
+    assert [(entry["op"], entry["key"]) for entry in DeltaLog(source_dir / "trips_delta.jsonl").read()] == [
+        ("update", "1"), ("delete", "20")
+    ]
+    current = rows(service)
+    assert current[1]["name"] == "during" and 20 not in current
+    assert rows(open_service(source_dir)) == current
+
+
+def test_delete_after_insert_was_compacted(source_dir):
+    service = open_service(source_dir)
+    inserted = edit(service, RowEdit(op="insert", data={"name": "short-lived"})).results[0].pk_value
+    assert inserted == 11
+    service.compact("trips")
+    assert not (source_dir / "trips_delta.jsonl").exists()
+
+    # The row is a base row now, so the delete is logged against the file
+    assert edit(service, RowEdit(op="delete", pk_value=inserted)).success
+    assert inserted not in rows(service)
+    assert inserted not in rows(open_service(source_dir))
+    assert service.get_table("trips")["total_count"] == 10
+
+    service.compact("trips")
+    assert inserted not in pq.read_table(source_dir / "trips.parquet")["unique_id"].to_pylist()
+    # Deleted ids aren't reused
+    assert edit(service, RowEdit(op="insert", data={"name": "next"})).results[0].pk_value == 11
+
+
+def test_list_tables_row_count_after_compaction(source_dir):
+    service = open_service(source_dir)
+    edit(service, *[RowEdit(op="insert", data={"name": f"new {i}"}) for i in range(3)])
+    edit(service, RowEdit(op="delete", pk_value=1), RowEdit(op="update", pk_value=2, data={"amount": 0.0}))
+    assert row_count(service) == 12
+
+    service.compact("trips")
+    assert row_count(service) == 12
+    assert pq.ParquetFile(source_dir / "trips.parquet").metadata.num_rows == 12
+
+    edit(service, RowEdit(op="delete", pk_value=12))
+    assert row_count(service) == 11
+    assert row_count(open_service(source_dir)) == 11
+
+
+def test_background_compaction_at_threshold(source_dir):
+    service = open_service(source_dir, compact_threshold=3)
+    edit(service, RowEdit(op="update", pk_value=1, data={"name": "a"}))
+    edit(service, RowEdit(op="update", pk_value=2, data={"name": "b"}), RowEdit(op="delete", pk_value=3))
+
+    for thread in threading.enumerate():
+        if thread.name == "compact-trips":
+            thread.join()
+    assert not (source_dir / "trips_delta.jsonl").exists()
+    assert service.list_tables()[0]["compaction_error"] is None
+    current = rows(service)
+    assert current[1]["name"] == "a" and current[2]["name"] == "b" and 3 not in current
@@ -0,0 +1,182 @@
+"""
+Tests for the table read paths of app/services/duckdb_service.py
+(query_table, stream_table, export_table) and the /api/data routes.
+"""
+
+import os
+
+import pytest
+from app.main import app
+from app.services.connection_manager import connection_manager
+from app.services.duckdb_service import db_service
+from fastapi.testclient import TestClient
+
+HOSTILE = [
+    'id" ; DROP TABLE main.victim; SELECT 1 --',
+    'id" IS NOT NULL; DROP TABLE main.victim; --',
+    "id; DROP TABLE main.victim",
+]
+
+
+@pytest.fixture
+def victim():
+    with connection_manager.writer() as conn:
+        conn.execute("CREATE OR REPLACE TABLE main.victim AS SELECT range AS id, range % 3 AS grp FROM range(10)")
+    yield "victim"
+    with connection_manager.writer() as conn:
+        conn.execute("DROP TABLE IF EXISTS main.victim")
+
+
+def victim_rows() -> int:
+    with connection_manager.cursor() as conn:
+        return conn.execute("SELECT COUNT(*) FROM main.victim").fetchone()[0]
+
+
+@pytest.mark.parametrize("order_by", HOSTILE)
+def test_hostile_order_by_is_rejected(victim, order_by):
+    client = TestClient(app)
+    for format in ("json", "ndjson", "arrow"):
+        response = client.get("/api/data/query", params={"table": "main.victim", "order_by": order_by, "format": format})
+        assert response.status_code == 400
+        assert "Unknown columns" in response.json()["detail"]
+    response = client.get("/api/data/export", params={"table": "main.victim", "order_by": order_by})
+    assert response.status_code == 400
+    assert victim_rows() == 10
+
+
+@pytest.mark.parametrize("column", HOSTILE)
+def test_hostile_filter_column_is_rejected(victim, column):
+    with pytest.raises(ValueError, match="Unknown columns"):
+        db_service.query_table("main", "victim", filters={column: 1})
+    stream = db_service.stream_table("main", "victim", "ndjson", filters={column: 1})
+    with pytest.raises(ValueError, match="Unknown columns"):
+        stream.open()
+    stream.close()
+    assert victim_rows() == 10
+
+
+@pytest.mark.parametrize("schema, table", [
+    ("main", 'victim"; DROP TABLE main.victim; --'),
+    ('main"."victim"; DROP TABLE main.victim; --', "victim"),
+    ("main", "missing"),
+])
+def test_unknown_tables_are_rejected(victim, schema, table):
+    with pytest.raises(ValueError, match="not found"):
+        db_service.query_table(schema, table)
+    with pytest.raises(ValueError, match="not found"):
+        db_service.export_table(schema, table)
+    assert victim_rows() == 10
+
+
+def test_order_dir_must_be_asc_or_desc(victim):
+    with pytest.raises(ValueError, match="order_dir"):
+        db_service.query_table("main", "victim", order_by="id", order_dir="asc; DROP TABLE main.victim")
+    assert victim_rows() == 10
+
+
+def test_quoted_identifiers_still_work():
+    with connection_manager.writer() as conn:
+        conn.execute('CREATE OR REPLACE TABLE main."odd ""name""" AS SELECT range AS "a""b" FROM range(3)')
+    try:
+        result = db_service.query_table("main", 'odd "name"', order_by='a"b', order_dir="desc", filters={'a"b': 1})
+        assert result.data == [{'a"b': 1}]
+        assert result.total_count == 1
+        path = db_service.export_table("main", 'odd "name"', "csv", "none", order_by='a"b')
+        try:
+            with open(path) as f:
+                assert f.read().split() == ['"a""b"', "0", "1", "2"]
+        finally:
+            os.remove(path)
+    finally:
+        with connection_manager.writer() as conn:
+            conn.execute('DROP TABLE main."odd ""name"""')
+
+
+@pytest.fixture
+def paged():
+    # v has long runs of ties and NULLs, so page boundaries fall inside both
+    with connection_manager.writer() as conn:
+        conn.execute("""
+            CREATE OR REPLACE TABLE main.paged AS
+            SELECT range AS id,
+                   CASE WHEN range % 5 = 0 THEN NULL ELSE range % 3 END AS v,
+                   CASE WHEN range % 4 = 0 THEN NULL ELSE 'k' || (range % 2) END AS s,
+                   TIMESTAMP '2024-01-01' + INTERVAL (range % 4) HOUR AS ts
+            FROM range(40)
+        """)
+        conn.execute("CREATE OR REPLACE VIEW main.paged_view AS SELECT * FROM main.paged")
+    yield "paged"
+    with connection_manager.writer() as conn:
+        conn.execute("DROP VIEW IF EXISTS main.paged_view")
+        conn.execute("DROP TABLE IF EXISTS main.paged")
+
+
+def expected_ids(rows: list[dict], order_by, order_dir: str) -> list[int]:
+    """ids in (order_by NULLS LAST, rowid) order; rowid follows id here."""
+    desc = order_dir == "desc"
+    if order_by is None:
+        return sorted((r["id"] for r in rows), reverse=desc)
+    present = sorted((r for r in rows if r[order_by] is not None), key=lambda r: (r[order_by], r["id"]), reverse=desc)
+    nulls = sorted((r["id"] for r in rows if r[order_by] is None), reverse=desc)
+    return [r["id"] for r in present] + nulls
+
+
+def keyset_pages(table: str, limit: int, **kwargs) -> list[list[int]]:
+    pages, cursor = [], None
+    while True:
+        result = db_service.query_table("main", table, limit=limit, cursor=cursor, **kwargs)
+        pages.append([row["id"] for row in result.data])
+        assert result.page == len(pages)
+        assert result.total_count == 40
+        cursor = result.next_cursor
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("order_by", [None, "id", "v", "s", "ts"])
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+def test_keyset_pages_cover_the_table_in_order(paged, order_by, order_dir):
+    everything = db_service.query_table("main", "paged", limit=100).data
+    pages = keyset_pages("paged", 3, order_by=order_by, order_dir=order_dir)
+
+    assert [len(page) for page in pages[:-1]] == [3] * (len(pages) - 1)
+    assert 0 < len(pages[-1]) <= 3
+    assert [i for page in pages for i in page] == expected_ids(everything, order_by, order_dir)
+
+
+def test_keyset_cursor_resumes_inside_null_run(paged):
+    # The 8 rows with v IS NULL come last, so a first page of 34 ends two rows into the run
+    first = db_service.query_table("main", "paged", limit=34, order_by="v")
+    assert [row["id"] for row in first.data[-2:]] == [0, 5]
+    rest = db_service.query_table("main", "paged", limit=34, order_by="v", cursor=first.next_cursor)
+    assert [row["id"] for row in rest.data] == [10, 15, 20, 25, 30, 35]
+    assert all(row["v"] is None for row in rest.data)
+    assert rest.next_cursor is None
+
+
+def test_keyset_cursor_must_match_query(paged):
+    cursor = db_service.query_table("main", "paged", limit=3, order_by="v").next_cursor
+    with pytest.raises(ValueError, match="Cursor does not match"):
+        db_service.query_table("main", "paged", limit=3, order_by="s", cursor=cursor)
+    with pytest.raises(ValueError, match="Cursor does not match"):
+        db_service.query_table("main", "paged", limit=3, order_by="v", order_dir="desc", cursor=cursor)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        db_service.query_table("main", "paged", limit=3, cursor="not a cursor")
+
+
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+def test_views_fall_back_to_offset(paged, order_dir):
+    everything = db_service.query_table("main", "paged", limit=100).data
+    ids = []
+    for page in range(14):
+        result = db_service.query_table(
+            "main", "paged_view", limit=3, offset=page * 3, order_by="id", order_dir=order_dir
+        )
+        assert result.next_cursor is None
+        assert result.page == page + 1
+        ids += [row["id"] for row in result.data]
+    assert ids == expected_ids(everything, "id", order_dir)
+
+    cursor = db_service.query_table("main", "paged", limit=3, order_by="id").next_cursor
+    with pytest.raises(ValueError, match="Cursor does not match"):
+        db_service.query_table("main", "paged_view", limit=3, order_by="id", cursor=cursor)
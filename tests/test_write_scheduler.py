@@ -0,0 +1,146 @@
+"""
+Tests for the single-writer queue (app/services/write_scheduler.py),
+driven from real threads.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from app.services.write_scheduler import WriteQueueTimeoutError, WriteScheduler
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.005)
+
+
+class Holder:
+    """A thread holding the slot until release()."""
+
+    def __init__(self, scheduler: WriteScheduler, kind: str = "job"):
+        self._held = threading.Event()
+        self._release = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(scheduler, kind))
+        self.thread.start()
+        assert self._held.wait(5)
+
+    def _run(self, scheduler: WriteScheduler, kind: str) -> None:
+        with scheduler.slot(kind, "holder"):
+            self._held.set()
+            self._release.wait(5)
+
+    def release(self) -> None:
+        self._release.set()
+        self.thread.join(5)
+
+
+def queue_writer(scheduler: WriteScheduler, kind: str, label: str, order: list, errors: list, **kwargs):
+    """Start a thread that queues for the slot, once the previous writer is queued."""
+    depth = scheduler.depth
+
+    def run():
+        try:
+            with scheduler.slot(kind, label, **kwargs):
+                order.append(label)
+        except WriteQueueTimeoutError as e:
+            errors.append((label, str(e)))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    wait_for(lambda: scheduler.depth == depth + 1)
+    return thread
+
+
+def test_priority_order():
+    scheduler = WriteScheduler()
+    holder = Holder(scheduler)
+    order, errors = [], []
+    threads = [
+        queue_writer(scheduler, kind, label, order, errors)
+        for kind, label in [("job", "job 1"), ("sync", "sync 1"), ("edit", "edit 1"), ("sync", "sync 2"),
+                            ("edit", "edit 2"), ("job", "job 2")]
+    ]
+    assert scheduler.busy
+    assert [t["label"] for t in scheduler.stats()["waiting"]] == [
+        "edit 1", "edit 2", "sync 1", "sync 2", "job 1", "job 2"
+    ]
+
+    holder.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["edit 1", "edit 2", "sync 1", "sync 2", "job 1", "job 2"]
+    assert errors == []
+    assert not scheduler.busy
+    kinds = scheduler.stats()["kinds"]
+    assert [kinds[kind]["completed"] for kind in ("edit", "sync", "job")] == [2, 2, 3]
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError, match="Unknown writer kind"):
+        with WriteScheduler().slot("read"):
+            pass
+
+
+def test_abandon_thread():
+    scheduler = WriteScheduler()
+    holder = Holder(scheduler)
+    order, errors = [], []
+    waiting = queue_writer(scheduler, "edit", "abandoned", order, errors)
+    behind = queue_writer(scheduler, "sync", "behind", order, errors)
+
+    assert scheduler.abandon_thread(waiting.ident) == 1
+    waiting.join(5)
+    assert errors == [("abandoned", "Gave up waiting for the database writer")]
+    assert scheduler.depth == 1
+    # A thread holding the slot has nothing queued to abandon
+    assert scheduler.abandon_thread(holder.thread.ident) == 0
+
+    holder.release()
+    behind.join(5)
+    assert order == ["behind"]
+    assert not scheduler.busy
+
+
+def test_queue_timeout():
+    scheduler = WriteScheduler()
+    holder = Holder(scheduler)
+    order, errors = [], []
+
+    started = time.monotonic()
+    queue_writer(scheduler, "edit", "impatient", order, errors, timeout=0.2).join(5)
+    assert 0.2 <= time.monotonic() - started < 2
+    assert errors == [("impatient", "Timed out after 0.2s waiting for the database writer")]
+    assert scheduler.depth == 0
+
+    # The slot still goes round after the timeout
+    patient = queue_writer(scheduler, "edit", "patient", order, errors, timeout=5)
+    holder.release()
+    patient.join(5)
+    assert order == ["patient"]
+    assert len(errors) == 1
+
+
+def test_cancelled_async_wait_leaves_the_queue():
+    scheduler = WriteScheduler()
+    holder = Holder(scheduler)
+
+    async def wait_and_cancel():
+        async def job():
+            async with scheduler.async_slot("job", "cancelled"):
+                pytest.fail("the slot should not be granted")
+
+        task = asyncio.create_task(job())
+        while scheduler.depth == 0:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(wait_and_cancel())
+    assert scheduler.depth == 0
+    holder.release()
+    assert not scheduler.busy
@@ -18,6 +18,31 @@ DUCKDB_PATH = os.getenv("DUCKDB_PATH", str(DATABASE_PATH))
 DLT_PIPELINE_PATH = PROJECT_ROOT / "dlt_pipeline"
 DLT_PIPELINE_SCRIPT = DLT_PIPELINE_PATH / "nyc_taxi_pipeline.py"
 
+# Warm worker processes kept alive for dlt pipeline runs
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "2"))
+
+# Threads that run DuckDB work for API requests, and the per-request timeout (seconds)
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "4"))
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "30"))
+
+# Exports run much longer than interactive queries (seconds)
+EXPORT_TIMEOUT = float(os.getenv("EXPORT_TIMEOUT", "600"))
+
+# Memory budget of the query result cache (MB)
+QUERY_CACHE_MB = int(os.getenv("QUERY_CACHE_MB", "256"))
+
+# How long a dlt/dbt job waits for in-flight queries before interrupting them (seconds)
+DB_RELEASE_TIMEOUT = float(os.getenv("DB_RELEASE_TIMEOUT", "10"))
+
+# How long a write waits for its turn in the single-writer queue (seconds)
+WRITE_QUEUE_TIMEOUT = float(os.getenv("WRITE_QUEUE_TIMEOUT", "30"))
+
+# Source table edits logged before the delta log is compacted into the Parquet file
+SOURCE_COMPACT_THRESHOLD = int(os.getenv("SOURCE_COMPACT_THRESHOLD", "1000"))
+
+# Source table edits arriving within this window are applied together (milliseconds)
+SOURCE_EDIT_WINDOW_MS = int(os.getenv("SOURCE_EDIT_WINDOW_MS", "25"))
+
 # dbt project path
 DBT_PROJECT_PATH = PROJECT_ROOT / "dbt_project"
 
@@ -1,13 +1,30 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import CORS_ORIGINS
 from app.routers import source, data, dag, diff, impact, pipeline, dbt, websocket
+from app.services import db_executor
+from app.services.connection_manager import connection_manager
+from app.services.dlt_service import dlt_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up the dlt worker processes before the first pipeline run
+    dlt_service.worker_pool.start()
+    yield
+    dlt_service.worker_pool.shutdown()
+    db_executor.shutdown()
+    connection_manager.close()
+
 
 app = FastAPI(
     title="dbt Demo Platform",
     description="Interactive platform for demonstrating dbt concepts - source editing, DAG visualization, and impact analysis",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
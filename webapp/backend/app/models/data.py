@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 from pydantic import BaseModel
 
 
@@ -13,6 +13,7 @@ class TableInfo(BaseModel):
     schema_name: str
     column_count: int
     row_count: Optional[int] = None
+    row_count_exact: bool = False  # False = DuckDB's estimate (None for views)
     table_type: str = "BASE TABLE"  # BASE TABLE or VIEW
 
 
@@ -22,6 +23,7 @@ class QueryResult(BaseModel):
     total_count: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # pass back as cursor= for the next page
 
 
 class UpdateRequest(BaseModel):
@@ -43,3 +45,110 @@ class DeleteRequest(BaseModel):
     table_name: str
     pk_column: str
     pk_value: Any
+
+
+class BulkUpdate(BaseModel):
+    pk_value: Any
+    updates: dict[str, Any]
+
+
+class BulkWriteRequest(BaseModel):
+    schema_name: str
+    table_name: str
+    pk_column: str
+    inserts: list[dict[str, Any]] = []
+    updates: list[BulkUpdate] = []
+    deletes: list[Any] = []  # primary key values
+    atomic: bool = True  # roll everything back if any row fails
+
+
+class BulkRowResult(BaseModel):
+    operation: Literal["insert", "update", "delete"]
+    index: int  # position in the request's inserts/updates/deletes list
+    pk_value: Any = None
+    success: bool
+    error: Optional[str] = None
+
+
+class BulkWriteResult(BaseModel):
+    success: bool
+    committed: bool
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    results: list[BulkRowResult]
+
+
+class ExportRequest(BaseModel):
+    query: str  # a single SELECT
+    format: Literal["parquet", "csv"] = "parquet"
+    compression: Optional[str] = None  # parquet: zstd/snappy/gzip/uncompressed, csv: gzip/zstd/none
+    file_name: str = "export"
+
+
+class ColumnProfile(BaseModel):
+    name: str
+    type: str
+    # Rendered as text by DuckDB's SUMMARIZE (they may be dates or strings)
+    min: Optional[str] = None
+    max: Optional[str] = None
+    avg: Optional[str] = None
+    std: Optional[str] = None
+    q25: Optional[str] = None
+    q50: Optional[str] = None
+    q75: Optional[str] = None
+    approx_distinct: Optional[int] = None
+    count: int
+    null_percent: Optional[float] = None
+
+
+class TableProfile(BaseModel):
+    schema_name: str
+    table_name: str
+    row_count: int
+    columns: list[ColumnProfile]
+
+
+AggregateFunction = Literal[
+    "count", "count_distinct", "approx_count_distinct",
+    "sum", "avg", "min", "max", "median", "stddev"
+]
+
+
+class Aggregate(BaseModel):
+    function: AggregateFunction
+    column: Optional[str] = None  # None only for count (COUNT(*))
+    alias: Optional[str] = None  # defaults to function_column
+
+
+class AggregateRequest(BaseModel):
+    schema_name: str
+    table_name: str
+    group_by: list[str] = []
+    # Truncate temporal group_by columns, e.g. {"tpep_pickup_datetime": "hour"}
+    time_grain: dict[str, Literal["minute", "hour", "day", "week", "month", "year"]] = {}
+    aggregates: list[Aggregate] = [Aggregate(function="count")]
+    filters: Optional[dict[str, Any]] = None
+    order_by: Optional[str] = None  # a group_by column or aggregate alias
+    order_dir: Literal["asc", "desc"] = "desc"
+    limit: int = 1000
+
+
+class AggregateResult(BaseModel):
+    data: list[dict[str, Any]]
+    columns: list[ColumnInfo]
+    truncated: bool  # more groups than limit
+
+
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class Histogram(BaseModel):
+    column: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+    null_count: int
+    bins: list[HistogramBin]
@@ -9,6 +9,8 @@ class PipelineRunRequest(BaseModel):
     taxi_type: Literal["yellow", "green", "fhv", "fhvhv"] = "yellow"
     write_disposition: Literal["replace", "merge", "append"] = "replace"
     row_limit: Optional[int] = 10000
+    sampling: Literal["head", "uniform", "stratified"] = "head"
+    loader_file_format: Literal["parquet", "insert_values", "jsonl"] = "parquet"
 
 
 class DbtRunRequest(BaseModel):
@@ -1,4 +1,4 @@
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 from pydantic import BaseModel
 
 
@@ -65,3 +65,32 @@ class UpdateRowRequest(BaseModel):
 
 class AddRowRequest(BaseModel):
     data: dict[str, Any]
+
+
+class RowEdit(BaseModel):
+    op: Literal["insert", "update", "delete"]
+    pk_value: Any = None  # update/delete; an insert takes its key from data (generated if missing)
+    data: dict[str, Any] = {}  # insert: the row, update: the changed columns
+
+
+class BatchEditRequest(BaseModel):
+    edits: list[RowEdit]
+    # Table version the edits are based on (from GET /tables/{name});
+    # edits to rows changed after it fail as conflicts
+    expected_version: Optional[int] = None
+
+
+class RowEditResult(BaseModel):
+    op: Literal["insert", "update", "delete"]
+    index: int  # position in the request's edits
+    pk_value: Any = None
+    success: bool
+    conflict: bool = False  # the row changed after expected_version
+    error: Optional[str] = None
+    row: Optional[dict[str, Any]] = None  # the row after an insert or update
+
+
+class BatchEditResult(BaseModel):
+    success: bool  # all edits applied; a batch is all-or-nothing
+    version: int  # table version after the batch
+    results: list[RowEditResult]
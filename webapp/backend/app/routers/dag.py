@@ -1,16 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 
 from app.services.dag_service import dag_service
+from app.services.db_executor import QueryInterruptedError, run_db
 from app.models.dag import Dag, SelectorResult, ModelPreview
 
 router = APIRouter()
 
 
 @router.get("/", response_model=Dag)
-async def get_dag():
+async def get_dag(request: Request):
     """Get the full dbt DAG from manifest.json."""
     try:
-        return dag_service.get_dag()
+        return await run_db(dag_service.get_dag, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -19,23 +22,29 @@ async def get_dag():
 
 @router.get("/select", response_model=SelectorResult)
 async def get_selector_result(
+    request: Request,
     selector: str = Query(..., description="dbt selector (e.g., 'stg_trips+', '+fct_trips')")
 ):
     """Parse dbt selector and return matching nodes."""
     try:
-        return dag_service.get_selector_result(selector)
+        return await run_db(dag_service.get_selector_result, selector, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/model/{model_name}", response_model=ModelPreview)
 async def get_model_preview(
+    request: Request,
     model_name: str,
     limit: int = Query(10, ge=1, le=100)
 ):
     """Get model details and sample data."""
     try:
-        return dag_service.get_model_preview(model_name, limit)
+        return await run_db(dag_service.get_model_preview, model_name, limit, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -1,69 +1,235 @@
+import json
+import os
 from typing import Any, Optional
-from fastapi import APIRouter, HTTPException, Query
 
+import duckdb
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.config import EXPORT_TIMEOUT
+from app.services.db_executor import QueryInterruptedError, run_db, stream_db
 from app.services.duckdb_service import db_service
+from app.services.profile_service import profile_service
+from app.services.query_cache import query_cache
+from app.services.write_scheduler import WriteQueueTimeoutError, write_scheduler
 from app.models.data import (
     TableInfo, ColumnInfo, QueryResult,
-    UpdateRequest, InsertRequest, DeleteRequest
+    UpdateRequest, InsertRequest, DeleteRequest,
+    BulkWriteRequest, BulkWriteResult,
+    TableProfile, AggregateRequest, AggregateResult, Histogram,
+    ExportRequest
 )
 
 router = APIRouter()
 
+# Page size caps: JSON pages are built row by row, streamed formats are not
+MAX_JSON_ROWS = 1000
+MAX_STREAM_ROWS = 1_000_000
+
+STREAM_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "ndjson": "application/x-ndjson",
+}
+
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+}
+
+
+def _remove_export(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _ExportFileResponse(FileResponse):
+    """FileResponse for a temporary export file, deleted when the response ends."""
+
+    async def __call__(self, scope, receive, send) -> None:
+        # A background task would be skipped if the client disconnects mid-send
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _remove_export(self.path)
+
+
+def _export_response(path: str, file_name: str, format: str) -> FileResponse:
+    """Send an export file in chunks and delete it afterwards."""
+    return _ExportFileResponse(path, media_type=EXPORT_MEDIA_TYPES[format], filename=file_name)
+
 
 @router.get("/schemas", response_model=list[str])
-async def list_schemas():
+async def list_schemas(request: Request):
     """List all database schemas."""
     try:
-        return db_service.list_schemas()
+        return await run_db(db_service.list_schemas, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/tables")
-async def list_all_tables():
+async def list_all_tables(
+    request: Request,
+    exact: bool = Query(False, description="Run COUNT(*) instead of using estimated row counts"),
+):
     """List all tables across all schemas."""
-    try:
-        schemas = db_service.list_schemas()
+    def load() -> list[dict]:
         all_tables = []
-        for schema in schemas:
-            tables = db_service.list_tables(schema)
+        for schema in db_service.list_schemas():
+            tables = db_service.list_tables(schema, exact_counts=exact)
             for table in tables:
                 all_tables.append({
                     "name": f"{schema}.{table.name}",
                     "schema": schema,
-                    "row_count": table.row_count or 0,
+                    # None for views (no estimate) unless exact counts were asked for
+                    "row_count": table.row_count,
+                    "row_count_exact": table.row_count_exact,
                 })
         return all_tables
+
+    try:
+        return await run_db(load, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/tables/refresh")
+async def refresh_catalog():
+    """Drop cached catalog metadata (after changes made outside the app)."""
+    db_service.invalidate_catalog()
+    return {"success": True}
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Query result cache hit/miss counters and memory use."""
+    return query_cache.stats()
+
+
+@router.get("/write-queue")
+async def write_queue():
+    """Database writers running and waiting, with queue wait times."""
+    return write_scheduler.stats()
+
+
 @router.get("/tables/{schema}", response_model=list[TableInfo])
-async def list_tables(schema: str):
+async def list_tables(
+    request: Request,
+    schema: str,
+    exact: bool = Query(False, description="Run COUNT(*) instead of using estimated row counts"),
+):
     """List all tables in a schema."""
     try:
-        return db_service.list_tables(schema)
+        return await run_db(db_service.list_tables, schema, exact_counts=exact, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/schema/{schema}/{table}", response_model=list[ColumnInfo])
-async def get_table_schema(schema: str, table: str):
+async def get_table_schema(request: Request, schema: str, table: str):
     """Get column information for a table."""
     try:
-        return db_service.get_table_schema(schema, table)
+        return await run_db(db_service.get_table_schema, schema, table, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/profile/{schema}/{table}", response_model=TableProfile)
+async def profile_table(
+    request: Request,
+    schema: str,
+    table: str,
+    columns: Optional[str] = Query(None, description="Comma-separated columns to profile (default: all)"),
+):
+    """Per-column statistics (min/max, null %, approx distinct, quartiles) computed in DuckDB."""
+    try:
+        return await run_db(
+            profile_service.profile, schema, table,
+            [c.strip() for c in columns.split(",") if c.strip()] if columns else None,
+            request=request
+        )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/aggregate", response_model=AggregateResult)
+async def aggregate_table(request: AggregateRequest, http_request: Request):
+    """Group and aggregate a table inside DuckDB."""
+    try:
+        return await run_db(
+            profile_service.aggregate,
+            schema=request.schema_name,
+            table=request.table_name,
+            group_by=request.group_by,
+            aggregates=request.aggregates,
+            time_grain=request.time_grain,
+            filters=request.filters,
+            order_by=request.order_by,
+            order_dir=request.order_dir,
+            limit=request.limit,
+            request=http_request
+        )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/histogram/{schema}/{table}/{column}", response_model=Histogram)
+async def column_histogram(
+    request: Request,
+    schema: str,
+    table: str,
+    column: str,
+    bins: int = Query(20, ge=1, le=200, description="Number of equal-width bins"),
+    filters: Optional[str] = Query(
+        None, description='JSON object of column -> value equality filters, e.g. {"vendor_id": 1}'
+    ),
+):
+    """Equal-width histogram of a numeric column, optionally of the rows matching filters."""
+    try:
+        parsed_filters = json.loads(filters) if filters else None
+        if parsed_filters is not None and not isinstance(parsed_filters, dict):
+            raise ValueError("filters must be a JSON object")
+        return await run_db(profile_service.histogram, schema, table, column, bins, parsed_filters, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/query", response_model=QueryResult)
 async def query_table(
+    request: Request,
     schema: Optional[str] = Query(None, description="Schema name"),
     table: str = Query(..., description="Table name (can include schema as schema.table)"),
-    limit: int = Query(100, ge=1, le=1000, description="Number of rows to return"),
+    limit: int = Query(100, ge=1, le=MAX_STREAM_ROWS, description="Number of rows to return"),
     offset: int = Query(0, ge=0, description="Number of rows to skip"),
     order_by: Optional[str] = Query(None, description="Column to order by"),
     order_dir: str = Query("asc", pattern="^(asc|desc)$", description="Order direction"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides offset)"),
+    format: str = Query(
+        "json", pattern="^(json|arrow|ndjson)$",
+        description="json (QueryResult), arrow (Arrow IPC stream) or ndjson (one JSON row per line)"
+    ),
 ):
     """Query table data with pagination."""
     try:
@@ -75,62 +241,180 @@ async def query_table(
         elif schema is None:
             schema = "main"
 
-        return db_service.query_table(
+        if format != "json":
+            # Streamed straight from DuckDB record batches, no per-row Python objects
+            stream = db_service.stream_table(
+                schema=schema,
+                table=table,
+                format=format,
+                limit=limit,
+                offset=offset,
+                order_by=order_by,
+                order_dir=order_dir,
+                cursor=cursor
+            )
+            try:
+                # Run the query before the response starts, so errors still get a status code
+                await run_db(stream.open, request=request)
+            except BaseException:
+                await run_db(stream.close, timeout=None)
+                raise
+            return StreamingResponse(
+                stream_db(stream, request=request, timeout=EXPORT_TIMEOUT),
+                media_type=STREAM_MEDIA_TYPES[format]
+            )
+
+        if limit > MAX_JSON_ROWS:
+            raise ValueError(f"limit must be at most {MAX_JSON_ROWS} for format=json")
+
+        return await run_db(
+            db_service.query_table,
             schema=schema,
             table=table,
             limit=limit,
             offset=offset,
             order_by=order_by,
-            order_dir=order_dir
+            order_dir=order_dir,
+            cursor=cursor,
+            request=request
         )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/export")
+async def export_table(
+    request: Request,
+    table: str = Query(..., description="Table name (schema.table)"),
+    format: str = Query("parquet", pattern="^(parquet|csv)$", description="File format"),
+    compression: Optional[str] = Query(
+        None, description="parquet: zstd (default), snappy, gzip, uncompressed; csv: gzip (default), zstd, none"
+    ),
+    order_by: Optional[str] = Query(None, description="Column to order by"),
+    order_dir: str = Query("asc", pattern="^(asc|desc)$", description="Order direction"),
+):
+    """Download a whole table, written by DuckDB's COPY ... TO."""
+    schema, table = table.split(".", 1) if "." in table else ("main", table)
+    try:
+        path = await run_db(
+            db_service.export_table, schema, table, format, compression, order_by, order_dir,
+            request=request, timeout=EXPORT_TIMEOUT, abandoned=_remove_export
+        )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _export_response(path, db_service.export_file_name(table, format, compression), format)
+
+
+@router.post("/export")
+async def export_query(request: ExportRequest, http_request: Request):
+    """Download the result of a SELECT, written by DuckDB's COPY ... TO."""
+    try:
+        path = await run_db(
+            db_service.export_query, request.query, request.format, request.compression,
+            request=http_request, timeout=EXPORT_TIMEOUT, abandoned=_remove_export
+        )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except (ValueError, duckdb.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _export_response(
+        path, db_service.export_file_name(request.file_name, request.format, request.compression), request.format
+    )
+
+
 @router.post("/update")
-async def update_record(request: UpdateRequest):
+async def update_record(request: UpdateRequest, http_request: Request):
     """Update a single record."""
     try:
-        print(f"Update request: schema={request.schema_name}, table={request.table_name}, pk_column={request.pk_column}, pk_value={request.pk_value}, updates={request.updates}")
-        db_service.update_record(
+        await run_db(
+            db_service.update_record,
             schema=request.schema_name,
             table=request.table_name,
             pk_column=request.pk_column,
             pk_value=request.pk_value,
-            updates=request.updates
+            updates=request.updates,
+            request=http_request
         )
         return {"success": True, "message": "Record updated successfully"}
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WriteQueueTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        import traceback
-        print(f"Update error: {e}")
-        traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/insert")
-async def insert_record(request: InsertRequest):
+async def insert_record(request: InsertRequest, http_request: Request):
     """Insert a new record."""
     try:
-        db_service.insert_record(
+        await run_db(
+            db_service.insert_record,
             schema=request.schema_name,
             table=request.table_name,
-            data=request.data
+            data=request.data,
+            request=http_request
         )
         return {"success": True, "message": "Record inserted successfully"}
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WriteQueueTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/delete")
-async def delete_record(request: DeleteRequest):
+async def delete_record(request: DeleteRequest, http_request: Request):
     """Delete a single record."""
     try:
-        db_service.delete_record(
+        await run_db(
+            db_service.delete_record,
             schema=request.schema_name,
             table=request.table_name,
             pk_column=request.pk_column,
-            pk_value=request.pk_value
+            pk_value=request.pk_value,
+            request=http_request
         )
         return {"success": True, "message": "Record deleted successfully"}
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WriteQueueTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk", response_model=BulkWriteResult)
+async def bulk_write(request: BulkWriteRequest, http_request: Request):
+    """Apply a batch of inserts, updates and deletes in one transaction."""
+    try:
+        return await run_db(
+            db_service.bulk_write,
+            schema=request.schema_name,
+            table=request.table_name,
+            pk_column=request.pk_column,
+            inserts=request.inserts,
+            updates=request.updates,
+            deletes=request.deletes,
+            atomic=request.atomic,
+            request=http_request
+        )
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except WriteQueueTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 
+from app.services.db_executor import QueryInterruptedError, run_db
 from app.services.diff_service import diff_service
 from app.models.diff import Snapshot, DiffResult
 
@@ -7,10 +8,12 @@ router = APIRouter()
 
 
 @router.post("/snapshot", response_model=Snapshot)
-async def take_snapshot(label: str = Query("", description="Optional label for the snapshot")):
+async def take_snapshot(request: Request, label: str = Query("", description="Optional label for the snapshot")):
     """Take a snapshot of the current database state."""
     try:
-        return diff_service.take_snapshot(label)
+        return await run_db(diff_service.take_snapshot, label, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -42,12 +45,15 @@ async def delete_snapshot(snapshot_id: str):
 
 @router.post("/compare", response_model=DiffResult)
 async def compare_snapshots(
+    request: Request,
     before_id: str = Query(..., description="Snapshot ID to compare from"),
     after_id: str = Query(..., description="Snapshot ID to compare to")
 ):
     """Compare two snapshots."""
     try:
-        return diff_service.compare_snapshots(before_id, after_id)
+        return await run_db(diff_service.compare_snapshots, before_id, after_id, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -56,11 +62,14 @@ async def compare_snapshots(
 
 @router.post("/compare-current", response_model=DiffResult)
 async def compare_with_current(
+    request: Request,
     snapshot_id: str = Query(..., description="Snapshot ID to compare with current state")
 ):
     """Compare a snapshot with the current database state."""
     try:
-        return diff_service.compare_with_current(snapshot_id)
+        return await run_db(diff_service.compare_with_current, snapshot_id, request=request)
+    except QueryInterruptedError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -15,7 +15,9 @@ async def run_pipeline(request: PipelineRunRequest):
             month=request.month,
             taxi_type=request.taxi_type,
             write_disposition=request.write_disposition,
-            row_limit=request.row_limit
+            row_limit=request.row_limit,
+            sampling=request.sampling,
+            loader_file_format=request.loader_file_format
         )
         return job
     except Exception as e:
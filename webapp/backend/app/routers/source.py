@@ -2,8 +2,10 @@ from typing import Any
 from fastapi import APIRouter, HTTPException, Query
 
 from app.services.source_service import source_service
+from app.services.edit_coalescer import edit_coalescer
 from app.models.source import (
-    SourceTableInfo, AddColumnRequest, UpdateRowRequest, AddRowRequest
+    SourceTableInfo, AddColumnRequest, UpdateRowRequest, AddRowRequest,
+    RowEdit, BatchEditRequest, BatchEditResult
 )
 
 router = APIRouter()
@@ -42,13 +44,17 @@ async def save_source_table(table_name: str, table_data: dict):
 async def add_row(table_name: str, request: AddRowRequest):
     """Add a new row to source table."""
     try:
-        result = source_service.add_row(table_name, request.data)
-        return result  # Service already returns {"success": True, "row": ...}
+        outcome = await edit_coalescer.submit(table_name, [RowEdit(op="insert", data=request.data)])
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    result = outcome.results[0]
+    if not result.success:
+        raise HTTPException(status_code=400, detail=result.error)
+    return {"success": True, "row": result.row}
+
 
 @router.put("/tables/{table_name}/rows/{pk_value}")
 async def update_row(table_name: str, pk_value: str, request: UpdateRowRequest):
@@ -60,15 +66,17 @@ async def update_row(table_name: str, pk_value: str, request: UpdateRowRequest):
         except ValueError:
             pk = pk_value
 
-        result = source_service.update_row(table_name, pk, request.updates)
-        return result  # Service already returns {"success": True, "row": ...}
+        outcome = await edit_coalescer.submit(table_name, [RowEdit(op="update", pk_value=pk, data=request.updates)])
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    result = outcome.results[0]
+    if not result.success:
+        raise HTTPException(status_code=404, detail=result.error)
+    return {"success": True, "row": result.row}
+
 
 @router.delete("/tables/{table_name}/rows/{pk_value}")
 async def delete_row(table_name: str, pk_value: str):
@@ -80,15 +88,36 @@ async def delete_row(table_name: str, pk_value: str):
         except ValueError:
             pk = pk_value
 
-        source_service.delete_row(table_name, pk)
-        return {"success": True, "message": "Row deleted"}
+        outcome = await edit_coalescer.submit(table_name, [RowEdit(op="delete", pk_value=pk)])
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    except ValueError as e:
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not outcome.success:
+        raise HTTPException(status_code=404, detail=outcome.results[0].error)
+    return {"success": True, "message": "Row deleted"}
+
+
+@router.post("/tables/{table_name}/edits", response_model=BatchEditResult)
+async def edit_rows(table_name: str, request: BatchEditRequest):
+    """
+    Apply a batch of row inserts, updates and deletes (all or nothing).
+
+    Pass the version from GET /tables/{table_name} as expected_version to
+    reject edits to rows someone else changed since (409).
+    """
+    try:
+        outcome = await edit_coalescer.submit(table_name, request.edits, request.expected_version)
+    except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if any(result.conflict for result in outcome.results):
+        raise HTTPException(status_code=409, detail=outcome.model_dump())
+    return outcome
+
 
 @router.post("/tables/{table_name}/columns")
 async def add_column(table_name: str, request: AddColumnRequest):
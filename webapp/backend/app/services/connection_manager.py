@@ -0,0 +1,302 @@
+"""
+Shared DuckDB connection manager.
+
+Opening the database file costs tens of milliseconds and re-reads the
+catalog, so the backend keeps one long-lived database instance and hands
+out cursors on it:
+- cursor(): a per-thread read cursor, reused across requests
+- dedicated(): a private cursor for reads that outlive one call (streams)
+- writer(): a single writer cursor, run in a transaction once the write
+  scheduler grants it the write slot
+
+The instance holds the DuckDB file lock for as long as the backend runs,
+so dbt or dlt started from a shell (outside the webapp) can't open the
+file while the backend is up; run them through the API, or stop the
+backend first. dlt and dbt jobs started through the API take the write
+slot and wrap themselves in (async_)released(): new reads go to
+short-lived read-only connections, in-flight cursors are waited for (and
+interrupted after DB_RELEASE_TIMEOUT), and the instance is closed before
+the job starts. It is reopened lazily afterwards.
+
+version is a counter of database changes: it is bumped when a writer()
+transaction commits and when a released() block (a dlt/dbt job) ends, so
+caches of catalog metadata or query results can key on it.
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+import duckdb
+
+from app.config import DB_RELEASE_TIMEOUT, DUCKDB_PATH, WRITE_QUEUE_TIMEOUT
+from app.services.write_scheduler import write_scheduler
+
+
+class ConnectionManager:
+    """One DuckDB instance shared by all services."""
+
+    def __init__(self, db_path: str = DUCKDB_PATH):
+        self.db_path = db_path
+
+        self._lock = threading.Lock()
+        # Notified when a cursor is returned (released() waits on it)
+        self._idle = threading.Condition(self._lock)
+        self._local = threading.local()
+
+        self._db: Optional[duckdb.DuckDBPyConnection] = None
+        self._cursors: list[duckdb.DuckDBPyConnection] = []
+        self._writer: Optional[duckdb.DuckDBPyConnection] = None
+        # Bumped whenever the instance is closed, so threads drop stale cursors
+        self._generation = 0
+        self._in_use = 0
+        # Cursors currently in use, by thread, so a stuck query can be interrupted
+        self._busy: dict[int, list[duckdb.DuckDBPyConnection]] = {}
+        # Cursors of dedicated() blocks (streams, not tied to a thread)
+        self._streams: set[duckdb.DuckDBPyConnection] = set()
+        self._external_writers = 0
+        self._version = 0
+
+    # ------------------------------------------------------------------
+    # Instance lifecycle
+    # ------------------------------------------------------------------
+
+    def _database(self) -> duckdb.DuckDBPyConnection:
+        """Open the shared instance if needed. Caller holds self._lock."""
+        if self._db is None:
+            self._db = duckdb.connect(self.db_path)
+        return self._db
+
+    def _close(self) -> None:
+        """Close every cursor and the instance. Caller holds self._lock."""
+        if self._db is None:
+            return
+        for cursor in self._cursors:
+            cursor.close()
+        if self._writer is not None:
+            self._writer.close()
+        self._db.close()
+        self._db = None
+        self._cursors = []
+        self._writer = None
+        self._generation += 1
+
+    def close(self) -> None:
+        """Close the shared instance (it is reopened on next use)."""
+        with self._lock:
+            self._close()
+
+    def _checkout(self) -> Optional[duckdb.DuckDBPyConnection]:
+        """This thread's cursor on the shared instance, or None while released."""
+        with self._lock:
+            if self._external_writers:
+                return None
+
+            cursor = getattr(self._local, "cursor", None)
+            if cursor is None or self._local.generation != self._generation:
+                cursor = self._database().cursor()
+                self._cursors.append(cursor)
+                self._local.cursor = cursor
+                self._local.generation = self._generation
+
+            self._in_use += 1
+            self._busy.setdefault(threading.get_ident(), []).append(cursor)
+            return cursor
+
+    def _checkin(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        with self._lock:
+            self._in_use -= 1
+            self._unmark_busy(cursor)
+            self._idle.notify_all()
+
+    def _mark_busy(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        with self._lock:
+            self._busy.setdefault(threading.get_ident(), []).append(cursor)
+
+    def _unmark_busy(self, cursor: duckdb.DuckDBPyConnection) -> None:
+        """Caller holds self._lock."""
+        ident = threading.get_ident()
+        cursors = self._busy.get(ident, [])
+        if cursor in cursors:
+            cursors.remove(cursor)
+        if not cursors:
+            self._busy.pop(ident, None)
+
+    @contextmanager
+    def _short_lived(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Read-only connection for one call, used while an external job holds the file."""
+        conn = duckdb.connect(self.db_path, read_only=True)
+        self._mark_busy(conn)
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._unmark_busy(conn)
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def version(self) -> int:
+        """Counter bumped on every known change to the database."""
+        return self._version
+
+    def bump_version(self) -> int:
+        """Mark the database as changed (invalidates version-keyed caches)."""
+        with self._lock:
+            self._version += 1
+            return self._version
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Yield a read cursor for the calling thread."""
+        cursor = self._checkout()
+        if cursor is None:
+            # An external job holds the file; connect only for this call
+            with self._short_lived() as conn:
+                yield conn
+            return
+
+        try:
+            yield cursor
+        finally:
+            self._checkin(cursor)
+
+    @contextmanager
+    def dedicated(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Yield a new cursor owned by the caller until the block exits.
+
+        For long-lived reads (streamed responses) that may be resumed on a
+        different thread than the one that started them.
+        """
+        with self._lock:
+            if self._external_writers:
+                cursor = None
+            else:
+                cursor = self._database().cursor()
+                self._in_use += 1
+                self._streams.add(cursor)
+
+        if cursor is None:
+            # An external job holds the file; connect only for this call
+            with self._short_lived() as conn:
+                yield conn
+            return
+
+        # Streams are resumed on arbitrary threads, so they are not marked
+        # busy on one; each step marks itself with busy()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+            with self._lock:
+                self._in_use -= 1
+                self._streams.discard(cursor)
+                self._idle.notify_all()
+
+    @contextmanager
+    def busy(self, cursor: duckdb.DuckDBPyConnection) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Mark a dedicated() cursor as used by the calling thread, so interrupt() reaches it."""
+        self._mark_busy(cursor)
+        try:
+            yield cursor
+        finally:
+            with self._lock:
+                self._unmark_busy(cursor)
+
+    @contextmanager
+    def writer(self, kind: str = "edit", label: str = "") -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Yield the writer cursor inside a transaction.
+
+        Writes wait for the write slot (see write_scheduler) with the given
+        kind's priority; the transaction is committed on exit and rolled
+        back if the block raises.
+        """
+        with write_scheduler.slot(kind, label, timeout=WRITE_QUEUE_TIMEOUT):
+            with self._lock:
+                if self._external_writers:
+                    raise RuntimeError("Database is in use by a running pipeline job, try again when it finishes")
+                if self._writer is None:
+                    self._writer = self._database().cursor()
+                writer = self._writer
+                self._in_use += 1
+                self._busy.setdefault(threading.get_ident(), []).append(writer)
+
+            try:
+                writer.begin()
+                try:
+                    yield writer
+                except BaseException:
+                    writer.rollback()
+                    raise
+                writer.commit()
+                self.bump_version()
+            finally:
+                self._checkin(writer)
+
+    def interrupt(self, thread_ident: int) -> int:
+        """Interrupt the queries running on a thread's cursors; returns how many."""
+        # A write still waiting for the slot gives up instead
+        write_scheduler.abandon_thread(thread_ident)
+        with self._lock:
+            cursors = list(self._busy.get(thread_ident, []))
+        for cursor in cursors:
+            cursor.interrupt()
+        return len(cursors)
+
+    def _release(self, timeout: float = DB_RELEASE_TIMEOUT) -> None:
+        """
+        Close the instance for an external writer, once in-flight cursors
+        are returned. Queries still running after timeout (long exports,
+        streams) are interrupted; raises RuntimeError if they don't stop.
+        """
+        with self._idle:
+            # From here on, new reads use short-lived connections
+            self._external_writers += 1
+            if not self._idle.wait_for(lambda: not self._in_use, timeout=timeout):
+                for cursor in [c for cursors in self._busy.values() for c in cursors] + list(self._streams):
+                    cursor.interrupt()
+                if not self._idle.wait_for(lambda: not self._in_use, timeout=timeout):
+                    self._external_writers -= 1
+                    raise RuntimeError("Database is still in use by running queries, try again later")
+            self._close()
+
+    def _reacquire(self) -> None:
+        with self._lock:
+            self._external_writers -= 1
+            # The job may have changed anything
+            self._version += 1
+
+    @contextmanager
+    def released(self) -> Iterator[None]:
+        """
+        Give up the file lock while an external process (dlt, dbt) writes.
+
+        Callers hold the write slot (write_scheduler.async_slot("job")) so
+        no writer() runs against the closed instance. Blocks until the
+        instance is closed (see _release); it is reopened lazily after the
+        last released() block exits.
+        """
+        self._release()
+        try:
+            yield
+        finally:
+            self._reacquire()
+
+    @asynccontextmanager
+    async def async_released(self) -> AsyncIterator[None]:
+        """released() for the job runners: waits off the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self._release)
+        try:
+            yield
+        finally:
+            self._reacquire()
+
+
+# Singleton instance
+connection_manager = ConnectionManager()
@@ -5,8 +5,9 @@ from typing import Optional
 
 import duckdb
 
-from app.config import DBT_PROJECT_PATH, DATABASE_PATH
+from app.config import DBT_PROJECT_PATH
 from app.models.dag import DagNode, DagEdge, Dag, SelectorResult, ModelPreview
+from app.services.connection_manager import connection_manager
 
 
 class DagService:
@@ -284,8 +285,7 @@ class DagService:
         if node.resource_type in ["model", "seed"]:
             schema = node.schema_name or "main"
             try:
-                conn = duckdb.connect(str(DATABASE_PATH), read_only=True)
-                try:
+                with connection_manager.cursor() as conn:
                     # Get row count
                     count_result = conn.execute(
                         f'SELECT COUNT(*) FROM "{schema}"."{node.name}"'
@@ -311,8 +311,8 @@ class DagService:
                             else:
                                 record[col_names[i]] = val
                         sample_data.append(record)
-                finally:
-                    conn.close()
+            except duckdb.InterruptException:
+                raise
             except Exception:
                 pass
 
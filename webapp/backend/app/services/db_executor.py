@@ -0,0 +1,153 @@
+"""
+Bounded executor for blocking DuckDB work.
+
+API routes are async, so calling DuckDB directly would block the event
+loop (and every WebSocket log stream) for the length of the query.
+run_db() runs a service call on a small thread pool instead, with a
+per-request timeout. When the timeout fires or the client disconnects,
+the query is interrupted through the cursors the worker thread has
+checked out of the connection manager, so the thread is freed promptly.
+stream_db() does the same for a streamed result, one chunk at a time.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
+
+from starlette.requests import Request
+
+from app.config import DB_EXECUTOR_WORKERS, DB_QUERY_TIMEOUT
+from app.services.connection_manager import connection_manager
+
+T = TypeVar("T")
+
+# How often to check whether the client is still connected (seconds)
+DISCONNECT_POLL_INTERVAL = 0.5
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="duckdb")
+
+
+class QueryInterruptedError(Exception):
+    """The query was interrupted before it finished."""
+
+
+class QueryTimeoutError(QueryInterruptedError):
+    """The query ran longer than the request timeout."""
+
+
+class QueryCancelledError(QueryInterruptedError):
+    """The client disconnected while the query was running."""
+
+
+class _Call:
+    """One run_db call: the worker thread it landed on and whether it is done."""
+
+    def __init__(self, func: Callable[..., T], args: tuple, kwargs: dict):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.thread_ident: Optional[int] = None
+        self.done = False
+        self.lock = threading.Lock()
+
+    def __call__(self) -> T:
+        with self.lock:
+            self.thread_ident = threading.get_ident()
+        try:
+            return self.func(*self.args, **self.kwargs)
+        finally:
+            with self.lock:
+                self.done = True
+
+    def interrupt(self) -> None:
+        # Holding the lock keeps the thread from moving on to another call
+        with self.lock:
+            if self.thread_ident is not None and not self.done:
+                connection_manager.interrupt(self.thread_ident)
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_db(
+    func: Callable[..., T],
+    *args: Any,
+    request: Optional[Request] = None,
+    timeout: Optional[float] = DB_QUERY_TIMEOUT,
+    abandoned: Optional[Callable[[T], Any]] = None,
+    **kwargs: Any
+) -> T:
+    """
+    Run a blocking DuckDB call on the executor and await its result.
+
+    Raises QueryTimeoutError after timeout seconds and QueryCancelledError
+    if request's client goes away; the running query is interrupted in
+    both cases. If the call still completes after that, its result is
+    passed to abandoned (e.g. to delete a file it wrote).
+    """
+    call = _Call(func, args, kwargs)
+    submitted = _executor.submit(call)
+    future = asyncio.wrap_future(submitted)
+
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request)) if request is not None else None
+    try:
+        waiting = {future, watcher} if watcher else {future}
+        done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if watcher:
+            watcher.cancel()
+
+    if future in done:
+        return future.result()
+
+    call.interrupt()
+    # Drop the call if it never started (its interrupt error is not awaited)
+    future.cancel()
+
+    def finished(f: Future) -> None:
+        if f.cancelled() or f.exception() is not None:
+            return
+        if abandoned is not None:
+            abandoned(f.result())
+
+    submitted.add_done_callback(finished)
+    if watcher in done:
+        raise QueryCancelledError("Client disconnected, query cancelled")
+    raise QueryTimeoutError(f"Query took longer than {timeout:g}s and was cancelled")
+
+
+async def stream_db(
+    stream: Any,
+    request: Optional[Request] = None,
+    timeout: Optional[float] = DB_QUERY_TIMEOUT
+) -> AsyncIterator[bytes]:
+    """
+    Yield the chunks of an opened stream (duckdb_service.QueryStream).
+
+    Each read() runs through run_db; timeout bounds the whole stream, and
+    the query is interrupted when it runs out or the client disconnects.
+    The stream is closed however iteration ends.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    try:
+        while True:
+            remaining = max(deadline - loop.time(), 0) if deadline is not None else None
+            try:
+                chunk = await run_db(stream.read, request=request, timeout=remaining)
+            except QueryTimeoutError:
+                raise QueryTimeoutError(f"Stream took longer than {timeout:g}s and was cancelled")
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Waits for an interrupted read to give up the stream first
+        await loop.run_in_executor(_executor, stream.close)
+
+
+def shutdown() -> None:
+    """Stop the executor (queued calls are dropped)."""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -4,7 +4,9 @@ from datetime import datetime
 from typing import Optional
 
 from app.config import DBT_PROJECT_PATH, VENV_PYTHON
+from app.services.connection_manager import connection_manager
 from app.services.websocket_manager import ws_manager
+from app.services.write_scheduler import write_scheduler
 from app.models.pipeline import JobStatus
 
 
@@ -51,88 +53,96 @@ class DbtService:
     ):
         """Execute dbt command and stream output."""
         job = self.active_jobs[job_id]
-        job.status = "running"
-
-        await ws_manager.send_status(job_id, "running", job.started_at.isoformat())
-        await ws_manager.send_log(
-            f"Starting dbt {command}",
-            level="info",
-            source="dbt",
-            job_id=job_id
-        )
-
-        # Build command arguments
-        args = [str(VENV_PYTHON), "-m", "dbt", command]
-
-        if select:
-            args.extend(["--select", select])
-
-        if full_refresh and command in ["run", "build"]:
-            args.append("--full-refresh")
-
-        # Add project and profiles dir
-        args.extend([
-            "--project-dir", str(DBT_PROJECT_PATH),
-            "--profiles-dir", str(DBT_PROJECT_PATH)
-        ])
-
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *args,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(DBT_PROJECT_PATH)
+        # The job stays queued until it gets the database write slot
+        if write_scheduler.busy:
+            await ws_manager.send_log(
+                "Waiting for other database writes to finish", level="info", source="dbt", job_id=job_id
             )
-
-            # Stream output
-            async def read_stream(stream, level):
-                while True:
-                    line = await stream.readline()
-                    if not line:
-                        break
-                    text = line.decode().strip()
-                    if text:
-                        # Detect dbt log levels from output
-                        actual_level = level
-                        if "ERROR" in text:
-                            actual_level = "error"
-                        elif "WARN" in text:
-                            actual_level = "warning"
-                        await ws_manager.send_log(text, level=actual_level, source="dbt", job_id=job_id)
-
-            await asyncio.gather(
-                read_stream(process.stdout, "info"),
-                read_stream(process.stderr, "error")
+        async with write_scheduler.async_slot("job", label=f"{job.job_type} {job_id}"):
+            job.status = "running"
+
+            await ws_manager.send_status(job_id, "running", job.started_at.isoformat())
+            await ws_manager.send_log(
+                f"Starting dbt {command}",
+                level="info",
+                source="dbt",
+                job_id=job_id
             )
 
-            await process.wait()
-
-            if process.returncode == 0:
-                job.status = "completed"
-                job.ended_at = datetime.now()
-                await ws_manager.send_complete(
-                    job_id, f"dbt_{command}", True,
-                    {"message": f"dbt {command} completed successfully"}
-                )
-            else:
+            # Build command arguments
+            args = [str(VENV_PYTHON), "-m", "dbt", command]
+
+            if select:
+                args.extend(["--select", select])
+
+            if full_refresh and command in ["run", "build"]:
+                args.append("--full-refresh")
+
+            # Add project and profiles dir
+            args.extend([
+                "--project-dir", str(DBT_PROJECT_PATH),
+                "--profiles-dir", str(DBT_PROJECT_PATH)
+            ])
+
+            # dbt needs the DuckDB file lock while it runs
+            try:
+                async with connection_manager.async_released():
+                    process = await asyncio.create_subprocess_exec(
+                        *args,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE,
+                        cwd=str(DBT_PROJECT_PATH)
+                    )
+
+                    # Stream output
+                    async def read_stream(stream, level):
+                        while True:
+                            line = await stream.readline()
+                            if not line:
+                                break
+                            text = line.decode().strip()
+                            if text:
+                                # Detect dbt log levels from output
+                                actual_level = level
+                                if "ERROR" in text:
+                                    actual_level = "error"
+                                elif "WARN" in text:
+                                    actual_level = "warning"
+                                await ws_manager.send_log(text, level=actual_level, source="dbt", job_id=job_id)
+
+                    await asyncio.gather(
+                        read_stream(process.stdout, "info"),
+                        read_stream(process.stderr, "error")
+                    )
+
+                    await process.wait()
+
+                    if process.returncode == 0:
+                        job.status = "completed"
+                        job.ended_at = datetime.now()
+                        await ws_manager.send_complete(
+                            job_id, f"dbt_{command}", True,
+                            {"message": f"dbt {command} completed successfully"}
+                        )
+                    else:
+                        job.status = "failed"
+                        job.ended_at = datetime.now()
+                        job.message = f"dbt {command} failed with exit code {process.returncode}"
+                        await ws_manager.send_complete(
+                            job_id, f"dbt_{command}", False,
+                            {"message": job.message}
+                        )
+
+            except Exception as e:
                 job.status = "failed"
                 job.ended_at = datetime.now()
-                job.message = f"dbt {command} failed with exit code {process.returncode}"
+                job.message = str(e)
+                await ws_manager.send_log(f"Error: {e}", level="error", source="dbt", job_id=job_id)
                 await ws_manager.send_complete(
                     job_id, f"dbt_{command}", False,
-                    {"message": job.message}
+                    {"message": str(e)}
                 )
 
-        except Exception as e:
-            job.status = "failed"
-            job.ended_at = datetime.now()
-            job.message = str(e)
-            await ws_manager.send_log(f"Error: {e}", level="error", source="dbt", job_id=job_id)
-            await ws_manager.send_complete(
-                job_id, f"dbt_{command}", False,
-                {"message": str(e)}
-            )
-
     def get_job_status(self, job_id: str) -> Optional[JobStatus]:
         """Get the status of a job."""
         return self.active_jobs.get(job_id)
@@ -8,10 +8,11 @@ import uuid
 
 import duckdb
 
-from app.config import DATA_DIR, DATABASE_PATH
+from app.config import DATA_DIR
 from app.models.diff import (
     Snapshot, TableSnapshot, DiffResult, TableDiff, ColumnDiff, RowDiff
 )
+from app.services.connection_manager import connection_manager
 
 
 class DiffService:
@@ -33,9 +34,7 @@ class DiffService:
         timestamp = datetime.now().isoformat()
 
         tables = {}
-        conn = duckdb.connect(str(DATABASE_PATH), read_only=True)
-
-        try:
+        with connection_manager.cursor() as conn:
             # Get all schemas
             schemas = conn.execute(
                 "SELECT DISTINCT table_schema FROM information_schema.tables "
@@ -93,12 +92,11 @@ class DiffService:
                             checksum=checksum,
                             sample_data=sample_data[:10]  # Keep only 10 for storage
                         )
+                    except duckdb.InterruptException:
+                        raise  # Timed out or cancelled - stop the whole snapshot
                     except Exception:
                         pass  # Skip tables we can't read
 
-        finally:
-            conn.close()
-
         snapshot = Snapshot(
             id=snapshot_id,
             timestamp=timestamp,
@@ -1,11 +1,13 @@
 import asyncio
-import subprocess
 import uuid
 from datetime import datetime
 from typing import Optional
 
-from app.config import DLT_PIPELINE_PATH, DLT_PIPELINE_SCRIPT, VENV_PYTHON, DUCKDB_PATH
+from app.config import DLT_PIPELINE_PATH, DUCKDB_PATH, PIPELINE_WORKERS
+from app.services.connection_manager import connection_manager
+from app.services.pipeline_worker_pool import PipelineWorkerPool
 from app.services.websocket_manager import ws_manager
+from app.services.write_scheduler import write_scheduler
 from app.models.pipeline import JobStatus
 
 
@@ -14,7 +16,9 @@ class DltService:
 
     def __init__(self):
         self.active_jobs: dict[str, JobStatus] = {}
-        self.processes: dict[str, subprocess.Popen] = {}
+        self.worker_pool = PipelineWorkerPool(
+            str(DLT_PIPELINE_PATH), DUCKDB_PATH, max_workers=PIPELINE_WORKERS
+        )
 
     async def run_pipeline(
         self,
@@ -22,7 +26,9 @@ class DltService:
         month: int = 1,
         taxi_type: str = "yellow",
         write_disposition: str = "replace",
-        row_limit: Optional[int] = 10000
+        row_limit: Optional[int] = 10000,
+        sampling: str = "head",
+        loader_file_format: str = "parquet"
     ) -> JobStatus:
         """Run the dlt pipeline with specified parameters."""
         job_id = str(uuid.uuid4())[:8]
@@ -42,7 +48,7 @@ class DltService:
 
         # Start the pipeline in background
         asyncio.create_task(self._execute_pipeline(
-            job_id, year, month, taxi_type, write_disposition, row_limit
+            job_id, year, month, taxi_type, write_disposition, row_limit, sampling, loader_file_format
         ))
 
         return job
@@ -54,108 +60,69 @@ class DltService:
         month: int,
         taxi_type: str,
         write_disposition: str,
-        row_limit: Optional[int]
+        row_limit: Optional[int],
+        sampling: str,
+        loader_file_format: str
     ):
-        """Execute the pipeline subprocess and stream output."""
+        """Execute the pipeline on a warm worker and stream output."""
         job = self.active_jobs[job_id]
-        job.status = "running"
-
-        await ws_manager.send_status(job_id, "running", job.started_at.isoformat())
-        await ws_manager.send_log(
-            f"Starting dlt pipeline: {taxi_type} taxi, {year}-{month:02d}, mode={write_disposition}",
-            level="info",
-            source="dlt",
-            job_id=job_id
-        )
+        # The job stays queued until it gets the database write slot
+        if write_scheduler.busy:
+            await ws_manager.send_log(
+                "Waiting for other database writes to finish", level="info", source="dlt", job_id=job_id
+            )
+        async with write_scheduler.async_slot("job", label=f"dlt_load {job_id}"):
+            job.status = "running"
+
+            await ws_manager.send_status(job_id, "running", job.started_at.isoformat())
+            await ws_manager.send_log(
+                f"Starting dlt pipeline: {taxi_type} taxi, {year}-{month:02d}, "
+                f"mode={write_disposition}, format={loader_file_format}, "
+                f"rows={'all' if row_limit is None else f'{row_limit:,} ({sampling})'}",
+                level="info",
+                source="dlt",
+                job_id=job_id
+            )
 
-        # Build the Python script to run
-        script = f"""
-import sys
-sys.path.insert(0, r'{DLT_PIPELINE_PATH}')
-from nyc_taxi_pipeline import nyc_taxi_source
-import dlt
-
-# Configure the pipeline
-pipeline = dlt.pipeline(
-    pipeline_name="nyc_taxi_pipeline",
-    destination="duckdb",
-    dataset_name="nyc_taxi_raw",
-)
-
-# Create the source
-source = nyc_taxi_source(
-    year={year},
-    month={month},
-    taxi_type="{taxi_type}",
-    write_disposition="{write_disposition}"
-)
-
-# Run the pipeline
-print("Starting data load...")
-info = pipeline.run(source)
-print(f"Load completed!")
-print(f"Rows loaded: {{info.loads_ids}}")
-print(info)
-"""
-
-        try:
-            # Run the script
-            env = {
-                "DUCKDB_PATH": DUCKDB_PATH,
-                "PYTHONUNBUFFERED": "1"
+            params = {
+                "year": year,
+                "month": month,
+                "taxi_type": taxi_type,
+                "write_disposition": write_disposition,
+                "row_limit": row_limit,
+                "sampling": sampling,
+                "loader_file_format": loader_file_format,
             }
 
-            process = await asyncio.create_subprocess_exec(
-                str(VENV_PYTHON), "-c", script,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(DLT_PIPELINE_PATH),
-                env={**dict(__import__('os').environ), **env}
-            )
-
-            # Stream stdout
-            async def read_stream(stream, level):
-                while True:
-                    line = await stream.readline()
-                    if not line:
-                        break
-                    text = line.decode().strip()
-                    if text:
-                        await ws_manager.send_log(text, level=level, source="dlt", job_id=job_id)
-
-            await asyncio.gather(
-                read_stream(process.stdout, "info"),
-                read_stream(process.stderr, "error")
-            )
+            try:
+                # Run on a warm worker; its output is streamed over ws_manager.
+                # The worker needs the DuckDB file lock while it loads.
+                async with connection_manager.async_released():
+                    result = await self.worker_pool.run(job_id, params)
 
-            await process.wait()
+                if job.status == "cancelled":
+                    return
 
-            if process.returncode == 0:
                 job.status = "completed"
                 job.ended_at = datetime.now()
+                job.result = result
                 await ws_manager.send_complete(
                     job_id, "dlt_load", True,
-                    {"message": "Pipeline completed successfully"}
+                    {"message": "Pipeline completed successfully", **result}
                 )
-            else:
+
+            except Exception as e:
+                if job.status == "cancelled":
+                    return
                 job.status = "failed"
                 job.ended_at = datetime.now()
-                job.message = f"Pipeline failed with exit code {process.returncode}"
+                job.message = str(e)
+                await ws_manager.send_log(f"Error: {e}", level="error", source="dlt", job_id=job_id)
                 await ws_manager.send_complete(
                     job_id, "dlt_load", False,
-                    {"message": job.message}
+                    {"message": str(e)}
                 )
 
-        except Exception as e:
-            job.status = "failed"
-            job.ended_at = datetime.now()
-            job.message = str(e)
-            await ws_manager.send_log(f"Error: {e}", level="error", source="dlt", job_id=job_id)
-            await ws_manager.send_complete(
-                job_id, "dlt_load", False,
-                {"message": str(e)}
-            )
-
     def get_job_status(self, job_id: str) -> Optional[JobStatus]:
         """Get the status of a job."""
         return self.active_jobs.get(job_id)
@@ -166,8 +133,7 @@ print(info)
 
     def cancel_job(self, job_id: str) -> bool:
         """Cancel a running job."""
-        if job_id in self.processes:
-            self.processes[job_id].terminate()
+        if self.worker_pool.cancel(job_id):
             if job_id in self.active_jobs:
                 self.active_jobs[job_id].status = "cancelled"
                 self.active_jobs[job_id].ended_at = datetime.now()
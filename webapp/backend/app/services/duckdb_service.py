@@ -1,84 +1,428 @@
+import base64
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Iterator, Optional
+
 import duckdb
-from typing import Any, Optional
-from contextlib import contextmanager
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.models.data import BulkRowResult, BulkUpdate, BulkWriteResult, ColumnInfo, QueryResult, TableInfo
+from app.services.connection_manager import ConnectionManager, connection_manager
+from app.services.query_cache import CachedResult, QueryCache, query_cache
+
+# Response formats of stream_query / stream_table
+STREAM_FORMATS = ("arrow", "ndjson")
+
+# Rows per record batch fetched from DuckDB while streaming
+STREAM_BATCH_ROWS = 50_000
+
+# Export formats and the compression codecs COPY ... TO accepts for each (first is the default)
+EXPORT_COMPRESSION = {
+    "parquet": ("zstd", "snappy", "gzip", "uncompressed"),
+    "csv": ("gzip", "zstd", "none"),
+}
+
+# File suffix added for a compressed CSV
+CSV_COMPRESSION_SUFFIX = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+# Table functions a user query may call; the others read files or URLs
+# (read_csv, read_text, glob, ...) or run SQL text (query, query_table)
+ALLOWED_TABLE_FUNCTIONS = {"range", "generate_series", "unnest"}
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    """Take everything written to sink so far and reset it."""
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def to_rows(table: pa.Table) -> list[dict[str, Any]]:
+    """
+    Rows of an Arrow result as dicts, with Python values as DuckDB returns them.
+
+    DuckDB hands SUM() and HUGEINT results to Arrow as decimal128(38, 0),
+    which to_pylist() would turn into Decimal (serialized as a string);
+    whole-number decimals become int instead.
+    """
+    whole = [
+        i for i, field in enumerate(table.schema)
+        if pa.types.is_decimal(field.type) and field.type.scale == 0
+    ]
+    for i in whole:
+        try:
+            table = table.set_column(i, table.field(i).name, pc.cast(table.column(i), pa.int64()))
+        except pa.ArrowInvalid:
+            # Beyond int64: leave it to Python ints below
+            pass
+    rows = table.to_pylist()
+    for i in whole:
+        if pa.types.is_decimal(table.field(i).type):
+            name = table.field(i).name
+            for row in rows:
+                if row[name] is not None:
+                    row[name] = int(row[name])
+    return rows
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _walk(node: Any) -> Iterator[dict]:
+    """Every dict in a json_serialize_sql tree."""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
 
-from app.config import DUCKDB_PATH
-from app.models.data import ColumnInfo, TableInfo, QueryResult
+def _to_sql_text(value: Any) -> Optional[str]:
+    """Render a JSON value as text that DuckDB can CAST to the column type."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+class _BulkAbort(Exception):
+    """Raised inside a bulk write transaction to roll it back."""
+
+
+class QueryStream:
+    """
+    A query result streamed as Arrow IPC or NDJSON chunks.
+
+    Nothing runs until open(), which builds and executes the query; each
+    read() then fetches and encodes one record batch. Both are short
+    blocking calls meant for run_db: the dedicated cursor is marked busy on
+    the calling thread meanwhile, so a timeout or disconnect interrupts
+    it. close() returns the cursor.
+    """
+
+    def __init__(self, connections: ConnectionManager, prepare: Callable[[], tuple[str, list]], format: str):
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"format must be one of {STREAM_FORMATS}")
+        self.connections = connections
+        self.format = format
+        self._prepare = prepare
+        # Reads may run on any executor thread, but never two at once
+        self._lock = threading.Lock()
+        self._stack = ExitStack()
+        self._conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._reader: Optional[pa.RecordBatchReader] = None
+        self._sink = io.BytesIO()
+        self._writer: Optional[pa.ipc.RecordBatchStreamWriter] = None
+        self._done = False
+
+    def open(self) -> None:
+        with self._lock:
+            query, params = self._prepare()
+            if self.format == "ndjson":
+                # DuckDB renders each row, so no Python objects are built per row
+                query = f"SELECT to_json(q)::VARCHAR AS line FROM ({query}) q"
+            self._conn = self._stack.enter_context(self.connections.dedicated())
+            with self.connections.busy(self._conn):
+                self._reader = self._conn.execute(query, params).fetch_record_batch(STREAM_BATCH_ROWS)
+            if self.format == "arrow":
+                self._writer = pa.ipc.new_stream(self._sink, self._reader.schema)
+
+    def read(self) -> Optional[bytes]:
+        """The next chunk, or None once the result is exhausted."""
+        with self._lock:
+            while not self._done:
+                with self.connections.busy(self._conn):
+                    try:
+                        batch = self._reader.read_next_batch()
+                    except StopIteration:
+                        batch = None
+
+                if batch is None:
+                    self._done = True
+                    if self._writer is None:
+                        return None
+                    # End-of-stream marker written on close
+                    self._writer.close()
+                    return _drain(self._sink)
+
+                if self.format == "ndjson":
+                    lines = batch.column(0).to_pylist()
+                    if lines:
+                        return ("\n".join(lines) + "\n").encode()
+                    continue
+
+                self._writer.write_batch(batch)
+                return _drain(self._sink)
+            return None
+
+    def close(self) -> None:
+        with self._lock:
+            self._done = True
+            self._stack.close()
 
 
 class DuckDBService:
-    def __init__(self, db_path: str = DUCKDB_PATH):
-        self.db_path = db_path
+    def __init__(self, connections: ConnectionManager = connection_manager, cache: QueryCache = query_cache):
+        self.connections = connections
+        self.cache = cache
+
+        self._catalog: Optional[dict] = None
+        self._catalog_version: Optional[int] = None
+        self._catalog_lock = threading.Lock()
+        self._count_cache: dict[tuple, tuple[int, int]] = {}
 
     @contextmanager
     def get_connection(self, read_only: bool = True):
-        """Context manager for database connections."""
-        conn = duckdb.connect(self.db_path, read_only=read_only)
-        try:
+        """Context manager for a pooled cursor (the writer cursor if not read_only)."""
+        with (self.connections.cursor() if read_only else self.connections.writer()) as conn:
             yield conn
-        finally:
-            conn.close()
 
-    def list_schemas(self) -> list[str]:
-        """List all schemas in the database."""
+    # ------------------------------------------------------------------
+    # Catalog cache
+    # ------------------------------------------------------------------
+
+    def _load_catalog(self) -> dict:
+        """Read schemas, tables, views and columns in one pass over DuckDB's catalog."""
         with self.get_connection() as conn:
-            result = conn.execute("""
-                SELECT DISTINCT schema_name
-                FROM information_schema.schemata
-                WHERE schema_name NOT IN ('information_schema', 'pg_catalog')
+            schemas = conn.execute("""
+                SELECT schema_name
+                FROM duckdb_schemas()
+                WHERE database_name = current_database()
+                  AND schema_name NOT IN ('information_schema', 'pg_catalog')
                 ORDER BY schema_name
             """).fetchall()
-            return [row[0] for row in result]
+            relations = conn.execute("""
+                SELECT schema_name, table_name, estimated_size, 'BASE TABLE' AS table_type
+                FROM duckdb_tables()
+                WHERE database_name = current_database() AND NOT temporary
+                UNION ALL
+                SELECT schema_name, view_name, NULL, 'VIEW'
+                FROM duckdb_views()
+                WHERE database_name = current_database() AND NOT internal AND NOT temporary
+                ORDER BY 1, 2
+            """).fetchall()
+            columns = conn.execute("""
+                SELECT schema_name, table_name, column_name, data_type, is_nullable
+                FROM duckdb_columns()
+                WHERE database_name = current_database() AND NOT internal
+                ORDER BY schema_name, table_name, column_index
+            """).fetchall()
 
-    def list_tables(self, schema: str) -> list[TableInfo]:
-        """List all tables in a schema."""
-        with self.get_connection() as conn:
-            result = conn.execute("""
-                SELECT table_name,
-                       (SELECT COUNT(*) FROM information_schema.columns c
-                        WHERE c.table_schema = t.table_schema AND c.table_name = t.table_name) as col_count,
-                       table_type
-                FROM information_schema.tables t
-                WHERE table_schema = ?
-                ORDER BY table_name
-            """, [schema]).fetchall()
-
-            tables = []
-            for row in result:
-                # Get row count (can be slow for large tables)
-                try:
-                    count_result = conn.execute(f'SELECT COUNT(*) FROM "{schema}"."{row[0]}"').fetchone()
-                    row_count = count_result[0] if count_result else None
-                except:
-                    row_count = None
-
-                tables.append(TableInfo(
-                    name=row[0],
-                    schema_name=schema,
-                    column_count=row[1],
-                    row_count=row_count,
-                    table_type=row[2]
-                ))
-            return tables
+        catalog_columns: dict[tuple[str, str], list[ColumnInfo]] = {}
+        for schema, table, name, data_type, nullable in columns:
+            catalog_columns.setdefault((schema, table), []).append(
+                ColumnInfo(name=name, type=data_type, nullable=nullable)
+            )
+
+        tables: dict[str, dict[str, TableInfo]] = {schema: {} for (schema,) in schemas}
+        for schema, table, estimated_size, table_type in relations:
+            tables.setdefault(schema, {})[table] = TableInfo(
+                name=table,
+                schema_name=schema,
+                column_count=len(catalog_columns.get((schema, table), [])),
+                row_count=estimated_size,
+                table_type=table_type
+            )
+
+        return {"schemas": sorted(tables), "tables": tables, "columns": catalog_columns}
+
+    def _get_catalog(self) -> dict:
+        """Cached catalog, rebuilt when the database version changes."""
+        version = self.connections.version
+        if self._catalog is None or self._catalog_version != version:
+            catalog = self._load_catalog()
+            with self._catalog_lock:
+                self._catalog, self._catalog_version = catalog, version
+        return self._catalog
+
+    def invalidate_catalog(self) -> None:
+        """Force the catalog to be re-read (e.g. after an outside change)."""
+        self.connections.bump_version()
+
+    # ------------------------------------------------------------------
+    # Catalog queries
+    # ------------------------------------------------------------------
+
+    def list_schemas(self) -> list[str]:
+        """List all schemas in the database."""
+        return list(self._get_catalog()["schemas"])
+
+    def list_tables(self, schema: str, exact_counts: bool = False) -> list[TableInfo]:
+        """
+        List all tables in a schema.
+
+        Row counts are DuckDB's estimates (free to read); exact_counts runs
+        COUNT(*) on tables not counted yet and caches the result until the
+        database changes.
+        """
+        tables = list(self._get_catalog()["tables"].get(schema, {}).values())
+        if exact_counts:
+            with self.get_connection() as conn:
+                for table in tables:
+                    if table.row_count_exact:
+                        continue
+                    try:
+                        table.row_count = conn.execute(
+                            f"SELECT COUNT(*) FROM {_quote(schema)}.{_quote(table.name)}"
+                        ).fetchone()[0]
+                        table.row_count_exact = True
+                    except duckdb.InterruptException:
+                        raise
+                    except Exception:
+                        table.row_count = None
+        return [table.model_copy() for table in tables]
 
     def get_table_schema(self, schema: str, table: str) -> list[ColumnInfo]:
         """Get column information for a table."""
-        with self.get_connection() as conn:
-            result = conn.execute("""
-                SELECT column_name, data_type, is_nullable
-                FROM information_schema.columns
-                WHERE table_schema = ? AND table_name = ?
-                ORDER BY ordinal_position
-            """, [schema, table]).fetchall()
-
-            return [
-                ColumnInfo(
-                    name=row[0],
-                    type=row[1],
-                    nullable=row[2] == 'YES'
+        return list(self._get_catalog()["columns"].get((schema, table), []))
+
+    def check_table(self, schema: str, table: str, columns=()) -> tuple[TableInfo, dict[str, str]]:
+        """
+        Catalog entry and column types of a table or view.
+
+        Raises ValueError unless the table and every name in columns are in
+        the catalog, so they can be quoted into SQL.
+        """
+        catalog = self._get_catalog()
+        entry = catalog["tables"].get(schema, {}).get(table)
+        if entry is None:
+            raise ValueError(f"Table {schema}.{table} not found")
+        column_types = {c.name: c.type for c in catalog["columns"].get((schema, table), [])}
+        unknown = [name for name in columns if name not in column_types]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        return entry, column_types
+
+    # ------------------------------------------------------------------
+    # Table queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode_cursor(state: dict) -> str:
+        """Opaque page token for the row after state["key"]."""
+        return base64.urlsafe_b64encode(json.dumps(state, default=str).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> dict:
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+
+    def _count_rows(self, conn, schema: str, table: str, where: str, params: list) -> int:
+        """COUNT(*) of a table (plus filters), cached per database version."""
+        version = self.connections.version
+        key = (schema, table, where, json.dumps(params, default=str))
+        cached = self._count_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        total_count = conn.execute(
+            f"SELECT COUNT(*) FROM {_quote(schema)}.{_quote(table)}{where}", params
+        ).fetchone()[0]
+        with self._catalog_lock:
+            # Counts for older versions are useless now
+            self._count_cache = {k: v for k, v in self._count_cache.items() if v[0] == version}
+            self._count_cache[key] = (version, total_count)
+        return total_count
+
+    def _table_query(
+        self,
+        schema: str,
+        table: str,
+        limit: int,
+        offset: int,
+        order_by: Optional[str],
+        order_dir: str,
+        filters: Optional[dict[str, Any]],
+        cursor: Optional[str],
+        with_rowid: bool = True,
+        peek: bool = False
+    ) -> tuple[str, list, dict]:
+        """
+        Build the SELECT for one page of a table.
+
+        Returns (query, params, info) where info holds whether keyset paging
+        applies, the page number and the filter clause/params for counting.
+        peek fetches one row past the page, to tell whether there is a next one.
+        """
+        catalog_entry, column_types = self.check_table(
+            schema, table, list(filters or {}) + ([order_by] if order_by else [])
+        )
+        keyset = catalog_entry.table_type == "BASE TABLE"
+        direction = order_dir.upper()
+        if direction not in ("ASC", "DESC"):
+            raise ValueError("order_dir must be asc or desc")
+        comparison = "<" if direction == "DESC" else ">"
+
+        params = []
+        where_clauses = []
+
+        # Add filters if provided
+        if filters:
+            for col, val in filters.items():
+                where_clauses.append(f"{_quote(col)} = ?")
+                params.append(val)
+        info = {
+            "keyset": keyset,
+            "direction": direction,
+            "page": offset // limit + 1,
+            "filter_where": " WHERE " + " AND ".join(where_clauses) if where_clauses else "",
+            "filter_params": list(params),
+        }
+
+        if cursor:
+            state = self._decode_cursor(cursor)
+            if not keyset or state.get("order_by") != order_by or state.get("order_dir") != direction:
+                raise ValueError("Cursor does not match this query")
+            info["page"] = state["page"]
+            last_value, last_rowid = state["key"]
+            if order_by is None:
+                where_clauses.append(f"rowid {comparison} ?")
+                params.append(last_rowid)
+            elif last_value is None:
+                # NULLs sort last; only rows further down the NULL run remain
+                where_clauses.append(f"({_quote(order_by)} IS NULL AND rowid {comparison} ?)")
+                params.append(last_rowid)
+            else:
+                # order_by was checked against the catalog above, so its type is known
+                column, column_type = _quote(order_by), column_types[order_by]
+                where_clauses.append(
+                    f"({column} {comparison} CAST(? AS {column_type}) "
+                    f"OR ({column} = CAST(? AS {column_type}) AND rowid {comparison} ?) "
+                    f"OR {column} IS NULL)"
                 )
-                for row in result
-            ]
+                params.extend([last_value, last_value, last_rowid])
+
+        select = "*, rowid AS __rowid" if keyset and with_rowid else "*"
+        query = f"SELECT {select} FROM {_quote(schema)}.{_quote(table)}"
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+
+        # Add ordering (rowid breaks ties so keyset pages never skip rows)
+        order_terms = [f"{_quote(order_by)} {direction} NULLS LAST"] if order_by else []
+        if keyset:
+            order_terms.append(f"rowid {direction}")
+        if order_terms:
+            query += " ORDER BY " + ", ".join(order_terms)
+
+        query += f" LIMIT {limit + 1 if peek else limit}"
+        if not cursor:
+            query += f" OFFSET {offset}"
+
+        return query, params, info
 
     def query_table(
         self,
@@ -88,45 +432,194 @@ class DuckDBService:
         offset: int = 0,
         order_by: Optional[str] = None,
         order_dir: str = "asc",
-        filters: Optional[dict[str, Any]] = None
+        filters: Optional[dict[str, Any]] = None,
+        cursor: Optional[str] = None
     ) -> QueryResult:
-        """Query table data with pagination."""
-        with self.get_connection() as conn:
-            # Get total count
-            count_query = f'SELECT COUNT(*) FROM "{schema}"."{table}"'
-            total_count = conn.execute(count_query).fetchone()[0]
-
-            # Build main query
-            query = f'SELECT * FROM "{schema}"."{table}"'
-            params = []
-
-            # Add filters if provided
-            if filters:
-                where_clauses = []
-                for col, val in filters.items():
-                    where_clauses.append(f'"{col}" = ?')
-                    params.append(val)
-                if where_clauses:
-                    query += " WHERE " + " AND ".join(where_clauses)
-
-            # Add ordering
-            if order_by:
-                query += f' ORDER BY "{order_by}" {order_dir.upper()}'
-
-            # Add pagination
-            query += f" LIMIT {limit} OFFSET {offset}"
-
-            result = conn.execute(query, params)
-            columns = [ColumnInfo(name=desc[0], type=str(desc[1])) for desc in result.description]
-            data = [dict(zip([c.name for c in columns], row)) for row in result.fetchall()]
-
-            return QueryResult(
-                data=data,
-                columns=columns,
-                total_count=total_count,
-                page=offset // limit + 1,
-                page_size=limit
+        """
+        Query table data with pagination.
+
+        Base tables are paged by keyset on (order_by, rowid): each result
+        carries a next_cursor token, and passing it back seeks straight to
+        the next page instead of scanning past offset rows. Views have no
+        rowid and fall back to LIMIT/OFFSET. The total count is cached per
+        database version, and the page itself in the query result cache.
+        """
+        query, params, info = self._table_query(
+            schema, table, limit, offset, order_by, order_dir, filters, cursor, peek=True
+        )
+
+        cached = self.cache.get(query, params)
+        if cached is None:
+            version = self.connections.version
+            with self.get_connection() as conn:
+                total_count = self._count_rows(conn, schema, table, info["filter_where"], info["filter_params"])
+                result = conn.execute(query, params)
+                types = [str(desc[1]) for desc in result.description]
+                cached = self.cache.put(
+                    query, params, version,
+                    CachedResult(result.fetch_record_batch().read_all(), types, total_count)
+                )
+
+        page = cached.table.slice(0, limit)
+        columns = [ColumnInfo(name=name, type=t) for name, t in zip(page.column_names, cached.types)]
+        data = to_rows(page)
+
+        next_cursor = None
+        if info["keyset"]:
+            columns = columns[:-1]
+            if cached.table.num_rows > limit:
+                last = data[-1]
+                next_cursor = self._encode_cursor({
+                    "order_by": order_by,
+                    "order_dir": info["direction"],
+                    "page": info["page"] + 1,
+                    "key": [last[order_by] if order_by else None, last["__rowid"]],
+                })
+            for row in data:
+                del row["__rowid"]
+
+        return QueryResult(
+            data=data,
+            columns=columns,
+            total_count=cached.total_count,
+            page=info["page"],
+            page_size=limit,
+            next_cursor=next_cursor
+        )
+
+    def stream_table(
+        self,
+        schema: str,
+        table: str,
+        format: str,
+        limit: int = 100,
+        offset: int = 0,
+        order_by: Optional[str] = None,
+        order_dir: str = "asc",
+        filters: Optional[dict[str, Any]] = None,
+        cursor: Optional[str] = None
+    ) -> QueryStream:
+        """Same rows as query_table, streamed as Arrow IPC or NDJSON (see stream_query)."""
+
+        def prepare() -> tuple[str, list]:
+            query, params, _ = self._table_query(
+                schema, table, limit, offset, order_by, order_dir, filters, cursor, with_rowid=False
             )
+            return query, params
+
+        return QueryStream(self.connections, prepare, format)
+
+    def _checked_select(self, conn: duckdb.DuckDBPyConnection, query: str) -> str:
+        """
+        The SQL of query if it is a single SELECT over catalog tables,
+        without a terminating semicolon.
+
+        Anything else is rejected with ValueError before it runs: other
+        statements, and reads from outside the database (file-reading table
+        functions, or a path in FROM, which DuckDB would scan as a file).
+        """
+        statements = conn.extract_statements(query)
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only a single SELECT statement can be run")
+        tree = json.loads(conn.execute("SELECT json_serialize_sql(?)", [statements[0].query]).fetchone()[0])
+        if tree.get("error"):
+            raise ValueError(tree.get("error_message") or "Query can't be checked")
+
+        nodes = list(_walk(tree))
+        ctes = {entry["key"].lower() for node in nodes if "cte_map" in node for entry in node["cte_map"]["map"]}
+        tables = {
+            (schema.lower(), table.lower())
+            for schema, schema_tables in self._get_catalog()["tables"].items()
+            for table in schema_tables
+        }
+        for node in nodes:
+            if node.get("type") == "TABLE_FUNCTION":
+                name = node["function"]["function_name"]
+                if name.lower() not in ALLOWED_TABLE_FUNCTIONS:
+                    raise ValueError(f"Table function {name} is not allowed")
+            elif node.get("type") == "BASE_TABLE":
+                schema, table = node["schema_name"].lower(), node["table_name"].lower()
+                if not schema and table in ctes:
+                    continue
+                if node["catalog_name"] or (schema or "main", table) not in tables:
+                    raise ValueError(f"Unknown table {node['table_name']}: only tables in the database can be read")
+
+        # Drop the terminating semicolon (and anything after it), so the SELECT can be wrapped
+        select = statements[0].query
+        position, _ = duckdb.tokenize(select)[-1]
+        return select[:position] if select[position] == ";" else select
+
+    def stream_query(self, query: str, format: str, params: Optional[list] = None) -> QueryStream:
+        """
+        Stream a query's result without building Python rows.
+
+        format "arrow" gives an Arrow IPC stream written batch by batch from
+        fetch_record_batch; "ndjson" lets DuckDB render each row with
+        to_json and gives newline-delimited chunks. Drive the stream with
+        db_executor.stream_db.
+        """
+        return QueryStream(self.connections, lambda: (query, params or []), format)
+
+    @staticmethod
+    def export_file_name(name: str, format: str, compression: Optional[str] = None) -> str:
+        """Download file name for an export of name."""
+        if format == "csv":
+            return f"{name}.csv{CSV_COMPRESSION_SUFFIX[compression or EXPORT_COMPRESSION['csv'][0]]}"
+        return f"{name}.{format}"
+
+    def export_query(
+        self,
+        query: str,
+        format: str = "parquet",
+        compression: Optional[str] = None,
+        params: Optional[list] = None
+    ) -> str:
+        """
+        Write a query's result to a temporary file with COPY ... TO.
+
+        DuckDB writes the file itself, so no Python objects are built per
+        row. Returns the file path; the caller deletes it once it has been
+        sent. query must be a single SELECT over tables in the database
+        (see _checked_select), so server files can't be exported.
+        """
+        if format not in EXPORT_COMPRESSION:
+            raise ValueError(f"format must be one of {tuple(EXPORT_COMPRESSION)}")
+        compression = compression or EXPORT_COMPRESSION[format][0]
+        if compression not in EXPORT_COMPRESSION[format]:
+            raise ValueError(f"compression for {format} must be one of {EXPORT_COMPRESSION[format]}")
+
+        fd, path = tempfile.mkstemp(prefix="export_", suffix=f".{format}")
+        os.close(fd)
+        options = "FORMAT PARQUET" if format == "parquet" else "FORMAT CSV, HEADER"
+        try:
+            with self.get_connection() as conn:
+                select = self._checked_select(conn, query)
+                target = path.replace("'", "''")
+                conn.execute(
+                    # The newline ends a trailing -- comment before the closing parenthesis
+                    f"COPY ({select}\n) TO '{target}' ({options}, COMPRESSION {compression})",
+                    params or []
+                )
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def export_table(
+        self,
+        schema: str,
+        table: str,
+        format: str = "parquet",
+        compression: Optional[str] = None,
+        order_by: Optional[str] = None,
+        order_dir: str = "asc"
+    ) -> str:
+        """Write a whole table to a temporary file (see export_query)."""
+        self.check_table(schema, table, [order_by] if order_by else [])
+        query = f"SELECT * FROM {_quote(schema)}.{_quote(table)}"
+        if order_by:
+            query += f" ORDER BY {_quote(order_by)} {'DESC' if order_dir.lower() == 'desc' else 'ASC'}"
+        return self.export_query(query, format, compression)
 
     def update_record(
         self,
@@ -160,12 +653,257 @@ class DuckDBService:
             conn.execute(query, [pk_value])
             return True
 
+    # ------------------------------------------------------------------
+    # Bulk writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _register_rows(conn, name: str, indexes: list[int], columns: dict[str, list]) -> None:
+        """Register rows as an Arrow relation of text values (cast to column types in SQL)."""
+        arrays = {"__idx": pa.array(indexes, pa.int64())}
+        for column, values in columns.items():
+            arrays[column] = pa.array([_to_sql_text(v) for v in values], pa.string())
+        conn.register(name, pa.table(arrays))
+
+    @staticmethod
+    def _unconvertible(conn, relation: str, column: str, column_type: str) -> list[int]:
+        """Indexes of rows whose value in column can't be cast to column_type."""
+        rows = conn.execute(
+            f'SELECT __idx FROM {relation} WHERE "{column}" IS NOT NULL '
+            f'AND TRY_CAST("{column}" AS {column_type}) IS NULL'
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def bulk_write(
+        self,
+        schema: str,
+        table: str,
+        pk_column: str,
+        inserts: Optional[list[dict[str, Any]]] = None,
+        updates: Optional[list[BulkUpdate]] = None,
+        deletes: Optional[list[Any]] = None,
+        atomic: bool = True
+    ) -> BulkWriteResult:
+        """
+        Apply a batch of inserts, updates and deletes in one transaction.
+
+        Rows are registered as Arrow relations and applied set-based
+        (INSERT ... SELECT, UPDATE ... FROM, DELETE ... USING), in that
+        order. Every row gets a result; a row fails if it names an unknown
+        column, has a value that doesn't convert to the column type, or
+        (updates/deletes) matches no row. With atomic, any failure rolls
+        the whole batch back. Multiple updates to the same key are merged
+        in order, later values winning.
+        """
+        inserts, updates, deletes = inserts or [], updates or [], deletes or []
+        column_types = {c.name: c.type for c in self.get_table_schema(schema, table)}
+        if not column_types:
+            raise ValueError(f"Table {schema}.{table} not found")
+        if pk_column not in column_types:
+            raise ValueError(f"Column {pk_column} not found in {schema}.{table}")
+        target = f'"{schema}"."{table}"'
+        pk_type = column_types[pk_column]
+
+        results = {
+            **{("insert", i): BulkRowResult(operation="insert", index=i, pk_value=row.get(pk_column), success=True)
+               for i, row in enumerate(inserts)},
+            **{("update", i): BulkRowResult(operation="update", index=i, pk_value=u.pk_value, success=True)
+               for i, u in enumerate(updates)},
+            **{("delete", i): BulkRowResult(operation="delete", index=i, pk_value=pk, success=True)
+               for i, pk in enumerate(deletes)},
+        }
+
+        def fail(operation: str, index: int, error: str) -> None:
+            result = results[(operation, index)]
+            if result.success:
+                result.success, result.error = False, error
+
+        # Column names are checked here; values are checked against the column types below
+        for i, row in enumerate(inserts):
+            unknown = [c for c in row if c not in column_types]
+            if not row or unknown:
+                fail("insert", i, f"Unknown columns: {', '.join(unknown)}" if unknown else "Empty row")
+        for i, update in enumerate(updates):
+            unknown = [c for c in update.updates if c not in column_types]
+            if not update.updates or unknown:
+                fail("update", i, f"Unknown columns: {', '.join(unknown)}" if unknown else "No columns to update")
+
+        registered = []
+
+        def register(name: str, indexes: list[int], columns: dict[str, list]) -> str:
+            self._register_rows(conn, name, indexes, columns)
+            registered.append(name)
+            return name
+
+        committed = False
+        try:
+            with self.get_connection(read_only=False) as conn:
+                try:
+                    # Group inserts by column set so each group is one INSERT ... SELECT
+                    insert_groups: dict[tuple, list[int]] = {}
+                    for i, row in enumerate(inserts):
+                        if results[("insert", i)].success:
+                            insert_groups.setdefault(tuple(row), []).append(i)
+
+                    insert_relations = []
+                    for n, (columns, indexes) in enumerate(insert_groups.items()):
+                        name = register(
+                            f"__bulk_insert_{n}", indexes,
+                            {c: [inserts[i][c] for i in indexes] for c in columns}
+                        )
+                        for column in columns:
+                            for i in self._unconvertible(conn, name, column, column_types[column]):
+                                fail("insert", i, f"Value for {column} is not a valid {column_types[column]}")
+                        if pk_column in columns:
+                            for (i,) in conn.execute(
+                                f'SELECT __idx FROM {name} s WHERE EXISTS (SELECT 1 FROM {target} t '
+                                f'WHERE t."{pk_column}" = TRY_CAST(s."{pk_column}" AS {pk_type}))'
+                            ).fetchall():
+                                fail("insert", i, "A row with this key already exists")
+                        insert_relations.append((name, columns))
+
+                    seen_keys = set()
+                    for i, row in enumerate(inserts):
+                        if pk_column in row and results[("insert", i)].success:
+                            key = _to_sql_text(row[pk_column])
+                            if key in seen_keys:
+                                fail("insert", i, "Duplicate key in batch")
+                            seen_keys.add(key)
+
+                    update_indexes = [i for i, u in enumerate(updates) if results[("update", i)].success]
+                    key_relation = register(
+                        "__bulk_keys",
+                        [i for i in update_indexes] + [-1 - i for i in range(len(deletes))],
+                        {"__pk": [updates[i].pk_value for i in update_indexes] + list(deletes)}
+                    )
+                    for idx in self._unconvertible(conn, key_relation, "__pk", pk_type):
+                        if idx >= 0:
+                            fail("update", idx, f"Key is not a valid {pk_type}")
+                        else:
+                            fail("delete", -1 - idx, f"Key is not a valid {pk_type}")
+
+                    # One relation per updated column to check all of its new values at once
+                    update_values: dict[str, tuple[list[int], list]] = {}
+                    for i in update_indexes:
+                        for column, value in updates[i].updates.items():
+                            indexes, values = update_values.setdefault(column, ([], []))
+                            indexes.append(i)
+                            values.append(value)
+                    for n, (column, (indexes, values)) in enumerate(update_values.items()):
+                        name = register(f"__bulk_check_{n}", indexes, {column: values})
+                        for i in self._unconvertible(conn, name, column, column_types[column]):
+                            fail("update", i, f"Value for {column} is not a valid {column_types[column]}")
+
+                    if atomic and not all(r.success for r in results.values()):
+                        raise _BulkAbort()
+
+                    # Inserts
+                    for name, columns in insert_relations:
+                        ok = [i for i in insert_groups[columns] if results[("insert", i)].success]
+                        if not ok:
+                            continue
+                        column_list = ", ".join(f'"{c}"' for c in columns)
+                        select_list = ", ".join(f'CAST("{c}" AS {column_types[c]})' for c in columns)
+                        conn.execute(
+                            f"INSERT INTO {target} ({column_list}) SELECT {select_list} FROM {name} "
+                            f"WHERE __idx IN (SELECT UNNEST(?)) ORDER BY __idx",
+                            [ok]
+                        )
+
+                    # Keys that exist now (inserts above count)
+                    existing = {row[0] for row in conn.execute(
+                        f'SELECT __idx FROM {key_relation} k WHERE EXISTS ('
+                        f'SELECT 1 FROM {target} t WHERE t."{pk_column}" = TRY_CAST(k.__pk AS {pk_type}))'
+                    ).fetchall()}
+                    for i in update_indexes:
+                        if i not in existing:
+                            fail("update", i, "No row with this key")
+                    for i in range(len(deletes)):
+                        if -1 - i not in existing:
+                            fail("delete", i, "No row with this key")
+
+                    if atomic and not all(r.success for r in results.values()):
+                        raise _BulkAbort()
+
+                    # Updates: merge per key in request order, then one UPDATE ... FROM per column set
+                    merged: dict[str, dict[str, Any]] = {}
+                    merged_keys: dict[str, Any] = {}
+                    for i in update_indexes:
+                        if results[("update", i)].success:
+                            key = _to_sql_text(updates[i].pk_value)
+                            merged.setdefault(key, {}).update(updates[i].updates)
+                            merged_keys[key] = updates[i].pk_value
+
+                    update_groups: dict[tuple, list[str]] = {}
+                    for key, values in merged.items():
+                        update_groups.setdefault(tuple(values), []).append(key)
+
+                    for n, (columns, keys) in enumerate(update_groups.items()):
+                        name = register(
+                            f"__bulk_update_{n}", list(range(len(keys))),
+                            {"__pk": [merged_keys[k] for k in keys],
+                             **{c: [merged[k][c] for k in keys] for c in columns}}
+                        )
+                        set_list = ", ".join(f'"{c}" = CAST(s."{c}" AS {column_types[c]})' for c in columns)
+                        conn.execute(
+                            f'UPDATE {target} SET {set_list} FROM {name} s '
+                            f'WHERE {target}."{pk_column}" = CAST(s.__pk AS {pk_type})'
+                        )
+
+                    # Deletes
+                    delete_ok = [i for i in range(len(deletes)) if results[("delete", i)].success]
+                    if delete_ok:
+                        name = register("__bulk_delete", delete_ok, {"__pk": [deletes[i] for i in delete_ok]})
+                        conn.execute(
+                            f'DELETE FROM {target} USING {name} s '
+                            f'WHERE {target}."{pk_column}" = CAST(s.__pk AS {pk_type})'
+                        )
+                finally:
+                    for name in registered:
+                        conn.unregister(name)
+            committed = True
+        except _BulkAbort:
+            pass
+
+        ordered = list(results.values())
+
+        def applied(operation: str) -> int:
+            if not committed:
+                return 0
+            return sum(1 for r in ordered if r.operation == operation and r.success)
+
+        return BulkWriteResult(
+            success=committed and all(r.success for r in ordered),
+            committed=committed,
+            inserted=applied("insert"),
+            updated=applied("update"),
+            deleted=applied("delete"),
+            results=ordered
+        )
+
     def execute_query(self, query: str) -> list[dict[str, Any]]:
-        """Execute a raw SQL query (read-only)."""
-        with self.get_connection() as conn:
-            result = conn.execute(query)
-            columns = [desc[0] for desc in result.description]
-            return [dict(zip(columns, row)) for row in result.fetchall()]
+        """
+        Execute a raw SQL query, served from the result cache when possible.
+
+        query must be a single SELECT over tables in the database (DESCRIBE,
+        SHOW and SUMMARIZE are SELECTs too, see _checked_select). The shared
+        instance is writable, so anything else (including COMMIT followed by
+        a write) is rejected before it runs.
+        """
+        cached = self.cache.get(query)
+        if cached is None:
+            version = self.connections.version
+            with self.get_connection() as conn:
+                select = self._checked_select(conn, query)
+                # Also roll back, in case a SELECT has side effects (e.g. nextval)
+                conn.begin()
+                try:
+                    result = conn.execute(select)
+                    types = [str(desc[1]) for desc in result.description]
+                    cached = self.cache.put(query, None, version, CachedResult(result.fetch_record_batch().read_all(), types))
+                finally:
+                    conn.rollback()
+        return to_rows(cached.table)
 
 
 # Singleton instance
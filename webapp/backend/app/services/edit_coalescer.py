@@ -0,0 +1,65 @@
+"""
+Coalescing of source table edits.
+
+The editor sends one request per cell change. Edits for a table that
+arrive within SOURCE_EDIT_WINDOW_MS of the first one are collected and
+applied together with SourceService.apply_edits: one read of the table
+state, one delta log append (and fsync) and one metadata write for the
+whole group. Each caller still gets the result of its own edits.
+"""
+
+import asyncio
+from typing import Optional
+
+from app.config import SOURCE_EDIT_WINDOW_MS
+from app.models.source import BatchEditResult, RowEdit
+from app.services.source_service import SourceService, source_service
+
+
+class EditCoalescer:
+    def __init__(self, service: SourceService = source_service, window_ms: int = SOURCE_EDIT_WINDOW_MS):
+        self.service = service
+        self.window = window_ms / 1000
+        # table -> batches waiting for the window to close
+        self._pending: dict[str, list[tuple[list[RowEdit], Optional[int], asyncio.Future]]] = {}
+        # Running flushes; the loop only keeps weak references to tasks
+        self._flushes: set[asyncio.Task] = set()
+
+    async def submit(
+        self, table_name: str, edits: list[RowEdit], expected_version: Optional[int] = None
+    ) -> BatchEditResult:
+        """Apply a batch of edits together with others arriving in the same window."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.get(table_name)
+        if pending is None:
+            pending = self._pending[table_name] = []
+            loop.call_later(self.window, self._start_flush, table_name)
+        pending.append((edits, expected_version, future))
+        return await future
+
+    def _start_flush(self, table_name: str) -> None:
+        task = asyncio.get_running_loop().create_task(self._flush(table_name))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, table_name: str) -> None:
+        pending = self._pending.pop(table_name)
+        batches = [(edits, expected_version) for edits, expected_version, _ in pending]
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                None, self.service.apply_edits, table_name, batches
+            )
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), outcome in zip(pending, outcomes):
+            # The caller may have gone away
+            if not future.done():
+                future.set_result(outcome)
+
+
+# Singleton instance
+edit_coalescer = EditCoalescer()
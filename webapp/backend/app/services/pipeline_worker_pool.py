@@ -0,0 +1,266 @@
+"""
+Pool of warm worker processes for dlt pipeline runs.
+
+Each worker imports dlt, pandas, pyarrow and the pipeline module as soon
+as it is spawned, so a job only pays for the pipeline itself instead of a
+fresh interpreter plus imports. A worker runs exactly one job and exits;
+a replacement is spawned when a job takes one, so max_workers warm
+workers are kept ready. Cancelling a job terminates its process only.
+Workers write their stdout/stderr and dlt log records to a shared queue;
+a pump thread forwards them to the WebSocket manager tagged with the
+job_id.
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from multiprocessing.connection import Connection
+from typing import Any, Optional
+
+# Queue sentinel that stops the log pump thread
+_STOP = None
+
+
+# ----------------------------------------------------------------------
+# Worker process side
+# ----------------------------------------------------------------------
+
+_log_queue = None
+
+
+def _init_worker(pipeline_path: str, duckdb_path: str, log_queue) -> None:
+    """Pre-import the heavy modules once per worker process."""
+    global _log_queue
+    _log_queue = log_queue
+
+    os.environ["DUCKDB_PATH"] = duckdb_path
+    os.environ["PYTHONUNBUFFERED"] = "1"
+    sys.path.insert(0, pipeline_path)
+    # dlt reads .dlt/config.toml relative to the working directory
+    os.chdir(pipeline_path)
+
+    import dlt  # noqa: F401
+    import nyc_taxi_pipeline  # noqa: F401
+    import pandas  # noqa: F401
+    import pyarrow  # noqa: F401
+
+
+class _QueueWriter(io.TextIOBase):
+    """File-like object that sends complete lines to the log queue."""
+
+    def __init__(self, job_id: str, level: str):
+        self.job_id = job_id
+        self.level = level
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._send(line)
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._send(self._buffer)
+            self._buffer = ""
+
+    def _send(self, line: str) -> None:
+        line = line.strip()
+        if line:
+            _log_queue.put((self.job_id, self.level, line))
+
+
+class _QueueLogHandler(logging.Handler):
+    """Forwards dlt log records to the log queue."""
+
+    def __init__(self, job_id: str):
+        super().__init__()
+        self.job_id = job_id
+
+    def emit(self, record: logging.LogRecord) -> None:
+        level = "error" if record.levelno >= logging.ERROR else (
+            "warning" if record.levelno >= logging.WARNING else "info"
+        )
+        _log_queue.put((self.job_id, level, self.format(record)))
+
+
+def _run_job(job_id: str, params: dict[str, Any]) -> dict:
+    """Run one pipeline job inside a warm worker."""
+    import nyc_taxi_pipeline
+
+    stdout = _QueueWriter(job_id, "info")
+    stderr = _QueueWriter(job_id, "error")
+    handler = _QueueLogHandler(job_id)
+    dlt_logger = logging.getLogger("dlt")
+    dlt_logger.addHandler(handler)
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            print("Starting data load...")
+            load_info = nyc_taxi_pipeline.run_pipeline(**params)
+            print("Load completed!")
+    finally:
+        dlt_logger.removeHandler(handler)
+        stdout.flush()
+        stderr.flush()
+
+    return {"load_ids": list(load_info.loads_ids)}
+
+
+def _worker_main(pipeline_path: str, duckdb_path: str, log_queue, conn: Connection) -> None:
+    """Warm up, then run the one job sent on conn and send back its result."""
+    _init_worker(pipeline_path, duckdb_path, log_queue)
+    try:
+        message = conn.recv()
+    except EOFError:
+        return
+    if message is None:
+        # Pool shut down before a job came
+        return
+
+    job_id, params = message
+    try:
+        conn.send((True, _run_job(job_id, params)))
+    except Exception as e:
+        try:
+            conn.send((False, e))
+        except Exception:
+            # The exception doesn't pickle
+            conn.send((False, RuntimeError(str(e))))
+
+
+class _Worker:
+    """A spawned worker process and the parent's end of its pipe."""
+
+    def __init__(self, process: multiprocessing.Process, conn: Connection):
+        self.process = process
+        self.conn = conn
+
+    def result(self) -> dict:
+        """Block until the job finishes; raises its error, or if the process died."""
+        try:
+            ok, value = self.conn.recv()
+        except EOFError:
+            self.process.join()
+            raise RuntimeError(f"Pipeline worker exited with code {self.process.exitcode}")
+        finally:
+            self.conn.close()
+        self.process.join()
+        if not ok:
+            raise value
+        return value
+
+
+# ----------------------------------------------------------------------
+# Server side
+# ----------------------------------------------------------------------
+
+class PipelineWorkerPool:
+    """Warm worker processes that each run one dlt pipeline job."""
+
+    def __init__(self, pipeline_path: str, duckdb_path: str, max_workers: int = 2):
+        self.pipeline_path = pipeline_path
+        self.duckdb_path = duckdb_path
+        self.max_workers = max_workers
+
+        self._context = multiprocessing.get_context("spawn")
+        self._log_queue = None
+        self._pump_thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._started = False
+        self._idle: list[_Worker] = []
+        self._jobs: dict[str, _Worker] = {}
+
+    def _spawn(self) -> _Worker:
+        """Start a worker; it warms up in the background. Caller holds self._lock."""
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.pipeline_path, self.duckdb_path, self._log_queue, child_conn),
+            name="pipeline-worker",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, conn)
+
+    def start(self) -> None:
+        """Spawn the workers and start forwarding their logs."""
+        with self._lock:
+            if self._started:
+                return
+
+            self._loop = asyncio.get_running_loop()
+            self._log_queue = self._context.Queue()
+            self._pump_thread = threading.Thread(
+                target=self._pump_logs, args=(self._log_queue,), name="pipeline-log-pump", daemon=True
+            )
+            self._pump_thread.start()
+
+            # Spawn every worker now so the first job doesn't pay for imports
+            self._idle = [self._spawn() for _ in range(self.max_workers)]
+            self._started = True
+
+    def shutdown(self) -> None:
+        """Stop the idle workers and the log pump (running jobs finish)."""
+        with self._lock:
+            if not self._started:
+                return
+            for worker in self._idle:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    # Already gone
+                    pass
+                worker.conn.close()
+            self._idle = []
+            self._log_queue.put(_STOP)
+            self._started = False
+
+    async def run(self, job_id: str, params: dict[str, Any]) -> dict:
+        """Run a pipeline job on a warm worker and wait for its result."""
+        self.start()
+        with self._lock:
+            # A worker that died while idle (e.g. failed imports) is replaced
+            while self._idle and not self._idle[0].process.is_alive():
+                self._idle.pop(0).conn.close()
+            worker = self._idle.pop(0) if self._idle else self._spawn()
+            self._idle.append(self._spawn())
+            # Known before run() yields, so cancel() works straight away
+            self._jobs[job_id] = worker
+
+        try:
+            worker.conn.send((job_id, params))
+            return await asyncio.get_running_loop().run_in_executor(None, worker.result)
+        finally:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Terminate the worker running job_id; other jobs are not affected."""
+        with self._lock:
+            worker = self._jobs.get(job_id)
+        if worker is None or not worker.process.is_alive():
+            return False
+        worker.process.terminate()
+        return True
+
+    def _pump_logs(self, log_queue) -> None:
+        """Forward worker log lines to WebSocket clients."""
+        from app.services.websocket_manager import ws_manager
+
+        while True:
+            item = log_queue.get()
+            if item is _STOP:
+                break
+            job_id, level, message = item
+            asyncio.run_coroutine_threadsafe(
+                ws_manager.send_log(message, level=level, source="dlt", job_id=job_id),
+                self._loop
+            )
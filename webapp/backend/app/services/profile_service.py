@@ -0,0 +1,247 @@
+"""
+Server-side profiling and aggregation of tables.
+
+Instead of pulling pages of raw rows to compute summaries in the browser,
+the work is pushed down into DuckDB and only the (small) result comes
+back:
+- profile: SUMMARIZE (min/max, approx distinct, quantiles, null %)
+- aggregate: GROUP BY with a fixed set of aggregate functions
+- histogram: equal-width bins of a numeric column
+
+Results go through the query result cache, so repeating them costs
+nothing until the table's database version changes.
+"""
+
+from typing import Any, Optional
+
+import pyarrow as pa
+
+from app.models.data import Aggregate, AggregateResult, ColumnInfo, ColumnProfile, Histogram, HistogramBin, TableProfile
+from app.services.connection_manager import ConnectionManager, connection_manager
+from app.services.duckdb_service import DuckDBService, db_service, to_rows
+from app.services.query_cache import CachedResult, QueryCache, query_cache
+
+# SQL for each aggregate function ({column} is the quoted column)
+AGGREGATE_SQL = {
+    "count": "COUNT({column})",
+    "count_distinct": "COUNT(DISTINCT {column})",
+    "approx_count_distinct": "approx_count_distinct({column})",
+    "sum": "SUM({column})",
+    "avg": "AVG({column})",
+    "min": "MIN({column})",
+    "max": "MAX({column})",
+    "median": "MEDIAN({column})",
+    "stddev": "STDDEV_SAMP({column})",
+}
+
+MAX_AGGREGATE_ROWS = 10_000
+MAX_HISTOGRAM_BINS = 200
+
+# Column types a histogram can be computed for
+NUMERIC_TYPES = (
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT",
+    "FLOAT", "REAL", "DOUBLE", "DECIMAL"
+)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ProfileService:
+    def __init__(
+        self,
+        db: DuckDBService = db_service,
+        connections: ConnectionManager = connection_manager,
+        cache: QueryCache = query_cache
+    ):
+        self.db = db
+        self.connections = connections
+        self.cache = cache
+
+    def _run_cached(self, query: str, params: Optional[list] = None) -> CachedResult:
+        """Run a read query through the result cache."""
+        cached = self.cache.get(query, params)
+        if cached is None:
+            version = self.connections.version
+            with self.connections.cursor() as conn:
+                result = conn.execute(query, params or [])
+                types = [str(desc[1]) for desc in result.description]
+                cached = self.cache.put(query, params, version, CachedResult(result.fetch_record_batch().read_all(), types))
+        return cached
+
+    def _column_types(self, schema: str, table: str) -> dict[str, str]:
+        columns = {c.name: c.type for c in self.db.get_table_schema(schema, table)}
+        if not columns:
+            raise ValueError(f"Table {schema}.{table} not found")
+        return columns
+
+    @staticmethod
+    def _check_columns(names, column_types: dict[str, str]) -> None:
+        unknown = [name for name in names if name not in column_types]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+    @staticmethod
+    def _filter_clause(filters: Optional[dict[str, Any]]) -> tuple[str, list]:
+        if not filters:
+            return "", []
+        return " WHERE " + " AND ".join(f"{_quote(c)} = ?" for c in filters), list(filters.values())
+
+    def profile(self, schema: str, table: str, columns: Optional[list[str]] = None) -> TableProfile:
+        """Per-column summary statistics of a table (DuckDB SUMMARIZE)."""
+        column_types = self._column_types(schema, table)
+        if columns:
+            self._check_columns(columns, column_types)
+        select = ", ".join(_quote(c) for c in columns) if columns else "*"
+
+        rows = to_rows(self._run_cached(f"SUMMARIZE SELECT {select} FROM {_quote(schema)}.{_quote(table)}").table)
+        profiles = [
+            ColumnProfile(
+                name=row["column_name"],
+                type=row["column_type"],
+                min=row["min"],
+                max=row["max"],
+                avg=row["avg"],
+                std=row["std"],
+                q25=row["q25"],
+                q50=row["q50"],
+                q75=row["q75"],
+                approx_distinct=row["approx_unique"],
+                count=row["count"],
+                null_percent=float(row["null_percentage"]) if row["null_percentage"] is not None else None
+            )
+            for row in rows
+        ]
+        return TableProfile(
+            schema_name=schema,
+            table_name=table,
+            row_count=profiles[0].count if profiles else 0,
+            columns=profiles
+        )
+
+    def aggregate(
+        self,
+        schema: str,
+        table: str,
+        group_by: list[str],
+        aggregates: list[Aggregate],
+        time_grain: Optional[dict[str, str]] = None,
+        filters: Optional[dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        order_dir: str = "desc",
+        limit: int = 1000
+    ) -> AggregateResult:
+        """GROUP BY group_by computing aggregates, evaluated inside DuckDB."""
+        time_grain = time_grain or {}
+        column_types = self._column_types(schema, table)
+        self._check_columns(
+            list(group_by) + list(time_grain) + [a.column for a in aggregates if a.column] + list(filters or {}),
+            column_types
+        )
+        if not aggregates:
+            raise ValueError("At least one aggregate is required")
+        if set(time_grain) - set(group_by):
+            raise ValueError("time_grain columns must also be in group_by")
+        if not 1 <= limit <= MAX_AGGREGATE_ROWS:
+            raise ValueError(f"limit must be between 1 and {MAX_AGGREGATE_ROWS}")
+
+        select_terms = []
+        for column in group_by:
+            if column in time_grain:
+                select_terms.append(f"date_trunc('{time_grain[column]}', {_quote(column)}) AS {_quote(column)}")
+            else:
+                select_terms.append(_quote(column))
+
+        aliases = list(group_by)
+        for aggregate in aggregates:
+            if aggregate.column is None and aggregate.function != "count":
+                raise ValueError(f"{aggregate.function} needs a column")
+            alias = aggregate.alias or (
+                f"{aggregate.function}_{aggregate.column}" if aggregate.column else aggregate.function
+            )
+            if alias in aliases:
+                raise ValueError(f"Duplicate result column: {alias}")
+            aliases.append(alias)
+            column = _quote(aggregate.column) if aggregate.column else "*"
+            select_terms.append(f"{AGGREGATE_SQL[aggregate.function].format(column=column)} AS {_quote(alias)}")
+
+        if order_by is None:
+            order_by = aliases[len(group_by)]
+        elif order_by not in aliases:
+            raise ValueError(f"order_by must be a group_by column or aggregate alias, got {order_by}")
+
+        where, params = self._filter_clause(filters)
+        query = f"SELECT {', '.join(select_terms)} FROM {_quote(schema)}.{_quote(table)}{where}"
+        if group_by:
+            query += f" GROUP BY {', '.join(str(i + 1) for i in range(len(group_by)))}"
+        direction = "DESC" if order_dir.lower() == "desc" else "ASC"
+        # Group columns break ties so the truncated result is stable
+        order_terms = [f"{_quote(order_by)} {direction} NULLS LAST"] + [_quote(c) for c in group_by if c != order_by]
+        query += f" ORDER BY {', '.join(order_terms)} LIMIT {limit + 1}"
+
+        cached = self._run_cached(query, params)
+        page = cached.table.slice(0, limit)
+        # SUM/AVG of a DECIMAL column stay DECIMAL; send fractional results as numbers
+        for i, field in enumerate(page.schema):
+            if i >= len(group_by) and pa.types.is_decimal(field.type) and field.type.scale > 0:
+                page = page.set_column(i, field.name, page.column(i).cast(pa.float64()))
+        return AggregateResult(
+            data=to_rows(page),
+            columns=[ColumnInfo(name=name, type=t) for name, t in zip(page.column_names, cached.types)],
+            truncated=cached.table.num_rows > limit
+        )
+
+    def histogram(
+        self,
+        schema: str,
+        table: str,
+        column: str,
+        bins: int = 20,
+        filters: Optional[dict[str, Any]] = None
+    ) -> Histogram:
+        """Equal-width histogram of a numeric column."""
+        column_types = self._column_types(schema, table)
+        self._check_columns([column] + list(filters or {}), column_types)
+        if not column_types[column].startswith(NUMERIC_TYPES):
+            raise ValueError(f"Histograms need a numeric column, {column} is {column_types[column]}")
+        if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+            raise ValueError(f"bins must be between 1 and {MAX_HISTOGRAM_BINS}")
+
+        where, params = self._filter_clause(filters)
+        source = f"{_quote(schema)}.{_quote(table)}{where}"
+        value = f"{_quote(column)}::DOUBLE"
+
+        bounds = to_rows(self._run_cached(
+            f"SELECT MIN({value}) AS lo, MAX({value}) AS hi, COUNT(*) - COUNT({_quote(column)}) AS nulls FROM {source}",
+            params
+        ).table)[0]
+        lo, hi, null_count = bounds["lo"], bounds["hi"], bounds["nulls"]
+        if lo is None:
+            return Histogram(column=column, null_count=null_count, bins=[])
+
+        width = (hi - lo) / bins if hi > lo else 1.0
+        counts = to_rows(self._run_cached(
+            f"SELECT LEAST(FLOOR(({value} - ?) / ?)::BIGINT, ?) AS bin, COUNT(*) AS n "
+            f"FROM {source}{' AND' if where else ' WHERE'} {_quote(column)} IS NOT NULL GROUP BY 1",
+            [lo, width, bins - 1] + params
+        ).table)
+        by_bin = {row["bin"]: row["n"] for row in counts}
+        num_bins = bins if hi > lo else 1
+
+        return Histogram(
+            column=column,
+            min=lo,
+            max=hi,
+            null_count=null_count,
+            bins=[
+                HistogramBin(lower=lo + i * width, upper=hi if i == num_bins - 1 else lo + (i + 1) * width,
+                             count=by_bin.get(i, 0))
+                for i in range(num_bins)
+            ]
+        )
+
+
+# Singleton instance
+profile_service = ProfileService()
@@ -0,0 +1,138 @@
+"""
+Result cache for read queries.
+
+The data browser and dashboards re-run the same SELECTs while nothing has
+changed. Results are kept as Arrow tables in an LRU with a memory budget,
+keyed by the normalized SQL, its parameters and the database version from
+the connection manager. Every write, dbt run, dlt load and source sync
+bumps the version, so a cached result is never served after the data
+changed; entries for older versions are dropped the first time the new
+version is seen.
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import pyarrow as pa
+
+from app.config import QUERY_CACHE_MB
+from app.services.connection_manager import ConnectionManager, connection_manager
+
+# String literals and quoted identifiers are left untouched by normalize_sql
+_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside quotes and drop a trailing semicolon."""
+    parts = _QUOTED.split(sql)
+    # split() with a capture group alternates unquoted/quoted parts
+    parts[::2] = [re.sub(r"\s+", " ", part) for part in parts[::2]]
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+
+@dataclass
+class CachedResult:
+    """A query result: the rows as Arrow, the DuckDB column types and any extras."""
+    table: pa.Table
+    types: list[str]
+    total_count: Optional[int] = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.get_total_buffer_size()
+
+
+class QueryCache:
+    """LRU of query results bounded by the size of their Arrow buffers."""
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MB * 1024 * 1024, connections: ConnectionManager = connection_manager):
+        self.max_bytes = max_bytes
+        self.connections = connections
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, CachedResult] = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[int] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _key(sql: str, params: Optional[list], version: int) -> tuple:
+        return normalize_sql(sql), json.dumps(params or [], default=str), version
+
+    def _sync_version(self, version: int) -> None:
+        """Drop every entry once the database has changed. Caller holds self._lock."""
+        if version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, sql: str, params: Optional[list] = None) -> Optional[CachedResult]:
+        """The cached result for sql at the current database version, if any."""
+        version = self.connections.version
+        with self._lock:
+            self._sync_version(version)
+            key = self._key(sql, params, version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, sql: str, params: Optional[list], version: int, entry: CachedResult) -> CachedResult:
+        """
+        Cache entry as the result of sql at version and return it.
+
+        version is the database version read before the query ran; results
+        of a version that is already outdated are not stored.
+        """
+        size = entry.nbytes
+        with self._lock:
+            self._sync_version(self.connections.version)
+            if version != self._version or size > self.max_bytes:
+                return entry
+
+            key = self._key(sql, params, version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = entry
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters and memory use."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "version": self._version,
+            }
+
+
+# Singleton instance
+query_cache = QueryCache()
@@ -0,0 +1,245 @@
+"""
+Append-only delta log for source table edits.
+
+Rewriting trips.parquet for every cell edit makes an edit cost the size of
+the table. Instead, row edits are appended as JSON lines to
+<table>_delta.jsonl next to the Parquet file:
+    {"op": "insert", "key": "43", "row": {...}}
+    {"op": "update", "key": "42", "updates": {...}}
+    {"op": "delete", "key": "42"}
+Keys are primary key values as text (the same comparison the editor has
+always used). Entries also carry the table version they were made in,
+which the editor's optimistic conflict checks compare against.
+Replaying the log gives an Overlay: updates and deletes of base rows
+plus rows inserted after them. Readers apply the overlay on top of the
+base file; compaction writes the merged table back to Parquet and
+truncates the log.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def row_key(value: Any) -> Optional[str]:
+    """Primary key value as the text used to match rows."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _to_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def to_arrow(values: list, arrow_type: pa.DataType) -> pa.Array:
+    """
+    Convert JSON values to an Arrow array of arrow_type.
+
+    Values go through text and Arrow's (strict) cast, so "3.5" is not
+    silently truncated into an integer column. Raises ValueError if a value
+    doesn't convert. A null-typed column (added without a default) takes
+    the type inferred from the values.
+    """
+    try:
+        if pa.types.is_null(arrow_type):
+            return pa.array(values)
+        texts = pa.array([None if v is None else _to_text(v) for v in values], pa.string())
+        try:
+            return pc.cast(texts, arrow_type)
+        except pa.ArrowInvalid:
+            if pa.types.is_timestamp(arrow_type) and arrow_type.tz:
+                # Local time without an offset
+                return pc.assume_timezone(pc.cast(texts, pa.timestamp(arrow_type.unit)), arrow_type.tz)
+            raise
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"Values are not a valid {arrow_type}: {e}")
+
+
+def to_records(table: pa.Table) -> list[dict]:
+    """
+    Rows of table as JSON-ready dicts.
+
+    Temporal columns become ISO 8601 text (without a fraction when all
+    values are whole seconds) and NaN becomes None; the conversion is
+    done per column with Arrow compute rather than per value.
+    """
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        column_type = column.type
+        if pa.types.is_timestamp(column_type):
+            try:
+                column = pc.cast(column, pa.timestamp("s", tz=column_type.tz))
+            except pa.ArrowInvalid:
+                pass  # keep the fraction
+            column = pc.strftime(column, format="%Y-%m-%dT%H:%M:%S%Ez" if column_type.tz else "%Y-%m-%dT%H:%M:%S")
+        elif pa.types.is_time(column_type):
+            try:
+                column = pc.cast(column, pa.time32("s"))
+            except pa.ArrowInvalid:
+                pass
+            column = pc.cast(column, pa.string())
+        elif pa.types.is_date(column_type):
+            column = pc.cast(column, pa.string())
+        elif pa.types.is_floating(column_type):
+            column = pc.if_else(pc.is_nan(column), pa.scalar(None, column_type), column)
+        columns[name] = column
+    return pa.table(columns).to_pylist()
+
+
+class Overlay:
+    """The net effect of a delta log on the base table."""
+
+    def __init__(self):
+        # Base rows: key -> column updates, and keys deleted
+        self.updates: dict[str, dict[str, Any]] = {}
+        self.deletes: set[str] = set()
+        # Rows added after the base rows, in insertion order
+        self.inserts: dict[str, dict[str, Any]] = {}
+        # key -> table version of the last edit of the row
+        self.versions: dict[str, int] = {}
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[dict]) -> "Overlay":
+        overlay = cls()
+        for entry in entries:
+            overlay.apply(entry)
+        return overlay
+
+    def copy(self) -> "Overlay":
+        overlay = Overlay()
+        overlay.updates = {key: dict(updates) for key, updates in self.updates.items()}
+        overlay.deletes = set(self.deletes)
+        overlay.inserts = {key: dict(row) for key, row in self.inserts.items()}
+        overlay.versions = dict(self.versions)
+        return overlay
+
+    def apply(self, entry: dict) -> None:
+        op = entry["op"]
+        if "version" in entry:
+            self.versions[entry["key"]] = entry["version"]
+        if op == "insert":
+            self.inserts[entry["key"]] = dict(entry["row"])
+        elif op == "update":
+            key = entry["key"]
+            if key in self.inserts:
+                self.inserts[key].update(entry["updates"])
+            else:
+                self.updates.setdefault(key, {}).update(entry["updates"])
+        elif op == "delete":
+            key = entry["key"]
+            if key in self.inserts:
+                del self.inserts[key]
+            else:
+                self.deletes.add(key)
+                self.updates.pop(key, None)
+
+    def __bool__(self) -> bool:
+        return bool(self.updates or self.deletes or self.inserts)
+
+    def apply_to(self, table: pa.Table, primary_key: str, keys: Optional[pa.Array] = None) -> pa.Table:
+        """
+        Base rows in table with updates and deletes applied.
+
+        keys are the row keys of table (computed from primary_key if not
+        given). Inserted rows are not included; see insert_table().
+        """
+        if not (self.updates or self.deletes):
+            return table
+        if keys is None:
+            keys = base_keys(table[primary_key])
+
+        for name in {column for updates in self.updates.values() for column in updates}:
+            if name not in table.column_names:
+                continue  # the column was removed
+            updated = [(key, updates[name]) for key, updates in self.updates.items() if name in updates]
+            value_keys = pa.array([key for key, _ in updated], pa.string())
+            values = to_arrow([value for _, value in updated], table.schema.field(name).type)
+            positions = pc.index_in(keys, value_set=value_keys)
+            column = table[name]
+            if pa.types.is_null(column.type):
+                column = column.cast(values.type)
+            table = table.set_column(
+                table.schema.get_field_index(name),
+                name,
+                pc.if_else(pc.is_valid(positions), values.take(positions), column)
+            )
+
+        if self.deletes:
+            deleted = pc.is_in(keys, value_set=pa.array(sorted(self.deletes), pa.string()))
+            table = table.filter(pc.invert(deleted))
+        return table
+
+    def insert_table(self, schema: pa.Schema, start: int = 0, stop: Optional[int] = None) -> pa.Table:
+        """The inserted rows [start, stop) as a table with the given schema."""
+        return rows_table(list(self.inserts.values())[start:stop], schema)
+
+
+def rows_table(rows: list[dict], schema: pa.Schema) -> pa.Table:
+    """JSON rows as a table with the given schema (see to_arrow)."""
+    columns = []
+    fields = []
+    for field in schema:
+        values = to_arrow([row.get(field.name) for row in rows], field.type)
+        columns.append(values)
+        fields.append(field.with_type(values.type))
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+
+def base_keys(column) -> pa.Array:
+    """Row keys of a primary key column (see row_key)."""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if pa.types.is_floating(column.type):
+        # 3.0 -> "3", matching row_key
+        integral = pc.equal(column, pc.floor(column))
+        return pc.if_else(integral, pc.cast(pc.cast(column, pa.int64(), safe=False), pa.string()), pc.cast(column, pa.string()))
+    return pc.cast(column, pa.string())
+
+
+class DeltaLog:
+    """JSON-lines log of edits to one source table."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def append(self, entries: list[dict]) -> None:
+        lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+        with open(self.path, "a") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self) -> list[dict]:
+        if not self.path.exists():
+            return []
+        with open(self.path, "r") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def replace(self, entries: list[dict]) -> None:
+        """Atomically replace the log with entries (empty deletes it)."""
+        if not entries:
+            self.path.unlink(missing_ok=True)
+            return
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write("".join(json.dumps(entry, default=str) + "\n" for entry in entries))
+        os.replace(tmp_path, self.path)
+
+    def stamp(self) -> tuple[int, int]:
+        """(size, mtime) of the log, to tell whether it changed."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,90 @@
+"""
+Primary key index of a source table's Parquet file.
+
+Finding a row by key used to scan the whole primary key column, and new
+keys came from scanning every id for the maximum. The index maps each key
+(as text, see source_delta.row_key) to its row position in the file and
+keeps the largest numeric id, so lookups, uniqueness checks and new keys
+don't depend on the size of the table. It also holds the table version
+each row was last changed in, so the editor's conflict checks survive
+compaction of the delta log.
+
+It is saved next to the file as <table>_pk_index.arrow, stamped with the
+size and mtime of the Parquet file it was built from; a file with a
+different stamp (rewritten by compaction, save or reload) is rebuilt.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from app.services.source_delta import base_keys
+
+
+def file_stamp(path: Path) -> tuple[int, int]:
+    """(size, mtime) of a file, to tell whether it changed."""
+    stat = Path(path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class PrimaryKeyIndex:
+    def __init__(self, keys: pa.Array, primary_key: str, stamp: tuple[int, int], versions: pa.Array):
+        self.keys = keys  # row key by position
+        self.versions = versions  # version of the last change by position
+        self.primary_key = primary_key
+        self.stamp = stamp
+        self.positions: dict[str, int] = {key: i for i, key in enumerate(keys.to_pylist()) if key is not None}
+
+        numeric = keys.filter(pc.fill_null(pc.match_substring_regex(keys, r"^\d{1,18}$"), False))
+        self.max_id: Optional[int] = pc.max(pc.cast(numeric, pa.int64())).as_py() if len(numeric) else None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, key: str) -> Optional[int]:
+        """Row position of key in the file, or None."""
+        return self.positions.get(key)
+
+    def version(self, position: int) -> int:
+        """Table version the row at position was last changed in."""
+        return self.versions[position].as_py()
+
+    @classmethod
+    def build(
+        cls, base: pq.ParquetFile, primary_key: str, stamp: tuple[int, int], version: int
+    ) -> "PrimaryKeyIndex":
+        """
+        Index the primary key column of an open file (reads only that column).
+
+        Row versions aren't known from the file, so every row gets version.
+        """
+        num_rows = base.metadata.num_rows
+        versions = pa.repeat(pa.scalar(version, pa.int64()), num_rows)
+        if primary_key not in base.schema_arrow.names:
+            return cls(pa.nulls(num_rows, pa.string()), primary_key, stamp, versions)
+        return cls(base_keys(base.read(columns=[primary_key])[primary_key]), primary_key, stamp, versions)
+
+    @classmethod
+    def load(cls, path: Path, primary_key: str, stamp: tuple[int, int]) -> Optional["PrimaryKeyIndex"]:
+        """The index saved at path, or None if missing or built from another file."""
+        try:
+            table = feather.read_table(path)
+            saved = json.loads(table.schema.metadata[b"source"])
+            table["version"]
+        except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+            return None
+        if saved != {"primary_key": primary_key, "stamp": list(stamp)}:
+            return None
+        return cls(table["key"].combine_chunks(), primary_key, stamp, table["version"].combine_chunks())
+
+    def save(self, path: Path) -> None:
+        source = json.dumps({"primary_key": self.primary_key, "stamp": list(self.stamp)})
+        table = pa.table({"key": self.keys, "version": self.versions}).replace_schema_metadata({"source": source})
+        tmp_path = Path(path).with_suffix(".tmp")
+        feather.write_feather(table, tmp_path)
+        tmp_path.replace(path)
@@ -0,0 +1,104 @@
+"""
+Pending schema changes of a source table.
+
+Adding or removing a column used to rewrite the whole Parquet file. The
+change is now recorded in <table>_metadata.json instead:
+    "added_columns": [{"name": "tip_pct", "type": "DOUBLE", "default": 0}]
+    "dropped_columns": ["hello"]
+and applied when the table is read: dropped columns are hidden and added
+columns are synthesized from their default. Compaction applies them to
+the file and clears them.
+"""
+
+from typing import Any, Optional
+
+import pyarrow as pa
+
+from app.services.source_delta import to_arrow
+
+# Column types offered by the editor (DuckDB names) as Arrow types
+COLUMN_TYPES = {
+    "VARCHAR": pa.string(),
+    "TEXT": pa.string(),
+    "BIGINT": pa.int64(),
+    "INTEGER": pa.int32(),
+    "DOUBLE": pa.float64(),
+    "FLOAT": pa.float32(),
+    "REAL": pa.float32(),
+    "BOOLEAN": pa.bool_(),
+    "TIMESTAMP": pa.timestamp("us"),
+    "TIMESTAMPTZ": pa.timestamp("us", tz="UTC"),
+    "DATE": pa.date32(),
+}
+
+
+def column_type(type_name: str, default_value: Any = None) -> pa.DataType:
+    """Arrow type of a new column; unknown type names take the default's type."""
+    known = COLUMN_TYPES.get(type_name.upper())
+    if known is not None:
+        return known
+    return pa.array([default_value]).type
+
+
+class Projection:
+    def __init__(self, added: Optional[list[dict]] = None, dropped: Optional[list[str]] = None):
+        self.added = [dict(column) for column in added or []]
+        # Also holds added columns dropped again, so re-adding the name
+        # can't pick up edits logged for the old column
+        self.dropped = list(dropped or [])
+
+    @classmethod
+    def from_metadata(cls, metadata: dict) -> "Projection":
+        return cls(metadata.get("added_columns"), metadata.get("dropped_columns"))
+
+    def to_metadata(self, metadata: dict) -> dict:
+        metadata["added_columns"] = self.added
+        metadata["dropped_columns"] = self.dropped
+        if not self.added:
+            del metadata["added_columns"]
+        if not self.dropped:
+            del metadata["dropped_columns"]
+        return metadata
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.dropped)
+
+    def _added_field(self, column: dict) -> pa.Field:
+        return pa.field(
+            column["name"], column_type(column["type"], column.get("default")), nullable=column.get("nullable", True)
+        )
+
+    def defaults(self) -> dict[str, Any]:
+        """Default value of each added column."""
+        return {column["name"]: column.get("default") for column in self.added}
+
+    def schema(self, base: pa.Schema) -> pa.Schema:
+        """Schema of the table as read: base columns not dropped, then added columns."""
+        fields = [field for field in base if field.name not in self.dropped]
+        return pa.schema(fields + [self._added_field(column) for column in self.added], metadata=base.metadata)
+
+    def apply(self, table: pa.Table) -> pa.Table:
+        """Rows of the base file as read."""
+        if not self:
+            return table
+        table = table.drop_columns([name for name in self.dropped if name in table.column_names])
+        for column in self.added:
+            field = self._added_field(column)
+            default = to_arrow([column.get("default")], field.type)[0]
+            table = table.append_column(field, pa.repeat(default, table.num_rows))
+        return table
+
+    def add(self, name: str, type_name: str, nullable: bool = True, default_value: Any = None) -> None:
+        if not nullable and default_value is None:
+            raise ValueError(f"Column '{name}' is not nullable, so it needs a default value")
+        column = {"name": name, "type": type_name, "nullable": nullable, "default": default_value}
+        try:
+            to_arrow([default_value], self._added_field(column).type)
+        except ValueError:
+            raise ValueError(f"Default {default_value!r} is not a valid {type_name}")
+        self.added.append(column)
+
+    def drop(self, name: str) -> None:
+        self.added = [column for column in self.added if column["name"] != name]
+        if name not in self.dropped:
+            self.dropped.append(name)
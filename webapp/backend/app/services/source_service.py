@@ -9,27 +9,80 @@ The workflow:
 5. Run dbt to transform data
 """
 
+import json
+import logging
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
-import json
+from typing import Any, Iterator, Optional
 
-import duckdb
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 
-from app.config import DATA_DIR, DATABASE_PATH
+from app.config import DATA_DIR, SOURCE_COMPACT_THRESHOLD
+from app.models.source import BatchEditResult, RowEdit, RowEditResult
+from app.services.connection_manager import connection_manager
+from app.services.duckdb_service import db_service
+from app.services.source_delta import DeltaLog, Overlay, base_keys, row_key, rows_table, to_arrow, to_records
+from app.services.source_index import PrimaryKeyIndex, file_stamp
+from app.services.source_projection import Projection
+
+logger = logging.getLogger(__name__)
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class EditConflictError(ValueError):
+    """The row was changed after the table version an edit was based on."""
 
 
 class SourceService:
-    def __init__(self):
+    """
+    Editable Parquet source tables.
+
+    Row edits (add/update/delete) are appended to a per-table delta log
+    instead of rewriting the Parquet file, and merged on read. Once the log
+    holds SOURCE_COMPACT_THRESHOLD edits it is compacted into the Parquet
+    file on a background thread; syncing to DuckDB or handing the file to
+    dlt compacts first so they see every edit. Column additions and
+    removals are likewise kept in the metadata file as a Projection and
+    written to the file by the next compaction.
+
+    Every applied batch of edits bumps the table's version (kept in the
+    metadata file); editors pass the version they read back as
+    expected_version, and edits to rows changed after it are rejected
+    instead of overwriting someone else's change.
+    """
+
+    def __init__(self, compact_threshold: int = SOURCE_COMPACT_THRESHOLD):
         self.source_dir = DATA_DIR / "source"
         self.source_dir.mkdir(parents=True, exist_ok=True)
+        self.compact_threshold = compact_threshold
+
+        self._locks_lock = threading.Lock()
+        # Per table: edits and delta log, and the (slow) base file rewrite
+        self._edit_locks: dict[str, threading.RLock] = {}
+        self._compact_locks: dict[str, threading.RLock] = {}
+        # Per table: (delta log stamp, replayed overlay, entries in the log)
+        self._overlays: dict[str, tuple[tuple[int, int], Overlay, int]] = {}
+        self._indexes: dict[str, PrimaryKeyIndex] = {}
+        # Per table: why the last background compaction failed
+        self._compact_errors: dict[str, str] = {}
 
     def _get_parquet_path(self, table_name: str) -> Path:
         return self.source_dir / f"{table_name}.parquet"
 
+    def _get_delta_log(self, table_name: str) -> DeltaLog:
+        return DeltaLog(self.source_dir / f"{table_name}_delta.jsonl")
+
+    def _get_index_path(self, table_name: str) -> Path:
+        return self.source_dir / f"{table_name}_pk_index.arrow"
+
     def _get_metadata_path(self, table_name: str) -> Path:
         return self.source_dir / f"{table_name}_metadata.json"
 
@@ -45,15 +98,259 @@ class SourceService:
         with open(path, "w") as f:
             json.dump(metadata, f, indent=2, default=str)
 
+    # ------------------------------------------------------------------
+    # Delta log
+    # ------------------------------------------------------------------
+
+    def _edit_lock(self, table_name: str) -> threading.RLock:
+        with self._locks_lock:
+            return self._edit_locks.setdefault(table_name, threading.RLock())
+
+    def _compact_lock(self, table_name: str) -> threading.RLock:
+        with self._locks_lock:
+            return self._compact_locks.setdefault(table_name, threading.RLock())
+
+    @contextmanager
+    def _exclusive(self, table_name: str) -> Iterator[None]:
+        """Hold off compaction and edits while the base file is rewritten."""
+        with self._compact_lock(table_name), self._edit_lock(table_name):
+            yield
+
+    def _overlay(self, table_name: str) -> tuple[Overlay, int]:
+        """Replayed delta log of a table and its number of entries. Caller holds the edit lock."""
+        log = self._get_delta_log(table_name)
+        stamp = log.stamp()
+        cached = self._overlays.get(table_name)
+        if cached is None or cached[0] != stamp:
+            entries = log.read()
+            cached = (stamp, Overlay.from_entries(entries), len(entries))
+            self._overlays[table_name] = cached
+        return cached[1], cached[2]
+
+    def _snapshot(
+        self, table_name: str, indexed: bool = False
+    ) -> tuple[pq.ParquetFile, Overlay, Optional[PrimaryKeyIndex]]:
+        """
+        Consistent view of a table: the open base file, its overlay and
+        (if indexed) its primary key index.
+
+        The file is opened under the edit lock, so a compaction that
+        replaces it afterwards doesn't change what this view reads.
+        """
+        path = self._get_parquet_path(table_name)
+        if not path.exists():
+            raise FileNotFoundError(f"Source table '{table_name}' not found")
+        with self._edit_lock(table_name):
+            base = pq.ParquetFile(path)
+            index = self._pk_index(table_name, base) if indexed else None
+            return base, self._overlay(table_name)[0], index
+
+    def _pk_index(self, table_name: str, base: pq.ParquetFile) -> PrimaryKeyIndex:
+        """Primary key index of the current base file. Caller holds the edit lock."""
+        metadata = self._load_metadata(table_name)
+        primary_key = metadata.get("primary_key", "unique_id")
+        stamp = file_stamp(self._get_parquet_path(table_name))
+        index = self._indexes.get(table_name)
+        if index is None or index.stamp != stamp or index.primary_key != primary_key:
+            index = PrimaryKeyIndex.load(self._get_index_path(table_name), primary_key, stamp)
+            if index is None:
+                # Without the saved row versions, every row counts as changed now
+                index = PrimaryKeyIndex.build(base, primary_key, stamp, metadata.get("version", 0))
+                index.save(self._get_index_path(table_name))
+            self._indexes[table_name] = index
+        return index
+
+    def _record(self, table_name: str, entries: list[dict], metadata: dict) -> None:
+        """Append edits (stamped with their version) to the delta log. Caller holds the edit lock."""
+        log = self._get_delta_log(table_name)
+        overlay, count = self._overlay(table_name)
+        log.append(entries)
+        for entry in entries:
+            overlay.apply(entry)
+        count += len(entries)
+        self._overlays[table_name] = (log.stamp(), overlay, count)
+
+        metadata["version"] = entries[-1]["version"]
+        metadata["last_modified"] = datetime.now().isoformat()
+        self._save_metadata(table_name, metadata)
+
+        if count >= self.compact_threshold:
+            threading.Thread(
+                target=self._compact_in_background, args=(table_name,), name=f"compact-{table_name}", daemon=True
+            ).start()
+
+    @staticmethod
+    def _merge(base: pa.Table, overlay: Overlay, primary_key: str) -> pa.Table:
+        """Base rows with the overlay applied, followed by inserted rows."""
+        table = overlay.apply_to(base, primary_key)
+        if overlay.inserts:
+            table = pa.concat_tables([table, overlay.insert_table(base.schema)], promote_options="default")
+        return table
+
+    def compact(self, table_name: str) -> int:
+        """
+        Fold the delta log and pending column changes into the Parquet
+        file; returns the edits applied.
+
+        The merged file is written without blocking edits; edits made in
+        the meantime stay in the log. (Column changes wait for it.)
+        """
+        path = self._get_parquet_path(table_name)
+        log = self._get_delta_log(table_name)
+        with self._compact_lock(table_name):
+            with self._edit_lock(table_name):
+                entries = log.read()
+                metadata = self._load_metadata(table_name)
+                projection = Projection.from_metadata(metadata)
+                if not (entries or projection) or not path.exists():
+                    return 0
+                base = pq.ParquetFile(path)
+                base_index = self._pk_index(table_name, base)
+
+            primary_key = metadata.get("primary_key", "unique_id")
+            overlay = Overlay.from_entries(entries)
+            merged = self._merge(projection.apply(base.read()), overlay, primary_key)
+            tmp_path = path.with_suffix(".compact.tmp")
+            pq.write_table(merged, tmp_path)
+
+            with self._edit_lock(table_name):
+                os.replace(tmp_path, path)
+                log.replace(log.read()[len(entries):])
+                self._overlays.pop(table_name, None)
+                self._save_metadata(table_name, Projection().to_metadata(self._load_metadata(table_name)))
+                # The merged keys are at hand; no need to scan the new file
+                if primary_key in merged.column_names:
+                    index = self._merged_index(base_index, overlay, base_keys(merged[primary_key]), file_stamp(path))
+                    index.save(self._get_index_path(table_name))
+                    self._indexes[table_name] = index
+        self._compact_errors.pop(table_name, None)
+        return len(entries)
+
+    @staticmethod
+    def _merged_index(
+        base_index: PrimaryKeyIndex, overlay: Overlay, keys: pa.Array, stamp: tuple[int, int]
+    ) -> PrimaryKeyIndex:
+        """
+        Index of a compacted file with keys, carrying over row versions:
+        base rows keep theirs, rows in the overlay take their last edit's.
+        """
+        versions = base_index.versions
+        if overlay.deletes:
+            deleted = pc.is_in(base_index.keys, value_set=pa.array(sorted(overlay.deletes), pa.string()))
+            versions = versions.filter(pc.invert(deleted))
+        versions = pa.concat_arrays([
+            versions, pa.array([overlay.versions.get(key, 0) for key in overlay.inserts], pa.int64())
+        ])
+        if overlay.versions:
+            edited = pc.index_in(keys, value_set=pa.array(list(overlay.versions), pa.string()))
+            edit_versions = pa.array(list(overlay.versions.values()), pa.int64())
+            versions = pc.if_else(pc.is_valid(edited), edit_versions.take(edited), versions)
+        return PrimaryKeyIndex(keys, base_index.primary_key, stamp, versions)
+
+    def _compact_in_background(self, table_name: str) -> None:
+        # Skip if a compaction of this table is already running
+        lock = self._compact_lock(table_name)
+        if not lock.acquire(blocking=False):
+            return
+        try:
+            self.compact(table_name)
+        except Exception as e:
+            logger.exception("Compaction of source table %s failed", table_name)
+            self._compact_errors[table_name] = str(e)
+        finally:
+            lock.release()
+
+    def _reset_delta(self, table_name: str) -> None:
+        """Drop pending edits (the base file was replaced). Caller holds _exclusive."""
+        self._get_delta_log(table_name).replace([])
+        self._overlays.pop(table_name, None)
+
+    def _bump_version(self, table_name: str, metadata: dict) -> dict:
+        """
+        Set the next table version on metadata (for changes outside the
+        delta log). A replaced base file gets a new index, in which every
+        row counts as changed in this version.
+        """
+        metadata["version"] = self._load_metadata(table_name).get("version", 0) + 1
+        return metadata
+
+    @staticmethod
+    def _read_rows(base: pq.ParquetFile, start: int, stop: int) -> pa.Table:
+        """Rows [start, stop) of the base file, reading only the row groups that hold them."""
+        groups = []
+        first_row = row = 0
+        for i in range(base.metadata.num_row_groups):
+            num_rows = base.metadata.row_group(i).num_rows
+            if row < stop and row + num_rows > start:
+                if not groups:
+                    first_row = row
+                groups.append(i)
+            row += num_rows
+        if not groups:
+            return base.schema_arrow.empty_table()
+        return base.read_row_groups(groups).slice(start - first_row, stop - start)
+
+    @staticmethod
+    def _read_positions(base: pq.ParquetFile, positions: list[int]) -> pa.Table:
+        """Rows at positions of the base file, reading each row group that holds them once."""
+        tables = []
+        row = 0
+        wanted = sorted(positions)
+        for i in range(base.metadata.num_row_groups):
+            num_rows = base.metadata.row_group(i).num_rows
+            local = [p - row for p in wanted if row <= p < row + num_rows]
+            if local:
+                tables.append(base.read_row_group(i).take(local))
+            row += num_rows
+        if not tables:
+            return base.schema_arrow.empty_table()
+        return pa.concat_tables(tables)
+
+    @staticmethod
+    def _deleted_positions(overlay: Overlay, index: PrimaryKeyIndex) -> list[int]:
+        """Sorted positions in the base file of the rows deleted by the overlay."""
+        positions = (index.position(key) for key in overlay.deletes)
+        return sorted(position for position in positions if position is not None)
+
+    @staticmethod
+    def _base_position(index: int, deleted: list[int]) -> int:
+        """Position in the base file of the index-th base row that isn't deleted."""
+        position = index
+        for d in deleted:
+            if d > position:
+                break
+            position += 1
+        return position
+
+    @staticmethod
+    def _locate(overlay: Overlay, index: PrimaryKeyIndex, key: str) -> Optional[tuple[str, int]]:
+        """Where the row with key lives: ("insert", -1), ("base", position) or None."""
+        if key in overlay.inserts:
+            return "insert", -1
+        if key in overlay.deletes:
+            return None
+        position = index.position(key)
+        return ("base", position) if position is not None else None
+
+    def _check_values(self, schema: pa.Schema, values: dict[str, Any]) -> None:
+        """Raise ValueError unless every value converts to its column's type."""
+        for name, value in values.items():
+            if value is None and not schema.field(name).nullable:
+                raise ValueError(f"Column '{name}' can't be null")
+            try:
+                to_arrow([value], schema.field(name).type)
+            except ValueError:
+                raise ValueError(f"Value {value!r} is not a valid {schema.field(name).type} for column '{name}'")
+
     def list_tables(self) -> list[dict]:
         """List all source Parquet tables."""
         tables = []
         for path in self.source_dir.glob("*.parquet"):
             try:
-                pq_file = pq.ParquetFile(path)
-                schema = pq_file.schema_arrow
-                num_rows = pq_file.metadata.num_rows
+                pq_file, overlay, _ = self._snapshot(path.stem)
                 metadata = self._load_metadata(path.stem)
+                schema = Projection.from_metadata(metadata).schema(pq_file.schema_arrow)
+                num_rows = pq_file.metadata.num_rows - len(overlay.deletes) + len(overlay.inserts)
 
                 tables.append({
                     "name": path.stem,
@@ -62,39 +359,39 @@ class SourceService:
                     "last_modified": metadata.get("last_modified") or datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
                     "primary_key": metadata.get("primary_key", "unique_id"),
                     "file_path": str(path),
+                    "compaction_error": self._compact_errors.get(path.stem),
                 })
-            except Exception as e:
-                print(f"Error reading {path}: {e}")
+            except Exception:
+                logger.exception("Error reading %s", path)
         return tables
 
     def get_table(self, table_name: str, limit: int = 100, offset: int = 0) -> dict:
-        """Get table data with schema and pagination."""
-        path = self._get_parquet_path(table_name)
-        if not path.exists():
-            raise FileNotFoundError(f"Source table '{table_name}' not found")
+        """
+        Get table data with schema and pagination.
 
-        # Read Parquet file
-        table = pq.read_table(path)
-        df = table.to_pandas()
-
-        total_count = len(df)
-        data_slice = df.iloc[offset:offset + limit]
-
-        # Convert to records with proper type handling
-        records = []
-        for _, row in data_slice.iterrows():
-            record = {}
-            for col in df.columns:
-                val = row[col]
-                if val is None or (hasattr(val, 'isna') and val.isna()):
-                    record[col] = None
-                elif hasattr(val, 'isoformat'):
-                    record[col] = val.isoformat()
-                elif hasattr(val, 'item'):
-                    record[col] = val.item()  # numpy types
-                else:
-                    record[col] = val
-            records.append(record)
+        Only the row groups covering the page are read, so a page costs the
+        same whatever the size of the table.
+        """
+        with self._edit_lock(table_name):
+            base, overlay, index = self._snapshot(table_name, indexed=True)
+            metadata = self._load_metadata(table_name)
+        pk = metadata.get("primary_key", "unique_id")
+        projection = Projection.from_metadata(metadata)
+        schema = projection.schema(base.schema_arrow)
+
+        # Rows are the base rows not deleted, followed by the inserted rows
+        deleted = self._deleted_positions(overlay, index)
+        num_live = base.metadata.num_rows - len(deleted)
+        total_count = num_live + len(overlay.inserts)
+
+        pages = []
+        if offset < num_live:
+            start = self._base_position(offset, deleted)
+            stop = self._base_position(min(offset + limit, num_live) - 1, deleted) + 1
+            pages.append(overlay.apply_to(projection.apply(self._read_rows(base, start, stop)), pk))
+        if offset + limit > num_live and overlay.inserts:
+            pages.append(overlay.insert_table(schema, max(offset - num_live, 0), offset + limit - num_live))
+        table = pa.concat_tables(pages, promote_options="default") if pages else schema.empty_table()
 
         # Build schema info
         columns = []
@@ -105,17 +402,17 @@ class SourceService:
                 "nullable": field.nullable,
             })
 
-        metadata = self._load_metadata(table_name)
-
         return {
             "schema": {
                 "columns": columns,
-                "primary_key": metadata.get("primary_key", "unique_id"),
+                "primary_key": pk,
             },
-            "data": records,
+            "data": to_records(table),
             "total_count": total_count,
             "limit": limit,
             "offset": offset,
+            "version": metadata.get("version", 0),
+            "compaction_error": self._compact_errors.get(table_name),
         }
 
     def save_table(self, table_name: str, table_data: dict) -> dict:
@@ -127,124 +424,199 @@ class SourceService:
         # Convert data to DataFrame
         df = pd.DataFrame(table_data.get("data", []))
 
-        # Convert to Parquet
+        # Convert to Parquet; the saved data replaces any pending edits
         table = pa.Table.from_pandas(df)
-        pq.write_table(table, path)
-
-        # Update metadata
-        schema_info = table_data.get("schema", {})
-        metadata = {
-            "primary_key": schema_info.get("primary_key", "unique_id"),
-            "last_modified": datetime.now().isoformat(),
-        }
-        self._save_metadata(table_name, metadata)
+        with self._exclusive(table_name):
+            pq.write_table(table, path)
+            self._reset_delta(table_name)
+
+            # Update metadata
+            schema_info = table_data.get("schema", {})
+            metadata = {
+                "primary_key": schema_info.get("primary_key", "unique_id"),
+                "last_modified": datetime.now().isoformat(),
+            }
+            self._save_metadata(table_name, self._bump_version(table_name, metadata))
 
         return {"success": True, "rows_saved": len(df)}
 
-    def add_row(self, table_name: str, row_data: dict[str, Any]) -> dict:
-        """Add a new row to the table."""
-        import pandas as pd
-
-        path = self._get_parquet_path(table_name)
-        if not path.exists():
-            raise FileNotFoundError(f"Source table '{table_name}' not found")
+    def _prepare_edit(
+        self,
+        table_name: str,
+        schema: pa.Schema,
+        metadata: dict,
+        index: PrimaryKeyIndex,
+        overlay: Overlay,
+        edit: RowEdit,
+        expected_version: Optional[int]
+    ) -> dict:
+        """
+        Check an edit against the current rows and return its delta log entry.
 
-        # Read existing data
-        df = pd.read_parquet(path)
-        metadata = self._load_metadata(table_name)
+        Raises ValueError if it can't be applied, EditConflictError if the
+        row changed after expected_version.
+        """
         pk = metadata.get("primary_key", "unique_id")
 
-        # Generate new primary key if not provided
-        if pk not in row_data or row_data[pk] is None:
-            if pk in df.columns:
-                existing_ids = df[pk].dropna().tolist()
-                # Try to find max numeric ID
-                numeric_ids = [int(x) for x in existing_ids if str(x).isdigit()]
+        if edit.op == "insert":
+            row_data = dict(edit.data)
+            unknown = [col for col in row_data if schema.get_field_index(col) < 0]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+            # Generate new primary key if not provided
+            if pk not in row_data or row_data[pk] is None:
+                # Try to find max numeric ID (ids of deleted rows aren't reused)
+                numeric_ids = [int(key) for key in overlay.inserts if key.isdigit()]
+                if index.max_id is not None:
+                    numeric_ids.append(index.max_id)
                 if numeric_ids:
                     row_data[pk] = max(numeric_ids) + 1
                 else:
-                    row_data[pk] = f"{table_name}_{len(df) + 1}"
-            else:
-                row_data[pk] = f"{table_name}_{len(df) + 1}"
-
-        # Add missing columns with None
-        for col in df.columns:
-            if col not in row_data:
-                row_data[col] = None
-
-        # Append row
-        new_df = pd.concat([df, pd.DataFrame([row_data])], ignore_index=True)
+                    row_count = len(index) - len(overlay.deletes) + len(overlay.inserts)
+                    row_data[pk] = f"{table_name}_{row_count + 1}"
+            elif self._locate(overlay, index, row_key(row_data[pk])) is not None:
+                raise ValueError(f"Row with {pk}={row_data[pk]} already exists")
+
+            # Add missing columns with their default (None unless added with one)
+            defaults = Projection.from_metadata(metadata).defaults()
+            for col in schema.names:
+                if col not in row_data:
+                    row_data[col] = defaults.get(col)
+            self._check_values(schema, row_data)
+            return {"op": "insert", "key": row_key(row_data[pk]), "row": row_data}
+
+        key = row_key(edit.pk_value)
+        location = self._locate(overlay, index, key)
+        if location is None:
+            raise ValueError(f"Row with {pk}={edit.pk_value} not found")
+
+        # Rows without logged edits keep the version from the index
+        kind, position = location
+        row_version = overlay.versions.get(key, index.version(position) if kind == "base" else 0)
+        if expected_version is not None and row_version > expected_version:
+            raise EditConflictError(
+                f"Row with {pk}={edit.pk_value} was changed in version {row_version}, after version {expected_version}"
+            )
+
+        if edit.op == "delete":
+            return {"op": "delete", "key": key}
+
+        updates = {col: val for col, val in edit.data.items() if col in schema.names}
+        if pk in updates and row_key(updates[pk]) != key:
+            raise ValueError(f"Cannot change the primary key of row {pk}={edit.pk_value}")
+        self._check_values(schema, updates)
+        return {"op": "update", "key": key, "updates": updates}
+
+    def _fill_rows(
+        self,
+        base: pq.ParquetFile,
+        overlay: Overlay,
+        index: PrimaryKeyIndex,
+        projection: Projection,
+        primary_key: str,
+        outcomes: list[BatchEditResult]
+    ) -> None:
+        """Set the current row on the results of applied inserts and updates."""
+        results = [
+            result for outcome in outcomes if outcome.success
+            for result in outcome.results if result.op != "delete"
+        ]
+        positions = {
+            index.position(row_key(result.pk_value)) for result in results
+            if row_key(result.pk_value) not in overlay.inserts and row_key(result.pk_value) not in overlay.deletes
+        }
+        rows_by_key = {}
+        if positions:
+            rows = overlay.apply_to(projection.apply(self._read_positions(base, sorted(positions))), primary_key)
+            rows_by_key.update(zip(base_keys(rows[primary_key]).to_pylist(), to_records(rows)))
+
+        # Inserted rows go through the same conversion, so they show the stored values
+        inserted = [row_key(result.pk_value) for result in results if row_key(result.pk_value) in overlay.inserts]
+        if inserted:
+            rows = rows_table([overlay.inserts[key] for key in inserted], projection.schema(base.schema_arrow))
+            rows_by_key.update(zip(inserted, to_records(rows)))
+
+        for result in results:
+            result.row = rows_by_key.get(row_key(result.pk_value))
+
+    def apply_edits(
+        self, table_name: str, batches: list[tuple[list[RowEdit], Optional[int]]]
+    ) -> list[BatchEditResult]:
+        """
+        Apply batches of (edits, expected_version) with one read of the
+        table state and one delta log append.
 
-        # Save
-        pq.write_table(pa.Table.from_pandas(new_df), path)
-        metadata["last_modified"] = datetime.now().isoformat()
-        self._save_metadata(table_name, metadata)
+        A batch is all-or-nothing and sees the edits of the batches before
+        it. Each applied batch gets its own version.
+        """
+        with self._edit_lock(table_name):
+            base, overlay, index = self._snapshot(table_name, indexed=True)
+            metadata = self._load_metadata(table_name)
+            projection = Projection.from_metadata(metadata)
+            schema = projection.schema(base.schema_arrow)
+            version = metadata.get("version", 0)
+
+            entries = []
+            outcomes = []
+            for edits, expected_version in batches:
+                # Edits go to a copy until the whole batch is known to apply
+                trial = overlay.copy()
+                batch_entries = []
+                results = []
+                for i, edit in enumerate(edits):
+                    result = RowEditResult(op=edit.op, index=i, pk_value=edit.pk_value, success=True)
+                    try:
+                        entry = self._prepare_edit(table_name, schema, metadata, index, trial, edit, expected_version)
+                    except ValueError as e:
+                        result.success = False
+                        result.conflict = isinstance(e, EditConflictError)
+                        result.error = str(e)
+                    else:
+                        entry["version"] = version + 1
+                        trial.apply(entry)
+                        batch_entries.append(entry)
+                        if edit.op == "insert":
+                            result.pk_value = entry["row"][metadata.get("primary_key", "unique_id")]
+                    results.append(result)
+
+                success = all(result.success for result in results)
+                if not success:
+                    for result in results:
+                        if result.success:
+                            result.success = False
+                            result.error = "Not applied: another edit in the batch failed"
+                elif batch_entries:
+                    overlay = trial
+                    entries.extend(batch_entries)
+                    version += 1
+                outcomes.append(BatchEditResult(success=success, version=version, results=results))
+
+            if entries:
+                self._record(table_name, entries, metadata)
+            self._fill_rows(base, overlay, index, projection, metadata.get("primary_key", "unique_id"), outcomes)
+
+        return outcomes
+
+    def _apply_edit(self, table_name: str, edit: RowEdit) -> RowEditResult:
+        result = self.apply_edits(table_name, [([edit], None)])[0].results[0]
+        if not result.success:
+            raise ValueError(result.error)
+        return result
 
-        return {"success": True, "row": row_data}
+    def add_row(self, table_name: str, row_data: dict[str, Any]) -> dict:
+        """Add a new row to the table."""
+        result = self._apply_edit(table_name, RowEdit(op="insert", data=row_data))
+        return {"success": True, "row": result.row}
 
     def update_row(self, table_name: str, pk_value: Any, updates: dict[str, Any]) -> dict:
         """Update an existing row."""
-        import pandas as pd
-
-        path = self._get_parquet_path(table_name)
-        if not path.exists():
-            raise FileNotFoundError(f"Source table '{table_name}' not found")
-
-        df = pd.read_parquet(path)
-        metadata = self._load_metadata(table_name)
-        pk = metadata.get("primary_key", "unique_id")
-
-        # Find and update row
-        mask = df[pk] == pk_value
-        if not mask.any():
-            # Try string comparison
-            mask = df[pk].astype(str) == str(pk_value)
-
-        if not mask.any():
-            raise ValueError(f"Row with {pk}={pk_value} not found")
-
-        for col, val in updates.items():
-            if col in df.columns:
-                df.loc[mask, col] = val
-
-        # Save
-        pq.write_table(pa.Table.from_pandas(df), path)
-        metadata["last_modified"] = datetime.now().isoformat()
-        self._save_metadata(table_name, metadata)
-
-        updated_row = df[mask].iloc[0].to_dict()
-        return {"success": True, "row": updated_row}
+        result = self._apply_edit(table_name, RowEdit(op="update", pk_value=pk_value, data=updates))
+        return {"success": True, "row": result.row}
 
     def delete_row(self, table_name: str, pk_value: Any) -> dict:
         """Delete a row from the table."""
-        import pandas as pd
-
-        path = self._get_parquet_path(table_name)
-        if not path.exists():
-            raise FileNotFoundError(f"Source table '{table_name}' not found")
-
-        df = pd.read_parquet(path)
-        metadata = self._load_metadata(table_name)
-        pk = metadata.get("primary_key", "unique_id")
-
-        original_len = len(df)
-
-        # Remove row
-        mask = df[pk] != pk_value
-        if mask.all():
-            # Try string comparison
-            mask = df[pk].astype(str) != str(pk_value)
-
-        df = df[mask]
-
-        if len(df) == original_len:
-            raise ValueError(f"Row with {pk}={pk_value} not found")
-
-        # Save
-        pq.write_table(pa.Table.from_pandas(df), path)
-        metadata["last_modified"] = datetime.now().isoformat()
-        self._save_metadata(table_name, metadata)
-
+        self._apply_edit(table_name, RowEdit(op="delete", pk_value=pk_value))
         return {"success": True}
 
     def add_column(
@@ -255,80 +627,88 @@ class SourceService:
         nullable: bool = True,
         default_value: Any = None
     ) -> dict:
-        """Add a new column to the table."""
-        import pandas as pd
+        """
+        Add a new column to the table.
 
+        Only the metadata changes: the column reads as default_value until
+        edited, and is written to the file by the next compaction.
+        """
         path = self._get_parquet_path(table_name)
         if not path.exists():
             raise FileNotFoundError(f"Source table '{table_name}' not found")
 
-        df = pd.read_parquet(path)
+        with self._exclusive(table_name):
+            metadata = self._load_metadata(table_name)
+            projection = Projection.from_metadata(metadata)
 
-        if column_name in df.columns:
-            raise ValueError(f"Column '{column_name}' already exists")
+            if column_name in projection.schema(pq.read_schema(path)).names:
+                raise ValueError(f"Column '{column_name}' already exists")
 
-        # Add column with default value
-        df[column_name] = default_value
+            if column_name in projection.dropped:
+                # Edits logged for the dropped column mustn't show up in the new one
+                self.compact(table_name)
+                metadata = self._load_metadata(table_name)
+                projection = Projection.from_metadata(metadata)
 
-        # Save
-        pq.write_table(pa.Table.from_pandas(df), path)
-        metadata = self._load_metadata(table_name)
-        metadata["last_modified"] = datetime.now().isoformat()
-        self._save_metadata(table_name, metadata)
+            # Add column with default value
+            projection.add(column_name, column_type, nullable, default_value)
+
+            projection.to_metadata(metadata)
+            metadata["last_modified"] = datetime.now().isoformat()
+            self._save_metadata(table_name, self._bump_version(table_name, metadata))
 
         return {"success": True}
 
     def remove_column(self, table_name: str, column_name: str) -> dict:
-        """Remove a column from the table."""
-        import pandas as pd
-
+        """Remove a column from the table (hidden until the next compaction drops it from the file)."""
         path = self._get_parquet_path(table_name)
         if not path.exists():
             raise FileNotFoundError(f"Source table '{table_name}' not found")
 
-        df = pd.read_parquet(path)
-        metadata = self._load_metadata(table_name)
+        with self._exclusive(table_name):
+            metadata = self._load_metadata(table_name)
+            projection = Projection.from_metadata(metadata)
 
-        if column_name not in df.columns:
-            raise ValueError(f"Column '{column_name}' not found")
+            if column_name not in projection.schema(pq.read_schema(path)).names:
+                raise ValueError(f"Column '{column_name}' not found")
 
-        if column_name == metadata.get("primary_key"):
-            raise ValueError("Cannot remove primary key column")
+            if column_name == metadata.get("primary_key"):
+                raise ValueError("Cannot remove primary key column")
 
-        df = df.drop(columns=[column_name])
+            projection.drop(column_name)
 
-        # Save
-        pq.write_table(pa.Table.from_pandas(df), path)
-        metadata["last_modified"] = datetime.now().isoformat()
-        self._save_metadata(table_name, metadata)
+            projection.to_metadata(metadata)
+            metadata["last_modified"] = datetime.now().isoformat()
+            self._save_metadata(table_name, self._bump_version(table_name, metadata))
 
         return {"success": True}
 
     def create_from_duckdb(self, table_name: str, source_table: str = "nyc_taxi_raw.trips", limit: int = 100) -> dict:
         """Create a new source Parquet file from DuckDB data."""
-        import pandas as pd
+        schema, table = source_table.split(".", 1) if "." in source_table else ("main", source_table)
+        # Both names must be in the catalog before they go into the SQL
+        db_service.check_table(schema, table)
 
-        conn = duckdb.connect(str(DATABASE_PATH), read_only=True)
-        try:
-            df = conn.execute(f"SELECT * FROM {source_table} LIMIT {limit}").fetchdf()
-        finally:
-            conn.close()
+        with connection_manager.cursor() as conn:
+            df = conn.execute(f"SELECT * FROM {_quote(schema)}.{_quote(table)} LIMIT ?", [limit]).fetchdf()
 
         if df.empty:
             raise ValueError(f"No data found in {source_table}")
 
         path = self._get_parquet_path(table_name)
-        pq.write_table(pa.Table.from_pandas(df), path)
+        with self._exclusive(table_name):
+            pq.write_table(pa.Table.from_pandas(df), path)
+            self._reset_delta(table_name)
 
-        # Determine primary key
-        pk = "unique_id" if "unique_id" in df.columns else df.columns[0]
+            # Determine primary key
+            pk = "unique_id" if "unique_id" in df.columns else df.columns[0]
 
-        metadata = {
-            "primary_key": pk,
-            "last_modified": datetime.now().isoformat(),
-            "source": source_table,
-        }
-        self._save_metadata(table_name, metadata)
+            metadata = {
+                "primary_key": pk,
+                "last_modified": datetime.now().isoformat(),
+                "source": source_table,
+            }
+            self._save_metadata(table_name, self._bump_version(table_name, metadata))
 
         return {"success": True, "rows_loaded": len(df), "path": str(path)}
 
@@ -345,31 +725,32 @@ class SourceService:
         if not path.exists():
             raise FileNotFoundError(f"Source table '{table_name}' not found")
 
-        conn = duckdb.connect(str(DATABASE_PATH))
-        try:
-            # Create schema if needed
-            conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_raw")
+        # Fold pending edits into the file, and keep it in place while DuckDB reads it
+        with self._compact_lock(table_name):
+            self.compact(table_name)
+            with connection_manager.writer(kind="sync", label=table_name) as conn:
+                # Create schema if needed
+                conn.execute("CREATE SCHEMA IF NOT EXISTS nyc_taxi_raw")
 
-            # Load Parquet directly into DuckDB
-            conn.execute(f"""
-                CREATE OR REPLACE TABLE nyc_taxi_raw.{table_name} AS
-                SELECT * FROM read_parquet('{path}')
-            """)
+                # Load Parquet directly into DuckDB
+                conn.execute(f"""
+                    CREATE OR REPLACE TABLE nyc_taxi_raw.{table_name} AS
+                    SELECT * FROM read_parquet('{path}')
+                """)
 
-            # Get row count
-            result = conn.execute(f"SELECT COUNT(*) FROM nyc_taxi_raw.{table_name}").fetchone()
-            row_count = result[0] if result else 0
+                # Get row count
+                result = conn.execute(f"SELECT COUNT(*) FROM nyc_taxi_raw.{table_name}").fetchone()
+                row_count = result[0] if result else 0
 
-            conn.commit()
-            return {"success": True, "rows_synced": row_count}
-        finally:
-            conn.close()
+        return {"success": True, "rows_synced": row_count}
 
     def get_parquet_path(self, table_name: str) -> str:
         """Get the path to the Parquet file for use by dlt pipeline."""
         path = self._get_parquet_path(table_name)
         if not path.exists():
             raise FileNotFoundError(f"Source table '{table_name}' not found")
+        # The file is read directly, so it must include pending edits
+        self.compact(table_name)
         return str(path)
 
 
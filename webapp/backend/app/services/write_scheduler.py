@@ -0,0 +1,221 @@
+"""
+Single-writer queue for the DuckDB file.
+
+DuckDB allows one writer process at a time, and the backend has several:
+editor writes and source syncs on the shared instance, dbt runs and dlt
+loads in other processes. Every writer takes a slot here first, so they
+run one at a time in priority order instead of colliding on the file lock:
+- edit: interactive writes from the data editor (highest)
+- sync: source Parquet -> DuckDB syncs
+- job: dlt loads and dbt runs (lowest; they hold the slot for minutes)
+
+Writers of the same priority run in arrival order. Readers never queue.
+Threads wait with slot(); async code (the job runners) waits with
+async_slot() so the event loop keeps running while a job is queued.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+# Lower runs first
+PRIORITIES = {
+    "edit": 0,
+    "sync": 1,
+    "job": 2,
+}
+
+
+class WriteQueueTimeoutError(TimeoutError):
+    """A writer waited longer than its timeout for the write slot."""
+
+
+class _Ticket:
+    """One writer waiting for (or holding) the slot."""
+
+    def __init__(self, kind: str, label: str, seq: int, grant: Callable[[], None]):
+        self.kind = kind
+        self.label = label
+        self.priority = PRIORITIES[kind]
+        self.seq = seq
+        self.grant = grant
+        self.thread_ident: Optional[int] = None
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.abandoned = False
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class WriteScheduler:
+    """Priority queue that hands the write slot to one writer at a time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: list[_Ticket] = []
+        self._active: Optional[_Ticket] = None
+        self._seq = itertools.count()
+        # Per kind: completed writers, total and max wait (seconds)
+        self._stats = {kind: {"count": 0, "total_wait": 0.0, "max_wait": 0.0} for kind in PRIORITIES}
+
+    # ------------------------------------------------------------------
+    # Queue
+    # ------------------------------------------------------------------
+
+    def _enqueue(
+        self,
+        kind: str,
+        label: str,
+        grant: Callable[[], None],
+        thread_ident: Optional[int] = None
+    ) -> _Ticket:
+        if kind not in PRIORITIES:
+            raise ValueError(f"Unknown writer kind: {kind}")
+        with self._lock:
+            ticket = _Ticket(kind, label, next(self._seq), grant)
+            ticket.thread_ident = thread_ident
+            heapq.heappush(self._queue, ticket)
+            self._dispatch()
+            return ticket
+
+    def _dispatch(self) -> None:
+        """Grant the slot to the next waiting writer if it is free. Caller holds self._lock."""
+        while self._active is None and self._queue:
+            ticket = heapq.heappop(self._queue)
+            if ticket.abandoned:
+                continue
+            ticket.started_at = time.monotonic()
+            self._active = ticket
+            ticket.grant()
+
+    def _abandon(self, ticket: _Ticket) -> bool:
+        """Give up a ticket; returns False if it was granted the slot meanwhile."""
+        with self._lock:
+            if ticket is self._active:
+                return False
+            ticket.abandoned = True
+            return True
+
+    def _release(self, ticket: _Ticket) -> None:
+        with self._lock:
+            if ticket is not self._active:
+                return
+            stats = self._stats[ticket.kind]
+            waited = ticket.started_at - ticket.queued_at
+            stats["count"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+            self._active = None
+            self._dispatch()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def slot(self, kind: str, label: str = "", timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Hold the write slot for the duration of the block (blocking wait).
+
+        Raises WriteQueueTimeoutError if the slot isn't granted within
+        timeout seconds, or if the wait is abandoned with abandon_thread().
+        """
+        granted = threading.Event()
+        ticket = self._enqueue(kind, label, granted.set, threading.get_ident())
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not granted.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if ticket.abandoned or (remaining is not None and remaining <= 0):
+                abandoned = ticket.abandoned
+                if self._abandon(ticket):
+                    if abandoned:
+                        raise WriteQueueTimeoutError("Gave up waiting for the database writer")
+                    raise WriteQueueTimeoutError(f"Timed out after {timeout:g}s waiting for the database writer")
+                break
+            # Wake up now and then to notice abandon_thread()
+            granted.wait(0.1 if remaining is None else min(remaining, 0.1))
+
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    @asynccontextmanager
+    async def async_slot(self, kind: str, label: str = "") -> AsyncIterator[None]:
+        """Hold the write slot for the duration of the block (awaits its turn)."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant() -> None:
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        ticket = self._enqueue(kind, label, grant)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if not self._abandon(ticket):
+                self._release(ticket)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def abandon_thread(self, thread_ident: int) -> int:
+        """Drop the queued (not yet running) writers of a thread; returns how many."""
+        with self._lock:
+            tickets = [t for t in self._queue if t.thread_ident == thread_ident and not t.abandoned]
+            for ticket in tickets:
+                ticket.abandoned = True
+        return len(tickets)
+
+    @property
+    def busy(self) -> bool:
+        """Whether a new writer would have to wait."""
+        with self._lock:
+            return self._active is not None or any(not t.abandoned for t in self._queue)
+
+    @property
+    def depth(self) -> int:
+        """Number of writers waiting for the slot."""
+        with self._lock:
+            return sum(1 for t in self._queue if not t.abandoned)
+
+    def stats(self) -> dict:
+        """Current queue and wait time statistics."""
+        now = time.monotonic()
+        with self._lock:
+            waiting = sorted(t for t in self._queue if not t.abandoned)
+            active = self._active
+            return {
+                "depth": len(waiting),
+                "active": None if active is None else {
+                    "kind": active.kind,
+                    "label": active.label,
+                    "waited_ms": round((active.started_at - active.queued_at) * 1000, 1),
+                    "running_ms": round((now - active.started_at) * 1000, 1),
+                },
+                "waiting": [
+                    {"kind": t.kind, "label": t.label, "waited_ms": round((now - t.queued_at) * 1000, 1)}
+                    for t in waiting
+                ],
+                "kinds": {
+                    kind: {
+                        "completed": s["count"],
+                        "avg_wait_ms": round(s["total_wait"] / s["count"] * 1000, 1) if s["count"] else 0.0,
+                        "max_wait_ms": round(s["max_wait"] * 1000, 1),
+                    }
+                    for kind, s in self._stats.items()
+                },
+            }
+
+
+# Singleton instance
+write_scheduler = WriteScheduler()
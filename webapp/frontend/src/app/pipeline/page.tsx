@@ -17,6 +17,7 @@ export default function PipelinePage() {
   const [taxiType, setTaxiType] = useState<'yellow' | 'green' | 'fhv' | 'fhvhv'>('yellow');
   const [writeDisposition, setWriteDisposition] = useState<'replace' | 'merge' | 'append'>('replace');
   const [rowLimit, setRowLimit] = useState(10000);
+  const [sampling, setSampling] = useState<'head' | 'uniform' | 'stratified'>('head');
 
   // dbt form state
   const [dbtCommand, setDbtCommand] = useState<'run' | 'test' | 'build'>('run');
@@ -47,6 +48,7 @@ export default function PipelinePage() {
       taxi_type: taxiType,
       write_disposition: writeDisposition,
       row_limit: rowLimit,
+      sampling,
     });
   };
 
@@ -160,6 +162,24 @@ export default function PipelinePage() {
               />
             </div>
 
+            <div>
+              <label className="block text-sm font-medium text-gray-700">
+                Sampling
+                <span className="ml-2 text-xs text-gray-500">
+                  (Which rows the limit keeps)
+                </span>
+              </label>
+              <select
+                value={sampling}
+                onChange={(e) => setSampling(e.target.value as typeof sampling)}
+                className="mt-1 block w-full rounded-md border border-gray-300 px-3 py-2 shadow-sm focus:border-blue-500 focus:outline-none focus:ring-1 focus:ring-blue-500"
+              >
+                <option value="head">First rows (fastest)</option>
+                <option value="uniform">Uniform random</option>
+                <option value="stratified">Random, stratified by day</option>
+              </select>
+            </div>
+
             <button
               onClick={handleRunPipeline}
               disabled={runPipeline.isPending}
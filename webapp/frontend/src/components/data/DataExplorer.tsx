@@ -1,6 +1,6 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { useQuery } from '@tanstack/react-query';
 import { Database, Table, ChevronRight, ChevronDown, Layers } from 'lucide-react';
 import { dataApi } from '@/lib/api';
@@ -8,7 +8,7 @@ import { dataApi } from '@/lib/api';
 interface TableInfo {
   name: string;
   schema: string;
-  row_count: number;
+  row_count: number | null; // null for views until counted
 }
 
 const layerConfig: Record<string, { color: string; order: number }> = {
@@ -25,6 +25,8 @@ export default function DataExplorer() {
   const [expandedSchemas, setExpandedSchemas] = useState<Set<string>>(new Set(['main_marts']));
   const [selectedTable, setSelectedTable] = useState<string | null>(null);
   const [page, setPage] = useState(0);
+  // Keyset token for each page we have reached (page 0 needs none)
+  const [pageCursors, setPageCursors] = useState<(string | null)[]>([null]);
   const pageSize = 50;
 
   const { data: tables, isLoading: tablesLoading } = useQuery({
@@ -35,10 +37,23 @@ export default function DataExplorer() {
   const { data: tableData, isLoading: dataLoading } = useQuery({
     queryKey: ['table-data', selectedTable, page],
     queryFn: () =>
-      selectedTable ? dataApi.queryTable(selectedTable, pageSize, page * pageSize) : null,
+      selectedTable
+        ? dataApi.queryTable(selectedTable, pageSize, page * pageSize, pageCursors[page])
+        : null,
     enabled: !!selectedTable,
   });
 
+  // Remember the token for the next page so paging forward is constant time
+  useEffect(() => {
+    if (tableData?.next_cursor) {
+      setPageCursors((cursors) => {
+        const next = [...cursors];
+        next[page + 1] = tableData.next_cursor ?? null;
+        return next;
+      });
+    }
+  }, [tableData, page]);
+
   // Group tables by schema
   const tablesBySchema = (tables || []).reduce(
     (acc, table) => {
@@ -70,6 +85,7 @@ export default function DataExplorer() {
   const selectTable = (tableName: string) => {
     setSelectedTable(tableName);
     setPage(0);
+    setPageCursors([null]);
   };
 
   const getSchemaDisplayName = (schema: string): string => {
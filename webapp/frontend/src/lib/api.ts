@@ -41,6 +41,7 @@ export interface SourceTableData {
   total_count: number;
   limit: number;
   offset: number;
+  version: number;  // pass back as expected_version to detect conflicting edits
 }
 
 export interface DagNode {
@@ -166,6 +167,28 @@ export const sourceApi = {
       method: 'DELETE',
     }),
 
+  editRows: (
+    tableName: string,
+    edits: { op: 'insert' | 'update' | 'delete'; pk_value?: unknown; data?: Record<string, unknown> }[],
+    expectedVersion?: number
+  ) =>
+    fetchApi<{
+      success: boolean;
+      version: number;
+      results: {
+        op: 'insert' | 'update' | 'delete';
+        index: number;
+        pk_value: unknown;
+        success: boolean;
+        conflict: boolean;
+        error?: string | null;
+        row?: Record<string, unknown> | null;
+      }[];
+    }>(`/api/source/tables/${tableName}/edits`, {
+      method: 'POST',
+      body: JSON.stringify({ edits, expected_version: expectedVersion }),
+    }),
+
   addColumn: (tableName: string, column: { name: string; type: string; nullable?: boolean; default_value?: unknown }) =>
     fetchApi<{ success: boolean }>(`/api/source/tables/${tableName}/columns`, {
       method: 'POST',
@@ -245,24 +268,50 @@ export const dataApi = {
   getSchemas: () => fetchApi<string[]>('/api/data/schemas'),
 
   listTables: () =>
-    fetchApi<{ name: string; schema: string; row_count: number }[]>('/api/data/tables'),
+    fetchApi<{ name: string; schema: string; row_count: number | null; row_count_exact: boolean }[]>('/api/data/tables'),
 
   getTables: (schema: string) =>
     fetchApi<{ name: string; schema_name: string; column_count: number; row_count?: number; table_type: string }[]>(
       `/api/data/tables/${schema}`
     ),
 
-  queryTable: (tableName: string, limit = 100, offset = 0) => {
+  queryTable: (tableName: string, limit = 100, offset = 0, cursor?: string | null) => {
     const searchParams = new URLSearchParams({
       table: tableName,
       limit: String(limit),
       offset: String(offset),
     });
+    if (cursor) searchParams.set('cursor', cursor);
 
     return fetchApi<{
       data: Record<string, unknown>[];
       columns: { name: string; type: string }[];
       total_count: number;
+      next_cursor?: string | null;
     }>(`/api/data/query?${searchParams}`);
   },
+
+  bulkWrite: (request: {
+    schema_name: string;
+    table_name: string;
+    pk_column: string;
+    inserts?: Record<string, unknown>[];
+    updates?: { pk_value: unknown; updates: Record<string, unknown> }[];
+    deletes?: unknown[];
+    atomic?: boolean;
+  }) =>
+    fetchApi<{
+      success: boolean;
+      committed: boolean;
+      inserted: number;
+      updated: number;
+      deleted: number;
+      results: {
+        operation: 'insert' | 'update' | 'delete';
+        index: number;
+        pk_value: unknown;
+        success: boolean;
+        error?: string | null;
+      }[];
+    }>('/api/data/bulk', { method: 'POST', body: JSON.stringify(request) }),
 };
@@ -35,6 +35,8 @@ export interface PipelineRunRequest {
   taxi_type: 'yellow' | 'green' | 'fhv' | 'fhvhv';
   write_disposition: 'replace' | 'merge' | 'append';
   row_limit?: number;
+  sampling?: 'head' | 'uniform' | 'stratified';
+  loader_file_format?: 'parquet' | 'insert_values' | 'jsonl';
 }
 
 export interface DbtRunRequest {